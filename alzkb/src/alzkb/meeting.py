@@ -18,6 +18,35 @@ from alzkb.constants import (
 from alzkb.meeting_result import MeetingResult, create_meeting_result
 
 
+_client: genai.Client | None = None
+
+
+def get_client() -> genai.Client:
+    """Returns the process-wide Gemini client, shared by all meetings.
+
+    Reusing one client keeps its HTTP connection pool alive across meetings
+    instead of setting up new connections for every meeting.
+    """
+    global _client
+
+    if _client is None:
+        _client = genai.Client()
+
+    return _client
+
+
+def _is_pass(text: str, max_words: int = 20) -> bool:
+    """Checks whether a reply passes the turn (starts with "Pass" and is short).
+
+    An empty reply (e.g., a failed or blocked call) is not a pass.
+    """
+    words = text.strip().split()
+
+    return 0 < len(words) <= max_words and (
+        words[0].strip(".,!:;'\"*").lower() == "pass"
+    )
+
+
 def run_meeting(
     meeting_type: Literal["team", "individual"],
     agenda: str,
@@ -29,6 +58,10 @@ def run_meeting(
     model_name: str = MODEL_FLASH,
     history: List[str] | None = None,
     generate_summaries: bool = True,
+    client: genai.Client | None = None,
+    early_stopping: bool = False,
+    max_consecutive_passes: int = 2,
+    pass_ratio: float = 0.5,
 ) -> MeetingResult:
     """
     Runs a meeting (multi-agent discussion) using Google Gemini Chat.
@@ -43,11 +76,19 @@ def run_meeting(
     :param model_name: The Gemini model to use.
     :param history: Optional list of strings to seed the chat context.
     :param generate_summaries: Whether to generate narrative and structured summaries.
+    :param client: Optional Gemini client (defaults to the shared client from get_client()).
+    :param early_stopping: If True, skip the turns of an agent after `max_consecutive_passes`
+                           consecutive passes, and end the discussion early (going straight
+                           to the summaries) once at least `pass_ratio` of a round's turns
+                           were passes.
+    :param max_consecutive_passes: Consecutive passes after which an agent is skipped.
+    :param pass_ratio: The fraction of passes in a round that ends the discussion.
     :return: MeetingResult containing chat, summaries, and metadata.
     """
     
-    # 1. Initialize Client (implicitly uses GOOGLE_API_KEY from env)
-    client = genai.Client()
+    # 1. Reuse the shared client (implicitly uses GOOGLE_API_KEY from env)
+    if client is None:
+        client = get_client()
     
     # 2. Setup Team
     participants = []
@@ -71,10 +112,22 @@ def run_meeting(
     print(f"Starting {meeting_type} meeting on: {topic}")
     
     # 4. Meeting Loop
+    consecutive_passes = {agent.title: 0 for agent in participants}
+    calls_saved = 0
+
     for round_idx in range(num_rounds):
         print(f"\n--- Round {round_idx + 1}/{num_rounds} ---")
+        round_turns = 0
+        round_passes = 0
         
         for i, agent in enumerate(participants):
+            # Skip agents that keep passing (counted as passing this round)
+            if early_stopping and consecutive_passes[agent.title] >= max_consecutive_passes:
+                calls_saved += 1
+                round_turns += 1
+                round_passes += 1
+                continue
+
             # Construct the specific prompt for this agent's turn.
             turn_prompt = (
                 f"ACT AS: {agent.title}\n"
@@ -96,8 +149,34 @@ def run_meeting(
                     print(f"\n>> {agent.title}:\n{response.text[:200]}...")
                 else:
                     print(f"\n>> {agent.title}: [No text response]")
+
+                reply = response.text or ""
             except Exception as e:
                 print(f"Error calling model for {agent.title}: {e}")
+                reply = ""
+
+            # Failed and empty turns count as not passed
+            round_turns += 1
+            if _is_pass(reply):
+                consecutive_passes[agent.title] += 1
+                round_passes += 1
+            else:
+                consecutive_passes[agent.title] = 0
+
+        # End the discussion early once most of the round passed
+        remaining_rounds = num_rounds - round_idx - 1
+        if (
+            early_stopping
+            and remaining_rounds > 0
+            and round_turns > 0
+            and round_passes / round_turns >= pass_ratio
+        ):
+            calls_saved += remaining_rounds * len(participants)
+            print(f"\nConsensus reached after round {round_idx + 1}, ending discussion")
+            break
+
+    if early_stopping:
+        print(f"Early stopping saved {calls_saved} of {num_rounds * len(participants)} calls")
 
     # 5. Determine summarizer
     summarizer = team_lead if team_lead else team_member
@@ -0,0 +1,453 @@
+"""Indexed SQLite archive of saved meetings with content-addressed transcript blobs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    path TEXT,
+    source_mtime REAL,
+    agenda_hash TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    num_turns INTEGER NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meeting_agents (
+    meeting_id INTEGER NOT NULL REFERENCES meetings(id) ON DELETE CASCADE,
+    agent TEXT NOT NULL,
+    PRIMARY KEY (meeting_id, agent)
+);
+CREATE TABLE IF NOT EXISTS turns (
+    meeting_id INTEGER NOT NULL REFERENCES meetings(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    agent TEXT NOT NULL,
+    message_hash TEXT NOT NULL REFERENCES blobs(hash),
+    PRIMARY KEY (meeting_id, idx)
+);
+CREATE INDEX IF NOT EXISTS meetings_path ON meetings(path);
+CREATE INDEX IF NOT EXISTS meetings_agenda_hash ON meetings(agenda_hash);
+CREATE INDEX IF NOT EXISTS meetings_created_at ON meetings(created_at);
+CREATE INDEX IF NOT EXISTS meeting_agents_agent ON meeting_agents(agent);
+CREATE INDEX IF NOT EXISTS turns_message_hash ON turns(message_hash);
+"""
+
+
+def content_hash(text: str) -> str:
+    """Returns the SHA-256 hex digest of a text.
+
+    :param text: The text to hash.
+    :return: The hex digest.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _agenda(discussion: list[dict[str, str]]) -> str:
+    """Returns the meeting header (the leading "User" turn), which contains the agenda."""
+    if discussion and discussion[0]["agent"] == "User":
+        return discussion[0]["message"]
+
+    return ""
+
+
+@dataclass
+class MeetingRecord:
+    """The index entry of an archived meeting.
+
+    Attributes:
+        name: The unique name of the meeting in the archive.
+        path: The path of the discussion JSON file it was saved to or imported from.
+        agenda_hash: The content hash of the agenda (see `content_hash`).
+        agents: The titles of the agents who spoke, in order of first appearance.
+        created_at: The time the meeting was saved (Unix timestamp).
+        num_turns: The number of turns, including the header.
+        summary: The summary of the meeting (its last message).
+    """
+    name: str
+    path: str | None
+    agenda_hash: str
+    agents: list[str]
+    created_at: float
+    num_turns: int
+    summary: str
+
+
+class MeetingArchive:
+    """An SQLite index of meetings with their transcripts stored as content-addressed blobs.
+
+    Each meeting row holds its name, source path, agenda hash, date, number of
+    turns, and summary, so summaries and metadata are looked up without
+    reading any transcript. Turn messages are stored once per distinct content
+    (zlib-compressed, keyed by SHA-256), so agendas and contexts repeated
+    across thousands of meetings are deduplicated, and any range of turns can
+    be loaded on its own.
+
+        archive = MeetingArchive("discussions/archive.sqlite")
+        archive.import_directory("discussions")
+        summaries = archive.load_summaries(["phase_1/discussion_1", "phase_1/discussion_2"])
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        """Opens (or creates) the archive.
+
+        :param path: The path to the SQLite database file.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        self._connection.close()
+
+    def __enter__(self) -> MeetingArchive:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _put_blob(self, text: str) -> str:
+        digest = content_hash(text)
+        self._connection.execute(
+            "INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)",
+            (digest, zlib.compress(text.encode("utf-8"))),
+        )
+
+        return digest
+
+    def _add_meeting(
+        self,
+        name: str,
+        discussion: list[dict[str, str]],
+        path: str | None,
+        source_mtime: float | None,
+        created_at: float,
+    ) -> None:
+        agents = list(
+            dict.fromkeys(turn["agent"] for turn in discussion if turn["agent"] != "User")
+        )
+
+        # A meeting replaces any earlier entry with the same name or file
+        replaced_hashes = [
+            row[0]
+            for row in self._connection.execute(
+                "SELECT DISTINCT turns.message_hash FROM turns "
+                "JOIN meetings ON meetings.id = turns.meeting_id "
+                "WHERE meetings.name = ? OR meetings.path = ?",
+                (name, path),
+            )
+        ]
+        self._connection.execute(
+            "DELETE FROM meetings WHERE name = ? OR path = ?", (name, path)
+        )
+        meeting_id = self._connection.execute(
+            "INSERT INTO meetings "
+            "(name, path, source_mtime, agenda_hash, created_at, num_turns, summary) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                name,
+                path,
+                source_mtime,
+                content_hash(_agenda(discussion)),
+                created_at,
+                len(discussion),
+                discussion[-1]["message"] if discussion else "",
+            ),
+        ).lastrowid
+        self._connection.executemany(
+            "INSERT INTO meeting_agents (meeting_id, agent) VALUES (?, ?)",
+            [(meeting_id, agent) for agent in agents],
+        )
+        self._connection.executemany(
+            "INSERT INTO turns (meeting_id, idx, agent, message_hash) VALUES (?, ?, ?, ?)",
+            [
+                (meeting_id, idx, turn["agent"], self._put_blob(turn["message"]))
+                for idx, turn in enumerate(discussion)
+            ],
+        )
+
+        # Delete the blobs of the replaced meeting that no meeting uses anymore
+        self._connection.executemany(
+            "DELETE FROM blobs WHERE hash = ? "
+            "AND NOT EXISTS (SELECT 1 FROM turns WHERE message_hash = ?)",
+            [(digest, digest) for digest in replaced_hashes],
+        )
+
+    def add_meeting(
+        self,
+        name: str,
+        discussion: list[dict[str, str]],
+        path: Path | None = None,
+        created_at: float | None = None,
+    ) -> None:
+        """Adds a meeting to the archive, replacing any meeting with the same name.
+
+        Messages of the replaced meeting that no other meeting shares are deleted.
+
+        :param name: The unique name of the meeting (e.g., "phase_1/discussion_1").
+        :param discussion: The discussion turns ("agent" and "message").
+        :param path: The path of the discussion JSON file, if saved to disk.
+        :param created_at: The time of the meeting (defaults to now).
+        """
+        with self._lock, self._connection:
+            self._add_meeting(
+                name=name,
+                discussion=discussion,
+                path=str(Path(path).resolve()) if path is not None else None,
+                source_mtime=None,
+                created_at=created_at if created_at is not None else time.time(),
+            )
+
+    def import_directory(self, directory: Path | str, pattern: str = "**/*.json") -> int:
+        """Imports saved discussions (as written by `save_meeting`) from a directory.
+
+        Meetings are named by their path relative to `directory` without the
+        suffix. Files whose modification time has not changed since they were
+        last imported are skipped, so re-importing a directory is cheap. Files
+        that are not discussions (e.g., other JSON files) are ignored.
+
+        :param directory: The directory to import, searched recursively.
+        :param pattern: The glob pattern of the discussion files.
+        :return: The number of meetings imported or updated.
+        """
+        directory = Path(directory)
+        imported_mtimes = dict(
+            self._connection.execute(
+                "SELECT path, source_mtime FROM meetings WHERE path IS NOT NULL"
+            )
+        )
+        num_imported = 0
+
+        with self._lock, self._connection:
+            for discussion_path in sorted(directory.glob(pattern)):
+                resolved = str(discussion_path.resolve())
+                mtime = discussion_path.stat().st_mtime
+
+                if imported_mtimes.get(resolved) == mtime:
+                    continue
+
+                with open(discussion_path, "r") as file:
+                    try:
+                        discussion = json.load(file)
+                    except json.JSONDecodeError:
+                        continue
+
+                if not _is_discussion(discussion):
+                    continue
+
+                self._add_meeting(
+                    name=discussion_path.relative_to(directory).with_suffix("").as_posix(),
+                    discussion=discussion,
+                    path=resolved,
+                    source_mtime=mtime,
+                    created_at=mtime,
+                )
+                num_imported += 1
+
+        return num_imported
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _meeting_id(self, name: str) -> int:
+        row = self._connection.execute(
+            "SELECT id FROM meetings WHERE name = ?", (name,)
+        ).fetchone()
+
+        if row is None:
+            raise KeyError(f"Meeting {name!r} not found in archive {self.path}")
+
+        return row[0]
+
+    def get_summary(self, name: str) -> str:
+        """Returns the summary of a meeting without loading its transcript.
+
+        :param name: The name of the meeting.
+        :return: The summary.
+        """
+        return self.load_summaries([name])[0]
+
+    def load_summaries(self, names: Iterable[str]) -> tuple[str, ...]:
+        """Returns the summaries of meetings in one query.
+
+        :param names: The names of the meetings.
+        :return: The summaries, in the order of `names`.
+        """
+        names = list(names)
+        summaries = dict(
+            self._connection.execute(
+                "SELECT name, summary FROM meetings "
+                f"WHERE name IN ({', '.join('?' * len(names))})",
+                names,
+            )
+        )
+
+        missing = [name for name in names if name not in summaries]
+        if missing:
+            raise KeyError(f"Meetings not found in archive {self.path}: {missing}")
+
+        return tuple(summaries[name] for name in names)
+
+    def summaries_by_path(self, paths: Iterable[Path]) -> dict[Path, str]:
+        """Returns the archived summaries of discussion files by path.
+
+        :param paths: The paths of discussion JSON files.
+        :return: A mapping from each archived path to its summary (paths that
+            are not archived are omitted).
+        """
+        resolved = {str(Path(path).resolve()): Path(path) for path in paths}
+        rows = self._connection.execute(
+            "SELECT path, summary FROM meetings "
+            f"WHERE path IN ({', '.join('?' * len(resolved))})",
+            list(resolved),
+        )
+
+        return {resolved[path]: summary for path, summary in rows}
+
+    def get_turns(
+        self, name: str, start: int = 0, stop: int | None = None
+    ) -> list[dict[str, str]]:
+        """Returns a range of turns of a meeting, decompressing only those turns.
+
+        :param name: The name of the meeting.
+        :param start: The index of the first turn (0 is the header, if any).
+        :param stop: The index after the last turn (None for the end of the meeting).
+        :return: The turns ("agent" and "message") in order.
+        """
+        rows = self._connection.execute(
+            "SELECT turns.agent, blobs.data FROM turns "
+            "JOIN blobs ON blobs.hash = turns.message_hash "
+            "WHERE turns.meeting_id = ? AND turns.idx >= ? AND turns.idx < ? "
+            "ORDER BY turns.idx",
+            (self._meeting_id(name), start, stop if stop is not None else 2**62),
+        )
+
+        return [
+            {"agent": agent, "message": zlib.decompress(data).decode("utf-8")}
+            for agent, data in rows
+        ]
+
+    def find_meetings(
+        self,
+        agent: str | None = None,
+        agenda_hash: str | None = None,
+        name_prefix: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> list[MeetingRecord]:
+        """Returns the index entries of the meetings matching all given filters.
+
+        :param agent: The title of an agent who spoke in the meeting.
+        :param agenda_hash: The content hash of the agenda (see `content_hash`).
+        :param name_prefix: A prefix of the meeting name (e.g., "phase_1/").
+        :param since: The earliest creation time (Unix timestamp).
+        :param until: The latest creation time (Unix timestamp).
+        :return: The matching meetings, oldest first.
+        """
+        conditions, params = [], []
+
+        if agent is not None:
+            conditions.append(
+                "id IN (SELECT meeting_id FROM meeting_agents WHERE agent = ?)"
+            )
+            params.append(agent)
+
+        if agenda_hash is not None:
+            conditions.append("agenda_hash = ?")
+            params.append(agenda_hash)
+
+        if name_prefix is not None:
+            conditions.append("substr(name, 1, ?) = ?")
+            params += [len(name_prefix), name_prefix]
+
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+
+        if until is not None:
+            conditions.append("created_at <= ?")
+            params.append(until)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connection.execute(
+            "SELECT id, name, path, agenda_hash, created_at, num_turns, summary "
+            f"FROM meetings {where} ORDER BY created_at, name",
+            params,
+        ).fetchall()
+
+        return [
+            MeetingRecord(
+                name=name,
+                path=path,
+                agenda_hash=agenda_hash,
+                agents=[
+                    row[0]
+                    for row in self._connection.execute(
+                        "SELECT agent FROM meeting_agents "
+                        "WHERE meeting_id = ? ORDER BY rowid",
+                        (meeting_id,),
+                    )
+                ],
+                created_at=created_at,
+                num_turns=num_turns,
+                summary=summary,
+            )
+            for meeting_id, name, path, agenda_hash, created_at, num_turns, summary in rows
+        ]
+
+
+def _is_discussion(data: object) -> bool:
+    """Checks whether parsed JSON looks like a discussion saved by `save_meeting`."""
+    return (
+        isinstance(data, list)
+        and len(data) > 0
+        and all(
+            isinstance(turn, dict) and "agent" in turn and "message" in turn for turn in data
+        )
+    )
+
+
+def import_discussions(archive_path: Path, directories: list[Path]) -> None:
+    """Imports saved discussion directories into a meeting archive.
+
+    :param archive_path: The path to the SQLite archive (created if needed).
+    :param directories: The discussion directories to import.
+    """
+    with MeetingArchive(archive_path) as archive:
+        for directory in directories:
+            start_time = time.time()
+            num_imported = archive.import_directory(directory)
+            print(
+                f"Imported {num_imported:,} meetings from {directory} "
+                f"in {time.time() - start_time:.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    from tap import tapify
+
+    tapify(import_discussions)
@@ -0,0 +1,389 @@
+"""Pluggable chat backends (OpenAI, Google GenAI, local mock) with pooled, long-lived clients."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+import weakref
+from typing import Any, AsyncIterator, Iterator, Literal
+
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+
+Provider = Literal["openai", "google", "mock"]
+
+
+def agent_system_prompt(agent: Any) -> str | None:
+    """Returns the system prompt text of an agent.
+
+    `alzkb.agents.Agent` has its prompt text in `.system_prompt` (other agents
+    may use `.prompt`). `virtual_lab.agent.Agent` instead refers by `.pmpt_id`
+    to a prompt stored on the OpenAI platform, which only the Responses API can
+    use (see `agent_request`), so None is returned for it.
+
+    :param agent: The agent.
+    :return: The system prompt, or None if the agent only has a stored prompt.
+    """
+    for name in ("prompt", "system_prompt"):
+        prompt = getattr(agent, name, None)
+        if prompt:
+            return prompt
+
+    if getattr(agent, "pmpt_id", None):
+        return None
+
+    raise ValueError(f"Agent {agent.title!r} has no prompt, system_prompt or pmpt_id.")
+
+
+def agent_request(
+    agent: Any, model: str, temperature: float, messages: list[dict[str, str]]
+) -> dict[str, Any]:
+    """Returns the completion request of an agent's turn.
+
+    Agents with a system prompt get a `chat.completions.create` request.
+    Agents with only a stored prompt get a `responses.create` request that
+    references it (`prompt={"id": pmpt_id}`) and sends the other messages as
+    its input.
+
+    :param agent: The agent.
+    :param model: The model of the call.
+    :param temperature: The sampling temperature.
+    :param messages: The chat messages of the turn (with the system prompt, if any, first).
+    :return: The keyword arguments of `chat.completions.create` or `responses.create`.
+    """
+    if agent_system_prompt(agent) is not None:
+        return {"model": model, "temperature": temperature, "messages": messages}
+
+    return {
+        "model": model,
+        "temperature": temperature,
+        "prompt": {"id": agent.pmpt_id},
+        "input": [message for message in messages if message["role"] != "system"],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Google GenAI backend (OpenAI-compatible chat.completions interface)
+# ---------------------------------------------------------------------------
+
+
+def _import_genai() -> Any:
+    try:
+        from google import genai
+    except ImportError:
+        raise ImportError(
+            'The "google" provider requires google-genai, '
+            "install it with `pip install google-genai`."
+        )
+
+    return genai
+
+
+def _genai_request(
+    messages: list[dict[str, str]], temperature: float | None
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Converts chat messages into Gemini contents and a generation config.
+
+    System messages become the system instruction and assistant messages
+    become "model" turns.
+    """
+    system_parts = [m["content"] for m in messages if m["role"] == "system"]
+    contents = [
+        {
+            "role": "model" if message["role"] == "assistant" else "user",
+            "parts": [{"text": message["content"]}],
+        }
+        for message in messages
+        if message["role"] != "system"
+    ]
+    config: dict[str, Any] = {}
+
+    if system_parts:
+        config["system_instruction"] = "\n\n".join(system_parts)
+
+    if temperature is not None:
+        config["temperature"] = temperature
+
+    return contents, config
+
+
+def _genai_usage(response: Any) -> dict[str, Any] | None:
+    """Converts Gemini usage metadata into an OpenAI usage dictionary."""
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is None:
+        return None
+
+    prompt_tokens = metadata.prompt_token_count or 0
+    completion_tokens = metadata.candidates_token_count or 0
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {
+            "cached_tokens": metadata.cached_content_token_count or 0
+        },
+    }
+
+
+def _genai_completion(model: str, response: Any) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": f"genai-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": response.text or ""},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": _genai_usage(response),
+        }
+    )
+
+
+def _genai_chunk(
+    model: str, completion_id: str, text: str | None, usage: dict[str, Any] | None = None
+) -> ChatCompletionChunk:
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": (
+                [{"index": 0, "delta": {"content": text}, "finish_reason": None}]
+                if text is not None
+                else []
+            ),
+            "usage": usage,
+        }
+    )
+
+
+class _GenAICompletions:
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    def create(
+        self,
+        model: str,
+        messages: list[dict[str, str]],
+        temperature: float | None = None,
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> ChatCompletion | Iterator[ChatCompletionChunk]:
+        contents, config = _genai_request(messages, temperature)
+
+        if not stream:
+            response = self._client.models.generate_content(
+                model=model, contents=contents, config=config
+            )
+            return _genai_completion(model, response)
+
+        return self._stream(model, contents, config)
+
+    def _stream(
+        self, model: str, contents: list[dict[str, Any]], config: dict[str, Any]
+    ) -> Iterator[ChatCompletionChunk]:
+        completion_id = f"genai-{uuid.uuid4().hex[:12]}"
+        usage = None
+
+        for response in self._client.models.generate_content_stream(
+            model=model, contents=contents, config=config
+        ):
+            usage = _genai_usage(response) or usage
+            if response.text:
+                yield _genai_chunk(model, completion_id, response.text)
+
+        # Usage is reported cumulatively, so the last chunk holds the totals
+        yield _genai_chunk(model, completion_id, None, usage)
+
+
+class _AsyncGenAICompletions:
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    async def create(
+        self,
+        model: str,
+        messages: list[dict[str, str]],
+        temperature: float | None = None,
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> ChatCompletion | AsyncIterator[ChatCompletionChunk]:
+        contents, config = _genai_request(messages, temperature)
+
+        if not stream:
+            response = await self._client.aio.models.generate_content(
+                model=model, contents=contents, config=config
+            )
+            return _genai_completion(model, response)
+
+        return self._stream(model, contents, config)
+
+    async def _stream(
+        self, model: str, contents: list[dict[str, Any]], config: dict[str, Any]
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        completion_id = f"genai-{uuid.uuid4().hex[:12]}"
+        usage = None
+
+        async for response in await self._client.aio.models.generate_content_stream(
+            model=model, contents=contents, config=config
+        ):
+            usage = _genai_usage(response) or usage
+            if response.text:
+                yield _genai_chunk(model, completion_id, response.text)
+
+        yield _genai_chunk(model, completion_id, None, usage)
+
+
+class _Chat:
+    def __init__(self, completions: _GenAICompletions | _AsyncGenAICompletions) -> None:
+        self.completions = completions
+
+
+class GoogleGenAIChat:
+    """Exposes a `google.genai.Client` through the `chat.completions.create` interface.
+
+    Completions are returned as OpenAI `ChatCompletion` objects (with usage),
+    so the meeting engines, ResponseCache, and tracing work unchanged.
+    """
+
+    def __init__(self, client: Any = None) -> None:
+        """Initializes the backend.
+
+        :param client: The `google.genai.Client` (created from the environment if None).
+        """
+        self.genai_client = client if client is not None else _import_genai().Client()
+        self.chat = _Chat(_GenAICompletions(self.genai_client))
+
+
+class AsyncGoogleGenAIChat:
+    """Async version of `GoogleGenAIChat` (uses `client.aio`)."""
+
+    def __init__(self, client: Any = None) -> None:
+        """Initializes the backend.
+
+        :param client: The `google.genai.Client` (created from the environment if None).
+        """
+        self.genai_client = client if client is not None else _import_genai().Client()
+        self.chat = _Chat(_AsyncGenAICompletions(self.genai_client))
+
+
+# ---------------------------------------------------------------------------
+# Pooled clients
+# ---------------------------------------------------------------------------
+
+
+_client_lock = threading.Lock()
+_sync_clients: dict[tuple, Any] = {}
+_genai_clients: dict[tuple, Any] = {}
+_mock_servers: dict[tuple, Any] = {}
+
+# Async HTTP connections are bound to an event loop, so async clients are pooled per loop
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple, Any]
+] = weakref.WeakKeyDictionary()
+
+
+def _genai_client(key: tuple, client_kwargs: dict[str, Any]) -> Any:
+    if key not in _genai_clients:
+        _genai_clients[key] = _import_genai().Client(**client_kwargs)
+
+    return _genai_clients[key]
+
+
+def _mock_server(key: tuple, client_kwargs: dict[str, Any]) -> Any:
+    from virtual_lab.mock import MockChatServer
+
+    if key not in _mock_servers:
+        _mock_servers[key] = MockChatServer(**client_kwargs).start()
+
+    return _mock_servers[key]
+
+
+def _new_client(
+    provider: Provider, asynchronous: bool, key: tuple, client_kwargs: dict[str, Any]
+) -> Any:
+    if provider == "openai":
+        # Retries are handled by the RateLimiter, so the SDK does not retry on its own
+        client_kwargs = {"max_retries": 0, **client_kwargs}
+        return AsyncOpenAI(**client_kwargs) if asynchronous else OpenAI(**client_kwargs)
+
+    if provider == "google":
+        genai_client = _genai_client(key, client_kwargs)
+        return (
+            AsyncGoogleGenAIChat(genai_client)
+            if asynchronous
+            else GoogleGenAIChat(genai_client)
+        )
+
+    if provider == "mock":
+        server = _mock_server(key, client_kwargs)
+        return (
+            server.async_client(max_retries=0)
+            if asynchronous
+            else server.client(max_retries=0)
+        )
+
+    raise ValueError(f"Unknown provider: {provider!r}")
+
+
+def get_client(
+    provider: Provider = "openai", asynchronous: bool = False, **client_kwargs: Any
+) -> Any:
+    """Returns a process-wide pooled chat client for a provider.
+
+    Clients are created once and shared by all meetings, so their HTTP
+    connection pools (and TLS sessions) are reused instead of being set up
+    per meeting. Async clients are pooled per event loop, since their
+    connections cannot be shared across loops.
+
+    :param provider: "openai", "google" (Google GenAI, via `GoogleGenAIChat`),
+        or "mock" (a process-wide local `MockChatServer`).
+    :param asynchronous: Whether to return an async client (must be called
+        from within the event loop that will use it).
+    :param client_kwargs: Keyword arguments of the client (or of the
+        MockChatServer for the "mock" provider). Each distinct set of
+        arguments gets its own pooled client.
+    :return: An `OpenAI`/`AsyncOpenAI`-compatible client.
+    """
+    # Keyed by repr since some arguments (e.g., http_client, latency) are unhashable
+    key = (
+        provider,
+        tuple(sorted((name, repr(value)) for name, value in client_kwargs.items())),
+    )
+
+    with _client_lock:
+        if asynchronous:
+            clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+        else:
+            clients = _sync_clients
+
+        if key not in clients:
+            clients[key] = _new_client(provider, asynchronous, key, client_kwargs)
+
+        return clients[key]
+
+
+def close_clients() -> None:
+    """Closes the pooled sync clients and stops the pooled mock servers."""
+    with _client_lock:
+        for client in _sync_clients.values():
+            if hasattr(client, "close"):
+                client.close()
+
+        for server in _mock_servers.values():
+            server.stop()
+
+        _sync_clients.clear()
+        _genai_clients.clear()
+        _mock_servers.clear()
+        _async_clients.clear()
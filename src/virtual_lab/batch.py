@@ -0,0 +1,407 @@
+"""Runs large sweeps of individual meetings through the OpenAI Batch API."""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from openai import OpenAI
+from openai.types.chat import ChatCompletion
+from openai.types.responses import Response
+
+from virtual_lab.agent import Agent
+from virtual_lab.backends import agent_request, agent_system_prompt, get_client
+from virtual_lab.constants import BATCH_PRICE_DISCOUNT, CONSISTENT_TEMPERATURE
+from virtual_lab.prompts import SCIENTIFIC_CRITIC
+from virtual_lab.routing import Phase, usage_cost
+from virtual_lab.run_meeting_v2 import (
+    PromptLayout,
+    add_usage,
+    build_header_text,
+    build_messages,
+    choose_model,
+    individual_instructions,
+    parse_completion,
+    parse_usage,
+)
+from virtual_lab.utils import save_meeting
+
+
+# The Batch API accepts at most 50,000 requests per batch
+MAX_REQUESTS_PER_BATCH = 50_000
+
+# Statuses after which a batch no longer changes
+_TERMINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+@dataclass
+class BatchMeeting:
+    """An individual meeting (agent + critic + revision per round) run in batch mode.
+
+    The discussion is filled in as the batches complete.
+
+    Attributes:
+        team_member: The main agent of the meeting.
+        agenda: The agenda for the meeting.
+        save_name: Base name for the saved files (without extension).
+        agenda_questions: Questions that must be answered.
+        agenda_rules: Rules that must be followed.
+        summaries: Summaries of previous meetings.
+        contexts: Additional context strings.
+        num_rounds: Number of rounds (0 => treated as 1).
+        temperature: Sampling temperature for all calls.
+        discussion: The discussion so far.
+        error: The error message if a turn of the meeting failed.
+        token_counts: The "input", "output" and "cached" token counts of the meeting.
+    """
+    team_member: Agent
+    agenda: str
+    save_name: str
+    agenda_questions: tuple[str, ...] = ()
+    agenda_rules: tuple[str, ...] = ()
+    summaries: tuple[str, ...] = ()
+    contexts: tuple[str, ...] = ()
+    num_rounds: int = 0
+    temperature: float = CONSISTENT_TEMPERATURE
+    discussion: list[dict[str, str]] = field(default_factory=list)
+    error: str | None = None
+    token_counts: dict[str, int] = field(
+        default_factory=lambda: {"input": 0, "output": 0, "cached": 0}
+    )
+
+    @property
+    def summary(self) -> str | None:
+        """The final answer of the main agent (None if the meeting failed or is unfinished)."""
+        if self.error is not None or len(self.discussion) < 2:
+            return None
+
+        return self.discussion[-1]["message"]
+
+    def header_text(self) -> str:
+        """Returns the static header that all agents see."""
+        return build_header_text(
+            self.agenda,
+            self.agenda_questions,
+            self.agenda_rules,
+            self.summaries,
+            self.contexts,
+            pubmed_search=False,
+        )
+
+    def turns(self) -> list[tuple[Agent, str, Phase]]:
+        """Returns the agent, instruction and phase of every turn of the meeting."""
+        total_rounds = max(1, self.num_rounds)
+        turns = []
+
+        for round_idx in range(total_rounds):
+            answer_instruction, critic_instruction, refinement_instruction = (
+                individual_instructions(round_idx, total_rounds)
+            )
+            turns += [
+                (self.team_member, answer_instruction, "answer"),
+                (SCIENTIFIC_CRITIC, critic_instruction, "critique"),
+                (self.team_member, refinement_instruction, "revision"),
+            ]
+
+        return turns
+
+
+def _request_endpoint(body: dict[str, Any]) -> str:
+    """Returns the Batch API endpoint of a request (see `agent_request`)."""
+    return "/v1/responses" if "input" in body else "/v1/chat/completions"
+
+
+def _parse_result(result: ChatCompletion | Response) -> tuple[str, dict[str, int]]:
+    """Returns the message text and the token usage of a batch result."""
+    if isinstance(result, Response):
+        return result.output_text, parse_usage(result.usage)
+
+    return parse_completion(result)
+
+
+def _batch_lines(requests: dict[str, dict[str, Any]], endpoint: str) -> bytes:
+    """Renders requests to one endpoint as the JSONL input file of a batch."""
+    return "".join(
+        json.dumps(
+            {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": endpoint,
+                "body": body,
+            }
+        )
+        + "\n"
+        for custom_id, body in requests.items()
+    ).encode("utf-8")
+
+
+def _read_batch_file(client: OpenAI, file_id: str | None) -> list[dict[str, Any]]:
+    """Downloads and parses a JSONL output or error file of a batch."""
+    if file_id is None:
+        return []
+
+    return [
+        json.loads(line)
+        for line in client.files.content(file_id).text.splitlines()
+        if line.strip()
+    ]
+
+
+def run_batch(
+    client: OpenAI,
+    requests: dict[str, dict[str, Any]],
+    completion_window: str = "24h",
+    poll_interval_seconds: float = 30.0,
+    max_requests_per_batch: int = MAX_REQUESTS_PER_BATCH,
+) -> tuple[dict[str, ChatCompletion | Response], dict[str, str]]:
+    """Runs chat completion requests through the Batch API and waits for the results.
+
+    The requests are split by endpoint (a batch has a single endpoint, and
+    Responses API requests go to /v1/responses) into batches of at most
+    `max_requests_per_batch`, which are all submitted before polling.
+
+    :param client: The OpenAI client.
+    :param requests: Mapping from a unique custom ID to the body of a chat completion
+        (or Responses API) request.
+    :param completion_window: The time frame within which the batches should be processed.
+    :param poll_interval_seconds: The time between checks of the batch status.
+    :param max_requests_per_batch: The maximum number of requests per batch.
+    :return: A mapping from custom ID to completion for the successful requests
+        and a mapping from custom ID to error message for the failed requests.
+    """
+    endpoint_items: dict[str, list[tuple[str, dict[str, Any]]]] = {}
+    for custom_id, body in requests.items():
+        endpoint_items.setdefault(_request_endpoint(body), []).append((custom_id, body))
+
+    batch_endpoints = {}
+
+    # Upload and submit all batches
+    for endpoint, items in endpoint_items.items():
+        for start in range(0, len(items), max_requests_per_batch):
+            chunk = dict(items[start : start + max_requests_per_batch])
+            input_file = client.files.create(
+                file=(f"batch_{start}.jsonl", _batch_lines(chunk, endpoint)), purpose="batch"
+            )
+            batch = client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=endpoint,
+                completion_window=completion_window,
+            )
+            batch_endpoints[batch.id] = endpoint
+            print(f"Submitted batch {batch.id} with {len(chunk):,} requests")
+
+    completions: dict[str, ChatCompletion | Response] = {}
+    errors: dict[str, str] = {}
+
+    # Poll until every batch is done, then collect its results
+    for batch_id, endpoint in batch_endpoints.items():
+        batch = client.batches.retrieve(batch_id)
+
+        while batch.status not in _TERMINAL_BATCH_STATUSES:
+            time.sleep(poll_interval_seconds)
+            batch = client.batches.retrieve(batch_id)
+
+        print(f"Batch {batch_id} {batch.status}")
+
+        for line in _read_batch_file(client, batch.output_file_id) + _read_batch_file(
+            client, batch.error_file_id
+        ):
+            response = line.get("response") or {}
+
+            if response.get("status_code") == 200:
+                completions[line["custom_id"]] = (
+                    Response.construct(**response["body"])
+                    if endpoint == "/v1/responses"
+                    else ChatCompletion.model_validate(response["body"])
+                )
+            else:
+                error = line.get("error") or (response.get("body") or {}).get("error")
+                errors[line["custom_id"]] = (
+                    f"HTTP {response.get('status_code')}: {error}" if response else str(error)
+                )
+
+    # Requests without a result (e.g., in a failed or expired batch)
+    for custom_id in requests:
+        if custom_id not in completions and custom_id not in errors:
+            errors[custom_id] = "No result returned by the batch."
+
+    return completions, errors
+
+
+def run_batch_meetings(
+    meetings: list[BatchMeeting],
+    save_dir: Path,
+    model: str | None = None,
+    client: OpenAI | None = None,
+    prompt_layout: PromptLayout = "single",
+    completion_window: str = "24h",
+    poll_interval_seconds: float = 30.0,
+    max_retries: int = 2,
+    max_requests_per_batch: int = MAX_REQUESTS_PER_BATCH,
+) -> list[str | None]:
+    """Runs many independent individual meetings through the Batch API.
+
+    Each turn of an individual meeting depends on the previous one, so the
+    meetings advance in lockstep: the pending turn of every meeting is
+    collected into one batch, and once the batch completes every meeting
+    moves on to its next turn. A sweep of N meetings with R rounds therefore
+    takes 3 * R batches instead of 3 * R * N synchronous calls, at the
+    discounted batch price.
+
+    Failed requests are resubmitted in a follow-up batch up to `max_retries`
+    times. A meeting whose turn still fails is stopped and its error recorded,
+    without holding back the other meetings. The prompts of all agents are
+    checked before anything is submitted, and every meeting (finished or not)
+    is saved (JSON + Markdown) via `save_meeting` at the end, even if the run
+    is interrupted. Running the same meetings again resumes each one after the
+    last turn of its discussion (and retries the meetings that failed).
+
+    For offline runs, pass the client of a running `MockChatServer`, which
+    serves the Files and Batch endpoints.
+
+    :param meetings: The individual meetings to run.
+    :param save_dir: Directory to save the discussions.
+    :param model: Optional explicit model name to use. If not provided,
+                  we fall back to agents' `.model` fields or DEFAULT_MODEL.
+    :param client: Optional `OpenAI` client (the pooled OpenAI client is used if None).
+    :param prompt_layout: "single" or "conversation" (see `run_meeting`); the
+                          "stateful" layout is not supported in batch mode.
+    :param completion_window: The time frame within which each batch should be processed.
+    :param poll_interval_seconds: The time between checks of the batch status.
+    :param max_retries: The maximum number of times a failed request is resubmitted.
+    :param max_requests_per_batch: The maximum number of requests per batch.
+    :return: The summary of each meeting (None for failed meetings), in order.
+    """
+    if len({meeting.save_name for meeting in meetings}) != len(meetings):
+        raise ValueError("Batch meetings must have unique save names.")
+
+    if prompt_layout == "stateful":
+        raise ValueError(
+            'The "stateful" prompt layout chains calls on the server and is not '
+            "supported in batch mode."
+        )
+
+    if client is None:
+        client = get_client()
+
+    start_time = time.time()
+    token_totals = {"input": 0, "output": 0, "cached": 0}
+    model_usage: dict[str, dict[str, int]] = {}
+    header_texts = [meeting.header_text() for meeting in meetings]
+    meeting_turns = [meeting.turns() for meeting in meetings]
+    used_models = [choose_model(model, meeting.team_member) for meeting in meetings]
+
+    # Check the prompt of every agent before paying for any batch
+    for turns in meeting_turns:
+        for agent, _, _ in turns:
+            agent_system_prompt(agent)
+
+    # Meetings with a discussion (e.g., from an interrupted run) resume after its last turn
+    num_done_turns = []
+    for meeting, header_text in zip(meetings, header_texts):
+        if header_text and not meeting.discussion:
+            meeting.discussion.append({"agent": "User", "message": header_text})
+
+        meeting.error = None
+        num_done_turns.append(len(meeting.discussion) - (1 if header_text else 0))
+
+    num_steps = max(
+        (len(turns) - num_done for turns, num_done in zip(meeting_turns, num_done_turns)),
+        default=0,
+    )
+
+    try:
+        for step in range(num_steps):
+            # Collect the pending turn of every meeting still running
+            requests = {}
+            for meeting_idx, meeting in enumerate(meetings):
+                turn_idx = num_done_turns[meeting_idx] + step
+                if meeting.error is not None or turn_idx >= len(meeting_turns[meeting_idx]):
+                    continue
+
+                agent, instruction, _ = meeting_turns[meeting_idx][turn_idx]
+                requests[f"{meeting_idx}-{turn_idx}"] = agent_request(
+                    agent,
+                    used_models[meeting_idx],
+                    meeting.temperature,
+                    build_messages(
+                        agent,
+                        header_texts[meeting_idx],
+                        meeting.discussion,
+                        instruction,
+                        prompt_layout=prompt_layout,
+                    ),
+                )
+
+            if not requests:
+                break
+
+            print(f"Step {step + 1}/{num_steps}: {len(requests):,} turns")
+
+            completions: dict[str, ChatCompletion | Response] = {}
+            pending = requests
+            errors: dict[str, str] = {}
+
+            for attempt in range(max_retries + 1):
+                batch_completions, errors = run_batch(
+                    client,
+                    pending,
+                    completion_window=completion_window,
+                    poll_interval_seconds=poll_interval_seconds,
+                    max_requests_per_batch=max_requests_per_batch,
+                )
+                completions.update(batch_completions)
+                pending = {custom_id: requests[custom_id] for custom_id in errors}
+
+                if not pending:
+                    break
+
+                if attempt < max_retries:
+                    print(f"Retrying {len(pending):,} failed requests")
+
+            # Advance every meeting to its next turn
+            for custom_id in requests:
+                meeting_idx, turn_idx = map(int, custom_id.split("-"))
+                meeting = meetings[meeting_idx]
+                agent = meeting_turns[meeting_idx][turn_idx][0]
+
+                if custom_id in errors:
+                    meeting.error = errors[custom_id]
+                    print(f"Warning: meeting {meeting.save_name} failed: {meeting.error}")
+                    continue
+
+                message, usage = _parse_result(completions[custom_id])
+                meeting.discussion.append({"agent": agent.title, "message": message})
+                add_usage(token_totals, model_usage, used_models[meeting_idx], usage)
+
+                for key, value in usage.items():
+                    meeting.token_counts[key] += value
+    finally:
+        # Save every meeting, finished or not, so that completed turns are never lost
+        for meeting in meetings:
+            save_meeting(
+                save_dir=save_dir, save_name=meeting.save_name, discussion=meeting.discussion
+            )
+
+    # ------------------------------------------------------------------
+    # Usage / cost reporting
+    # ------------------------------------------------------------------
+    costs = [usage_cost(model, usage) for model, usage in model_usage.items()]
+    cost_str = "Cost: unknown (no pricing for this model)."
+    if None not in costs:
+        cost_str = f"Cost: ${sum(costs) * BATCH_PRICE_DISCOUNT:.2f} (batch pricing)"
+
+    elapsed = time.time() - start_time
+    num_failed = sum(meeting.error is not None for meeting in meetings)
+    print(
+        f"Meetings: {len(meetings) - num_failed:,} succeeded, {num_failed:,} failed\n"
+        f"Input token count: {token_totals['input']:,}\n"
+        f"Output token count: {token_totals['output']:,}\n"
+        f"{cost_str}\n"
+        f"Time: {int(elapsed // 60)}:{int(elapsed % 60):02d}"
+    )
+
+    return [meeting.summary for meeting in meetings]
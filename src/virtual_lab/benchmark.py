@@ -0,0 +1,274 @@
+"""Benchmarks the meeting orchestration against the local mock chat completions server."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import csv
+import io
+import itertools
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+from virtual_lab.agent import Agent
+from virtual_lab.cli import SpecAgent
+from virtual_lab.mock import LatencyDistribution, MockChatServer
+from virtual_lab.run_meeting_v2 import async_run_meeting
+from virtual_lab.tracing import SpanCollector
+
+# The agent classes of the package: stored prompts (sent with the Responses API)
+# or system prompts (sent with chat completions)
+AgentType = Literal["stored_prompt", "system_prompt"]
+
+
+@dataclass
+class BenchmarkResult:
+    """Throughput and latency of a batch of mock meetings with one configuration.
+
+    Attributes:
+        agent_type: The type of the agents ("stored_prompt" for `Agent`,
+            "system_prompt" for `SpecAgent`).
+        team_size: The number of team members (besides the team lead).
+        num_rounds: The number of discussion rounds.
+        max_concurrency: The maximum number of concurrent requests per meeting.
+        num_meetings: The number of meetings in the batch.
+        wall_seconds: The wall-clock time of the batch.
+        meetings_per_hour: The throughput of the batch.
+        num_turns: The number of turns across all meetings.
+        turn_latency_p50: The median turn latency in seconds.
+        turn_latency_p95: The 95th percentile turn latency in seconds.
+        turn_latency_p99: The 99th percentile turn latency in seconds.
+        overhead_per_turn_ms: The mean turn latency not explained by the simulated
+            model latency or by waiting for a concurrency slot (orchestration,
+            prompt building, client, and HTTP overhead).
+        num_failed_requests: The number of requests that failed with an injected error.
+    """
+
+    agent_type: str
+    team_size: int
+    num_rounds: int
+    max_concurrency: int
+    num_meetings: int
+    wall_seconds: float
+    meetings_per_hour: float
+    num_turns: int
+    turn_latency_p50: float
+    turn_latency_p95: float
+    turn_latency_p99: float
+    overhead_per_turn_ms: float
+    num_failed_requests: int
+
+
+def _benchmark_agent(title: str, agent_type: AgentType) -> Any:
+    if agent_type == "stored_prompt":
+        return Agent(
+            title=title, pmpt_id=f"pmpt_benchmark_{title.lower().replace(' ', '_')}"
+        )
+
+    if agent_type == "system_prompt":
+        return SpecAgent(
+            title=title, prompt=f"You are the {title} of a scientific research team."
+        )
+
+    raise ValueError(f"Unknown agent type: {agent_type!r}")
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    if len(values) == 1:
+        return values[0]
+
+    return statistics.quantiles(values, n=100, method="inclusive")[int(percentile) - 1]
+
+
+async def benchmark_meetings(
+    server: MockChatServer,
+    agent_type: AgentType,
+    team_size: int,
+    num_rounds: int,
+    max_concurrency: int,
+    num_meetings: int,
+    max_concurrent_meetings: int,
+    save_dir: Path,
+) -> BenchmarkResult:
+    """Runs a batch of team meetings against a running mock server and measures them.
+
+    :param server: The running mock server.
+    :param agent_type: The type of the agents ("stored_prompt" agents are sent
+        with the Responses API, "system_prompt" agents with chat completions).
+    :param team_size: The number of team members (besides the team lead).
+    :param num_rounds: The number of discussion rounds.
+    :param max_concurrency: The maximum number of concurrent requests per meeting.
+    :param num_meetings: The number of meetings in the batch.
+    :param max_concurrent_meetings: The maximum number of meetings running at once.
+    :param save_dir: Directory to save the discussions.
+    :return: The benchmark result.
+    """
+    client = server.async_client()
+    collector = SpanCollector()
+    team_lead = _benchmark_agent("Principal Investigator", agent_type)
+    team_members = tuple(
+        _benchmark_agent(f"Scientist {i + 1}", agent_type) for i in range(team_size)
+    )
+    meeting_semaphore = asyncio.Semaphore(max_concurrent_meetings)
+    num_records = len(server.records)
+
+    async def run_one(meeting_num: int) -> None:
+        async with meeting_semaphore:
+            await async_run_meeting(
+                meeting_type="team",
+                agenda="Benchmark agenda.",
+                save_dir=save_dir,
+                save_name=f"benchmark_{meeting_num}",
+                team_lead=team_lead,
+                team_members=team_members,
+                num_rounds=num_rounds,
+                model="gpt-4.1",
+                max_concurrency=max_concurrency,
+                client=client,
+                span_exporters=(collector,),
+            )
+
+    start_time = time.time()
+
+    # Silence the per-meeting usage reports
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(
+                *(run_one(meeting_num) for meeting_num in range(num_meetings))
+            )
+    finally:
+        await client.close()
+
+    wall_seconds = time.time() - start_time
+    records = server.records[num_records:]
+
+    # Turn latency excludes time spent waiting for a concurrency slot
+    llm_calls = {
+        span.parent_id: span for span in collector.spans if span.kind == "llm_call"
+    }
+    turn_latencies = [
+        span.duration_seconds
+        - llm_calls[span.span_id].attributes.get("queue_seconds", 0.0)
+        for span in collector.spans
+        if span.kind == "turn" and span.span_id in llm_calls
+    ]
+    simulated_seconds = [
+        record.simulated_seconds for record in records if record.status == 200
+    ]
+
+    return BenchmarkResult(
+        agent_type=agent_type,
+        team_size=team_size,
+        num_rounds=num_rounds,
+        max_concurrency=max_concurrency,
+        num_meetings=num_meetings,
+        wall_seconds=wall_seconds,
+        meetings_per_hour=num_meetings / wall_seconds * 3600,
+        num_turns=len(turn_latencies),
+        turn_latency_p50=_percentile(turn_latencies, 50),
+        turn_latency_p95=_percentile(turn_latencies, 95),
+        turn_latency_p99=_percentile(turn_latencies, 99),
+        overhead_per_turn_ms=1000
+        * (statistics.mean(turn_latencies) - statistics.mean(simulated_seconds)),
+        num_failed_requests=sum(record.status != 200 for record in records),
+    )
+
+
+def run_benchmark_suite(
+    agent_types: list[AgentType] = ["stored_prompt", "system_prompt"],
+    team_sizes: list[int] = [2, 4, 8],
+    num_rounds: list[int] = [1, 3],
+    max_concurrency: list[int] = [1, 4],
+    num_meetings: int = 8,
+    max_concurrent_meetings: int = 4,
+    time_to_first_token: float = 0.05,
+    latency_distribution: str = "lognormal",
+    tokens_per_second: float = 5000.0,
+    failure_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    seed: int = 0,
+    save_path: Path | None = None,
+) -> list[BenchmarkResult]:
+    """Benchmarks meetings/hour, turn tail latency, and overhead per turn offline.
+
+    Runs a batch of mock team meetings for every combination of agent type,
+    team size, number of rounds, and per-meeting concurrency. Failed requests
+    are retried by the OpenAI client, so failure injection shows up in the
+    tail latency.
+
+    :param agent_types: The types of agents: "stored_prompt" (`Agent`, whose
+        prompt is stored on the platform) and/or "system_prompt" (`SpecAgent`).
+    :param team_sizes: The numbers of team members (besides the team lead).
+    :param num_rounds: The numbers of discussion rounds.
+    :param max_concurrency: The maximum numbers of concurrent requests per meeting.
+    :param num_meetings: The number of meetings per configuration.
+    :param max_concurrent_meetings: The maximum number of meetings running at once.
+    :param time_to_first_token: The median simulated time to first token in seconds.
+    :param latency_distribution: "constant", "uniform", or "lognormal".
+    :param tokens_per_second: The simulated decoding speed.
+    :param failure_rate: The probability that a request fails with HTTP 500.
+    :param rate_limit_rate: The probability that a request fails with HTTP 429.
+    :param seed: The random seed of the mock server.
+    :param save_path: Optional path to a CSV file to save the results.
+    :return: The benchmark results.
+    """
+    latency = LatencyDistribution(
+        distribution=latency_distribution,
+        time_to_first_token=time_to_first_token,
+        tokens_per_second=tokens_per_second,
+    )
+    results = []
+
+    with MockChatServer(
+        latency=latency,
+        failure_rate=failure_rate,
+        rate_limit_rate=rate_limit_rate,
+        retry_after_seconds=time_to_first_token,
+        seed=seed,
+    ) as server, tempfile.TemporaryDirectory() as save_dir:
+        for agent_type, team_size, rounds, concurrency in itertools.product(
+            agent_types, team_sizes, num_rounds, max_concurrency
+        ):
+            result = asyncio.run(
+                benchmark_meetings(
+                    server=server,
+                    agent_type=agent_type,
+                    team_size=team_size,
+                    num_rounds=rounds,
+                    max_concurrency=concurrency,
+                    num_meetings=num_meetings,
+                    max_concurrent_meetings=max_concurrent_meetings,
+                    save_dir=Path(save_dir),
+                )
+            )
+            results.append(result)
+
+            print(
+                f"agents={agent_type} team_size={team_size} rounds={rounds} "
+                f"concurrency={concurrency}: "
+                f"{result.meetings_per_hour:,.0f} meetings/hour, "
+                f"turn latency p50/p95/p99 = {result.turn_latency_p50:.3f}/"
+                f"{result.turn_latency_p95:.3f}/{result.turn_latency_p99:.3f}s, "
+                f"overhead {result.overhead_per_turn_ms:.1f} ms/turn, "
+                f"{result.num_failed_requests:,} failed requests"
+            )
+
+    if save_path is not None:
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(save_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(asdict(results[0])))
+            writer.writeheader()
+            writer.writerows(asdict(result) for result in results)
+
+    return results
+
+
+if __name__ == "__main__":
+    from tap import tapify
+
+    tapify(run_benchmark_suite)
@@ -0,0 +1,247 @@
+"""The `virtual-lab` command line interface: runs a meeting or workflow from a YAML/JSON spec.
+
+Startup time matters since the CLI is used to launch many short-lived
+worker processes, so this module only imports the standard library at the
+top level and imports the meeting engines (and openai) when a command runs.
+`virtual-lab import-time` checks the import time against a budget.
+
+Example spec (YAML, or the equivalent JSON):
+
+    save_dir: discussions/antibodies
+    provider: openai
+    agents:
+      pi: {title: Principal Investigator, prompt: "You are ...", model: gpt-4o}
+      immunologist: {title: Immunologist, prompt: "You are ..."}
+    meeting:
+      type: team
+      agenda: Design antibodies for ...
+      team_lead: pi
+      team_members: [immunologist]
+      num_rounds: 2
+
+A workflow replaces `meeting` with a list of named meetings:
+
+    workflow:
+      max_concurrent_meetings: 4
+      meetings:
+        - {name: kickoff, type: team, agenda: ..., team_lead: pi, team_members: [immunologist]}
+        - {name: review, type: individual, agenda: ..., team_member: pi, depends_on: [kickoff]}
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+# Maximum time to import the CLI module (and with it the virtual_lab package)
+IMPORT_TIME_BUDGET_SECONDS = 0.15
+
+# Meeting arguments given as lists in a spec but passed to the engines as tuples
+_TUPLE_ARGS = ("agenda_questions", "agenda_rules", "summaries", "contexts")
+
+
+@dataclass(frozen=True)
+class SpecAgent:
+    """An agent defined in a spec by its system prompt (used by the v2 engines via `.prompt`).
+
+    Attributes:
+        title: The title of the agent.
+        prompt: The system prompt of the agent.
+        model: Optional model of the agent.
+    """
+    title: str
+    prompt: str
+    model: str | None = None
+
+    def __str__(self) -> str:
+        """Returns the title of the agent."""
+        return self.title
+
+
+def load_spec(path: Path) -> dict[str, Any]:
+    """Loads a YAML (.yaml/.yml) or JSON spec.
+
+    :param path: The path to the spec.
+    :return: The spec.
+    """
+    with open(path) as f:
+        if path.suffix in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError(
+                    "YAML specs require pyyaml, install it with `pip install pyyaml` "
+                    "or use a JSON spec."
+                )
+
+            return yaml.safe_load(f)
+
+        return json.load(f)
+
+
+def _meeting_args(
+    meeting: dict[str, Any], agents: dict[str, SpecAgent], spec_dir: Path
+) -> dict[str, Any]:
+    """Converts a meeting of a spec into keyword arguments of the meeting engines."""
+    meeting = dict(meeting)
+    args: dict[str, Any] = {"meeting_type": meeting.pop("type")}
+
+    def agent(name: str) -> SpecAgent:
+        if name not in agents:
+            raise ValueError(f'Unknown agent "{name}".')
+        return agents[name]
+
+    if "team_lead" in meeting:
+        args["team_lead"] = agent(meeting.pop("team_lead"))
+    if "team_members" in meeting:
+        args["team_members"] = tuple(agent(name) for name in meeting.pop("team_members"))
+    if "team_member" in meeting:
+        args["team_member"] = agent(meeting.pop("team_member"))
+
+    # Summaries of earlier meetings may be given by the paths of their discussions
+    if "summaries_from" in meeting:
+        from virtual_lab.utils import load_summaries
+
+        args["summaries"] = tuple(meeting.pop("summaries", ())) + load_summaries(
+            [spec_dir / path for path in meeting.pop("summaries_from")]
+        )
+
+    if "early_stopping" in meeting:
+        from virtual_lab.convergence import EarlyStopping
+
+        args["early_stopping"] = EarlyStopping(**meeting.pop("early_stopping"))
+
+    for name, value in meeting.items():
+        args[name] = tuple(value) if name in _TUPLE_ARGS else value
+
+    return args
+
+
+def run_spec(spec_path: Path) -> None:
+    """Runs the meeting or workflow of a spec.
+
+    Relative paths in the spec (`save_dir`, `summaries_from`) are relative to the spec.
+
+    :param spec_path: The path to the YAML/JSON spec.
+    """
+    spec = load_spec(spec_path)
+    spec_dir = spec_path.parent
+    save_dir = spec_dir / spec.get("save_dir", ".")
+    provider = spec.get("provider", "openai")
+    agents = {
+        name: SpecAgent(**agent) for name, agent in spec.get("agents", {}).items()
+    }
+
+    if ("meeting" in spec) == ("workflow" in spec):
+        raise ValueError('A spec must have either a "meeting" or a "workflow".')
+
+    if "meeting" in spec:
+        from virtual_lab.run_meeting_v2 import run_meeting
+
+        args = _meeting_args(spec["meeting"], agents, spec_dir)
+        args.setdefault("model", spec.get("model"))
+        summary = run_meeting(
+            save_dir=save_dir, provider=provider, return_summary=True, **args
+        )
+        print(summary)
+        return
+
+    from virtual_lab.workflow import MeetingNode, Workflow
+
+    workflow_spec = dict(spec["workflow"])
+    nodes = []
+    for meeting in workflow_spec.pop("meetings"):
+        args = _meeting_args(meeting, agents, spec_dir)
+        args.setdefault("model", spec.get("model"))
+        node_args = {
+            name: args.pop(name)
+            for name in list(args)
+            if name in MeetingNode.__dataclass_fields__ and name != "meeting_kwargs"
+        }
+        nodes.append(MeetingNode(**node_args, meeting_kwargs=args))
+
+    result = Workflow(nodes, save_dir).run(provider=provider, **workflow_spec)
+
+    if result.skipped or len(result.summaries) < len(nodes):
+        sys.exit(1)
+
+
+def measure_import_time(
+    module: str = "virtual_lab.cli",
+) -> tuple[float, list[tuple[float, str]]]:
+    """Measures the import time of a module in a fresh interpreter (`python -X importtime`).
+
+    :param module: The module to import.
+    :return: The cumulative import time in seconds and the (self time, name)
+        of the imported modules, slowest first.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    total = 0.0
+    modules = []
+    for match in re.finditer(r"import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)", output):
+        self_us, cumulative_us, name = match.groups()
+        modules.append((int(self_us) / 10**6, name))
+
+        if name == module:
+            total = int(cumulative_us) / 10**6
+
+    return total, sorted(modules, reverse=True)
+
+
+def check_import_time(
+    budget_seconds: float = IMPORT_TIME_BUDGET_SECONDS, num_modules: int = 10
+) -> None:
+    """Prints the import time of the CLI and exits with an error if it is over budget.
+
+    :param budget_seconds: The import time budget in seconds.
+    :param num_modules: The number of slowest modules to print.
+    """
+    total, modules = measure_import_time()
+
+    for seconds, name in modules[:num_modules]:
+        print(f"{seconds * 1000:8.1f} ms  {name}")
+
+    print(f"Import time: {total * 1000:.1f} ms (budget {budget_seconds * 1000:.0f} ms)")
+
+    if total > budget_seconds:
+        sys.exit(1)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point of the `virtual-lab` command."""
+    parser = argparse.ArgumentParser(prog="virtual-lab", description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run a meeting or workflow spec.")
+    run_parser.add_argument("spec_path", type=Path, help="Path to a YAML/JSON spec.")
+
+    import_time_parser = subparsers.add_parser(
+        "import-time", help="Check the import time of the CLI against its budget."
+    )
+    import_time_parser.add_argument(
+        "--budget_seconds", type=float, default=IMPORT_TIME_BUDGET_SECONDS
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        run_spec(args.spec_path)
+    else:
+        check_import_time(args.budget_seconds)
+
+
+if __name__ == "__main__":
+    main()
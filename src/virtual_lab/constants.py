@@ -2,6 +2,13 @@
 
 DEFAULT_MODEL = "gpt-4.1"
 
+# Default model of each chat backend (see virtual_lab.backends)
+PROVIDER_TO_DEFAULT_MODEL = {
+    "openai": DEFAULT_MODEL,
+    "google": "gemini-2.5-flash",
+    "mock": DEFAULT_MODEL,
+}
+
 # Prices in USD as of January 18, 2025 (https://openai.com/api/pricing/)
 MODEL_TO_INPUT_PRICE_PER_TOKEN = {
     "gpt-3.5-turbo-0125": 0.5 / 10**6,
@@ -15,6 +22,17 @@ MODEL_TO_INPUT_PRICE_PER_TOKEN = {
     "gpt-5-mini": 0.25 / 10**6,
 }
 
+# Prices of input tokens served from the provider's prompt cache
+MODEL_TO_CACHED_INPUT_PRICE_PER_TOKEN = {
+    "gpt-4o-2024-08-06": 1.25 / 10**6,
+    "gpt-4o-mini-2024-07-18": 0.075 / 10**6,
+    "o1-mini-2024-09-12": 1.5 / 10**6,
+    "gpt-4.1": 0.5 / 10**6,
+    "gpt-4.1-mini": 0.1 / 10**6,
+    "gpt-5.1": 0.125 / 10**6,
+    "gpt-5-mini": 0.025 / 10**6,
+}
+
 MODEL_TO_OUTPUT_PRICE_PER_TOKEN = {
     "gpt-3.5-turbo-0125": 1.5 / 10**6,
     "gpt-4o-2024-08-06": 10 / 10**6,
@@ -27,6 +45,33 @@ MODEL_TO_OUTPUT_PRICE_PER_TOKEN = {
     "gpt-5-mini": 2.00 / 10**6,
 }
 
+# Maximum number of tokens (input + output) per request
+MODEL_TO_CONTEXT_WINDOW = {
+    "gpt-3.5-turbo-0125": 16_385,
+    "gpt-4o-2024-08-06": 128_000,
+    "gpt-4o-2024-05-13": 128_000,
+    "gpt-4o-mini-2024-07-18": 128_000,
+    "o1-mini-2024-09-12": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4.1-mini": 1_047_576,
+    "gpt-5.1": 400_000,
+    "gpt-5-mini": 400_000,
+}
+
+# Default number of tokens of discussion shown to agents when summarizing older turns
+DEFAULT_DISCUSSION_TOKEN_BUDGET = 16_000
+
+# Cheaper model to switch to when a meeting budget is nearly used up
+MODEL_TO_DOWNGRADE_MODEL = {
+    "gpt-4o-2024-08-06": "gpt-4o-mini-2024-07-18",
+    "gpt-4o-2024-05-13": "gpt-4o-mini-2024-07-18",
+    "gpt-4.1": "gpt-4.1-mini",
+    "gpt-5.1": "gpt-5-mini",
+}
+
+# Fraction of the synchronous price billed for requests sent through the Batch API
+BATCH_PRICE_DISCOUNT = 0.5
+
 FINETUNING_MODEL_TO_INPUT_PRICE_PER_TOKEN = {
     "gpt-4o-2024-08-06": 3.75 / 10**6,
     "gpt-4o-mini-2024-07-18": 0.3 / 10**6,
@@ -48,6 +93,9 @@ CONSISTENT_TEMPERATURE = 0.2
 CREATIVE_TEMPERATURE = 0.8
 
 PUBMED_TOOL_NAME = "pubmed_search"
+
+# NCBI rate limit without an API key (3 requests per second)
+PUBMED_REQUESTS_PER_MINUTE = 180
 PUBMED_TOOL_DESCRIPTION = {
     "type": "function",
     "function": {
@@ -0,0 +1,199 @@
+"""Adaptive early termination of meeting rounds once the discussion has converged."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+
+# Appended to turn instructions when early stopping is enabled
+PASS_INSTRUCTION = (
+    "If you agree with the discussion so far and have nothing substantive to add, "
+    "reply with only the word 'Pass'."
+)
+CRITIC_PASS_INSTRUCTION = (
+    "If the answer needs no further improvement, reply with only the word 'Pass'."
+)
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> list[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def is_pass(message: str, max_words: int = 20) -> bool:
+    """Checks whether a message passes the turn (starts with "Pass" and is short).
+
+    An empty message (e.g., a failed or blocked reply) is not a pass.
+
+    :param message: The message of the turn.
+    :param max_words: The maximum number of words of a pass
+        (e.g., "Pass, I agree with the plan.").
+    :return: True if the message is a pass.
+    """
+    words = _words(message)
+
+    return 0 < len(words) <= max_words and words[0] == "pass"
+
+
+def _shingles(words: list[str], n: int = 3) -> set[tuple[str, ...]]:
+    """Returns the word n-grams of a text (or the words themselves if it is shorter)."""
+    if len(words) < n:
+        return {tuple(words)} if words else set()
+
+    return {tuple(words[i : i + n]) for i in range(len(words) - n + 1)}
+
+
+def novelty(message: str, seen_shingles: set[tuple[str, ...]]) -> float:
+    """Returns the fraction of the word 3-grams of a message not seen in earlier turns.
+
+    :param message: The message of the turn.
+    :param seen_shingles: The word 3-grams of the earlier turns.
+    :return: The novelty between 0 (pure restatement) and 1 (entirely new).
+    """
+    shingles = _shingles(_words(message))
+    if not shingles:
+        return 0.0
+
+    return len(shingles - seen_shingles) / len(shingles)
+
+
+@dataclass
+class EarlyStopping:
+    """Settings of the opt-in adaptive mode that skips turns once a meeting converges.
+
+    Agents are told they may answer "Pass". An agent's remaining turns are
+    skipped after `max_consecutive_passes` consecutive passes, and after each
+    round (from `min_rounds` on) the discussion ends early, going straight to
+    the final summary, if the round converged: at least `pass_ratio` of its
+    turns were passes, or its substantive turns had a mean novelty (the
+    fraction of word 3-grams not seen in earlier turns) below `min_novelty`.
+
+    Attributes:
+        max_consecutive_passes: Consecutive passes after which an agent is skipped
+            (None to never skip).
+        pass_ratio: The fraction of passes in a round that ends the discussion
+            (None to ignore passes).
+        min_novelty: The mean novelty below which a round ends the discussion
+            (None to ignore novelty).
+        min_rounds: The minimum number of rounds before the discussion may end early.
+    """
+    max_consecutive_passes: int | None = 2
+    pass_ratio: float | None = 0.5
+    min_novelty: float | None = 0.2
+    min_rounds: int = 1
+
+
+class ConvergenceTracker:
+    """Tracks passes and novelty of the turns of one meeting (see EarlyStopping)."""
+
+    def __init__(self, early_stopping: EarlyStopping, planned_calls: int) -> None:
+        """Initializes the tracker.
+
+        :param early_stopping: The early stopping settings.
+        :param planned_calls: The number of calls of the meeting without early stopping.
+        """
+        self.early_stopping = early_stopping
+        self.planned_calls = planned_calls
+        self.calls_saved = 0
+        self.num_rounds = 0
+        self.stopped_after_round: int | None = None
+        self._consecutive_passes: dict[str, int] = {}
+        self._seen_shingles: set[tuple[str, ...]] = set()
+        self._round_passes = 0
+        self._round_novelties: list[float] = []
+
+    def should_skip(self, agent: str) -> bool:
+        """Checks whether an agent's turn is skipped because it kept passing.
+
+        :param agent: The title of the agent.
+        :return: True if the turn should be skipped.
+        """
+        max_passes = self.early_stopping.max_consecutive_passes
+
+        return (
+            max_passes is not None
+            and self._consecutive_passes.get(agent, 0) >= max_passes
+        )
+
+    def skip(self, num_calls: int = 1) -> None:
+        """Records calls that were skipped.
+
+        :param num_calls: The number of skipped calls.
+        """
+        self.calls_saved += num_calls
+
+    def record_turn(self, agent: str, message: str) -> None:
+        """Records a finished turn.
+
+        :param agent: The title of the agent.
+        :param message: The message of the turn.
+        """
+        words = _words(message)
+
+        if is_pass(message):
+            self._consecutive_passes[agent] = self._consecutive_passes.get(agent, 0) + 1
+            self._round_passes += 1
+        else:
+            self._consecutive_passes[agent] = 0
+
+            # An empty reply is neither a pass nor a restatement
+            if words:
+                self._round_novelties.append(novelty(message, self._seen_shingles))
+
+        self._seen_shingles |= _shingles(words)
+
+    def end_round(self, num_remaining_calls: int, converged: bool = False) -> bool:
+        """Ends a round and checks whether the discussion has converged.
+
+        If it has and calls remain, the remaining calls are counted as saved.
+
+        :param num_remaining_calls: The number of calls planned after this round.
+        :param converged: Whether the round is already known to have converged
+            (e.g., the critic passed).
+        :return: True if the remaining rounds should be skipped.
+        """
+        self.num_rounds += 1
+        num_turns = self._round_passes + len(self._round_novelties)
+        early_stopping = self.early_stopping
+
+        converged = converged or (
+            self.num_rounds >= early_stopping.min_rounds
+            and (
+                num_turns == 0
+                or (
+                    early_stopping.pass_ratio is not None
+                    and self._round_passes / num_turns >= early_stopping.pass_ratio
+                )
+                or (
+                    early_stopping.min_novelty is not None
+                    and len(self._round_novelties) > 0
+                    and sum(self._round_novelties) / len(self._round_novelties)
+                    < early_stopping.min_novelty
+                )
+            )
+        )
+
+        self._round_passes = 0
+        self._round_novelties = []
+
+        if not converged or num_remaining_calls == 0:
+            return False
+
+        self.stopped_after_round = self.num_rounds
+        self.skip(num_remaining_calls)
+
+        return True
+
+    def report(self) -> None:
+        """Prints how many calls early stopping saved."""
+        stopped = (
+            f", discussion ended after round {self.stopped_after_round}"
+            if self.stopped_after_round is not None
+            else ""
+        )
+        print(
+            f"Early stopping saved {self.calls_saved:,} of "
+            f"{self.planned_calls:,} calls{stopped}"
+        )
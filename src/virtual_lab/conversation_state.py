@@ -0,0 +1,95 @@
+"""Server-side conversation state of meeting agents (chained Responses API calls)."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from virtual_lab.backends import agent_system_prompt
+
+
+class ConversationState:
+    """The server-side conversation of each agent in a meeting.
+
+    The provider stores every response, and each agent's calls are chained
+    with `previous_response_id`, so a call only uploads what is new to that
+    agent: the discussion turns added since its last call (its own reply is
+    already part of its chain) and the instruction. The first call of an
+    agent (or the first live call after resuming a meeting) uploads the
+    header and the whole transcript, in the same order as the "conversation"
+    prompt layout.
+
+    The input tokens reported by the provider (and billed) still cover the
+    whole chained conversation, most of it served from its prompt cache.
+    """
+
+    def __init__(self, header_text: str) -> None:
+        """Initializes the state.
+
+        :param header_text: The header of the meeting (the first turn of the discussion
+            if not empty).
+        """
+        self.header_text = header_text
+        self._chains: dict[str, tuple[str, int]] = {}
+        self._pending: dict[str, int] = {}
+
+    def request(
+        self,
+        agent: Any,
+        discussion: list[dict[str, str]],
+        instruction: str,
+        model: str,
+        temperature: float,
+    ) -> dict[str, Any]:
+        """Builds the `responses.create` request of an agent's turn.
+
+        :param agent: The agent taking the turn.
+        :param discussion: The discussion so far (starting with the header turn, if any).
+        :param instruction: The instruction of the turn.
+        :param model: The model of the call.
+        :param temperature: The sampling temperature.
+        :return: The keyword arguments of `responses.create`.
+        """
+        previous_response_id, num_seen_turns = self._chains.get(agent.title, (None, 0))
+
+        input_messages = []
+        for index in range(num_seen_turns, len(discussion)):
+            turn = discussion[index]
+
+            if index == 0 and self.header_text:
+                content = self.header_text
+            elif previous_response_id is not None and turn["agent"] == agent.title:
+                continue
+            else:
+                content = f"{turn['agent']}: {turn['message']}".strip()
+
+            input_messages.append({"role": "user", "content": content})
+
+        input_messages.append({"role": "user", "content": instruction})
+        self._pending[agent.title] = len(discussion)
+
+        request = {
+            "model": model,
+            "temperature": temperature,
+            "input": input_messages,
+            "store": True,
+        }
+
+        # Instructions are not carried over from the previous response
+        system_prompt = agent_system_prompt(agent)
+        if system_prompt is not None:
+            request["instructions"] = system_prompt
+        else:
+            request["prompt"] = {"id": agent.pmpt_id}
+
+        if previous_response_id is not None:
+            request["previous_response_id"] = previous_response_id
+
+        return request
+
+    def update(self, agent_title: str, response_id: str) -> None:
+        """Continues an agent's chain from its latest response.
+
+        :param agent_title: The title of the agent.
+        :param response_id: The ID of the response to the agent's latest request.
+        """
+        self._chains[agent_title] = (response_id, self._pending.pop(agent_title))
@@ -0,0 +1,203 @@
+"""Token-budgeted view of a meeting discussion with rolling summaries of older turns."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable
+
+from virtual_lab.constants import (
+    DEFAULT_DISCUSSION_TOKEN_BUDGET,
+    MODEL_TO_CONTEXT_WINDOW,
+)
+from virtual_lab.utils import count_tokens
+
+
+SUMMARIZER_SYSTEM_PROMPT = (
+    "You maintain concise running summaries of the contributions of each "
+    "participant in a scientific meeting. Summaries must preserve all decisions, "
+    "concrete proposals, numbers, names, and open questions."
+)
+
+
+def default_discussion_token_budget(model: str) -> int:
+    """Returns the default discussion token budget for a model.
+
+    :param model: The name of the model.
+    :return: DEFAULT_DISCUSSION_TOKEN_BUDGET, capped at a quarter of the model's context window.
+    """
+    context_window = MODEL_TO_CONTEXT_WINDOW.get(model, DEFAULT_DISCUSSION_TOKEN_BUDGET * 4)
+
+    return min(DEFAULT_DISCUSSION_TOKEN_BUDGET, context_window // 4)
+
+
+def _format_turn(turn: dict[str, str]) -> str:
+    return f"{turn['agent']}: {turn['message']}".strip()
+
+
+class DiscussionContext:
+    """Keeps the discussion shown to agents within a token budget.
+
+    Recent turns are kept verbatim. When new turns push the discussion past the
+    budget, the oldest verbatim turns are folded into one running summary per
+    agent (an incremental LLM summary of that agent's earlier contributions).
+    Summaries are only recomputed at that point, so turns that fit in the
+    budget never cost a summarization call, and every turn is tokenized once.
+    """
+
+    def __init__(
+        self,
+        token_budget: int,
+        min_recent_turns: int = 2,
+        summary_max_words: int = 200,
+        encoding_name: str = "cl100k_base",
+    ) -> None:
+        """Initializes the discussion context.
+
+        :param token_budget: The maximum number of tokens of summaries plus verbatim turns.
+        :param min_recent_turns: The minimum number of most recent turns to always keep verbatim.
+        :param summary_max_words: The maximum length of each agent's running summary in words.
+        :param encoding_name: The name of the tiktoken encoding used to count tokens.
+        """
+        if token_budget <= 0:
+            raise ValueError("token_budget must be positive.")
+
+        self.token_budget = token_budget
+        self.min_recent_turns = min_recent_turns
+        self.summary_max_words = summary_max_words
+        self.encoding_name = encoding_name
+        self.turns: list[dict[str, str]] = []
+        self.turn_token_counts: list[int] = []
+        self.num_compacted = 0
+        self.agent_summaries: dict[str, str] = {}
+        self.agent_summary_token_counts: dict[str, int] = {}
+        self.num_summary_calls = 0
+
+    def _sync(self, turns: list[dict[str, str]]) -> None:
+        """Tokenizes the turns that were appended since the last update."""
+        for turn in turns[len(self.turn_token_counts):]:
+            self.turn_token_counts.append(
+                count_tokens(_format_turn(turn), encoding_name=self.encoding_name)
+            )
+
+        self.turns = turns
+
+    def token_count(self) -> int:
+        """Returns the number of tokens of the summaries plus the verbatim turns."""
+        return sum(self.agent_summary_token_counts.values()) + sum(
+            self.turn_token_counts[self.num_compacted:]
+        )
+
+    def _select_turns_to_compact(
+        self, turns: list[dict[str, str]]
+    ) -> tuple[dict[str, list[str]], int]:
+        """Selects the oldest verbatim turns to move out of the budget, grouped by agent.
+
+        The turns are only compacted (see `_compact`) once their summaries are
+        computed, so a failed summarization call leaves the context unchanged.
+
+        :return: The messages to summarize per agent and the number of compacted
+            turns after compacting them.
+        """
+        self._sync(turns)
+
+        total = self.token_count()
+        batch: dict[str, list[str]] = {}
+        num_compacted = self.num_compacted
+
+        while (
+            total > self.token_budget
+            and len(turns) - num_compacted > self.min_recent_turns
+        ):
+            turn = turns[num_compacted]
+            batch.setdefault(turn["agent"], []).append(turn["message"])
+            total -= self.turn_token_counts[num_compacted]
+            num_compacted += 1
+
+        return batch, num_compacted
+
+    def _summary_messages(self, agent: str, messages: list[str]) -> list[dict[str, str]]:
+        """Builds the chat messages asking to fold new turns into an agent's summary."""
+        new_contributions = "\n\n".join(messages)
+
+        return [
+            {"role": "system", "content": SUMMARIZER_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": (
+                    f"Existing summary of {agent}'s contributions:\n"
+                    f"{self.agent_summaries.get(agent) or 'None yet.'}\n\n"
+                    f"New contributions from {agent}:\n{new_contributions}\n\n"
+                    f"Update the summary of {agent}'s contributions to incorporate the "
+                    f"new contributions. Use at most {self.summary_max_words} words."
+                ),
+            },
+        ]
+
+    def _compact(self, summaries: dict[str, str], num_compacted: int) -> None:
+        """Replaces the agents' summaries and moves the summarized turns out of the budget."""
+        for agent, summary in summaries.items():
+            self.agent_summaries[agent] = summary
+            self.agent_summary_token_counts[agent] = count_tokens(
+                summary, encoding_name=self.encoding_name
+            )
+            self.num_summary_calls += 1
+
+        self.num_compacted = num_compacted
+
+    def update(
+        self,
+        turns: list[dict[str, str]],
+        summarize: Callable[[list[dict[str, str]]], str],
+    ) -> None:
+        """Brings the context up to date with the discussion, summarizing if over budget.
+
+        If a summarization call fails, the context is left unchanged (the turns
+        stay verbatim) and the next update summarizes them again.
+
+        :param turns: The discussion turns (excluding the meeting header).
+        :param summarize: A function mapping chat messages to the summary returned by an LLM.
+        """
+        batch, num_compacted = self._select_turns_to_compact(turns)
+        summaries = {
+            agent: summarize(self._summary_messages(agent, messages))
+            for agent, messages in batch.items()
+        }
+        self._compact(summaries, num_compacted)
+
+    async def async_update(
+        self,
+        turns: list[dict[str, str]],
+        summarize: Callable[[list[dict[str, str]]], Awaitable[str]],
+    ) -> None:
+        """Same as `update` but with an async summarizer; agents are summarized concurrently.
+
+        :param turns: The discussion turns (excluding the meeting header).
+        :param summarize: An async function mapping chat messages to the summary returned by an LLM.
+        """
+        batch, num_compacted = self._select_turns_to_compact(turns)
+        summaries = await asyncio.gather(
+            *(
+                summarize(self._summary_messages(agent, messages))
+                for agent, messages in batch.items()
+            )
+        )
+        self._compact(dict(zip(batch, summaries)), num_compacted)
+
+    def summary_text(self) -> str:
+        """Returns the summaries of the compacted turns (empty if nothing was compacted)."""
+        if not self.agent_summaries:
+            return ""
+
+        return "SUMMARY OF EARLIER DISCUSSION (condensed per participant):\n" + "\n".join(
+            f"- {agent}: {summary}" for agent, summary in self.agent_summaries.items()
+        )
+
+    def recent_turns(self) -> list[dict[str, str]]:
+        """Returns the turns that are kept verbatim."""
+        return self.turns[self.num_compacted:]
+
+    def render(self) -> str:
+        """Renders the summaries followed by the verbatim recent turns as text."""
+        parts = [self.summary_text()] + [_format_turn(turn) for turn in self.recent_turns()]
+
+        return "\n\n".join(part for part in parts if part)
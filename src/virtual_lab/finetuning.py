@@ -0,0 +1,383 @@
+"""Builds per-agent fine-tuning datasets from saved discussions."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from virtual_lab.archive import _is_discussion
+from virtual_lab.constants import (
+    DEFAULT_FINETUNING_EPOCHS,
+    FINETUNING_MODEL_TO_TRAINING_PRICE_PER_TOKEN,
+)
+from virtual_lab.utils import compute_finetuning_cost, count_tokens
+
+
+# The fine-tuning API accepts training files of at most 512 MB
+DEFAULT_MAX_SHARD_BYTES = 100 * 2**20
+
+# The maximum number of tokens of a training example of the fine-tunable models
+DEFAULT_MAX_SAMPLE_TOKENS = 65_536
+
+
+@dataclass
+class FinetuningSample:
+    """A chat-format training example of one agent.
+
+    Attributes:
+        agent: The title of the agent whose turns are the assistant messages.
+        line: The example as a JSONL line (without the newline).
+        digest: The SHA-256 digest of the line, used for deduplication.
+        token_count: The number of tokens of the example's messages.
+    """
+    agent: str
+    line: str
+    digest: bytes
+    token_count: int
+
+
+@dataclass
+class FinetuningDataset:
+    """The training data of one agent, written as one or more JSONL shards.
+
+    Attributes:
+        agent: The title of the agent.
+        paths: The paths of the JSONL shards.
+        num_samples: The number of training examples written.
+        num_duplicates: The number of examples dropped as duplicates.
+        num_too_long: The number of examples dropped for exceeding the token limit.
+        token_count: The number of tokens of the training examples (one epoch).
+        costs: Mapping from fine-tunable model to the cost of training on the dataset.
+    """
+    agent: str
+    paths: list[Path] = field(default_factory=list)
+    num_samples: int = 0
+    num_duplicates: int = 0
+    num_too_long: int = 0
+    token_count: int = 0
+    costs: dict[str, float] = field(default_factory=dict)
+
+
+def discussion_samples(
+    discussion: list[dict[str, str]],
+    agent_prompts: dict[str, str],
+    max_sample_tokens: int = DEFAULT_MAX_SAMPLE_TOKENS,
+    encoding_name: str = "cl100k_base",
+) -> tuple[list[FinetuningSample], list[str]]:
+    """Converts a discussion into one chat-format training example per agent.
+
+    In the example of an agent, its turns are assistant messages and all
+    other turns (the agenda and the other agents) are user messages prefixed
+    by the speaker, so the model learns to speak as that agent in context.
+
+    :param discussion: The discussion (as saved by `save_meeting`).
+    :param agent_prompts: Mapping from agent title to the system prompt of its examples.
+        Agents that are not in the mapping get no examples.
+    :param max_sample_tokens: Examples with more tokens are dropped.
+    :param encoding_name: The name of the encoding used to count tokens.
+    :return: The examples and the agents whose example was dropped for being too long.
+    """
+    samples = []
+    too_long_agents = []
+    speakers = dict.fromkeys(turn["agent"] for turn in discussion)
+
+    for agent in speakers:
+        if agent not in agent_prompts:
+            continue
+
+        messages = [{"role": "system", "content": agent_prompts[agent]}]
+        for turn in discussion:
+            if turn["agent"] == agent:
+                messages.append({"role": "assistant", "content": turn["message"]})
+            else:
+                messages.append(
+                    {"role": "user", "content": f"{turn['agent']}: {turn['message']}"}
+                )
+
+        # Drop trailing turns of the other agents, which the agent never answered
+        while messages[-1]["role"] != "assistant":
+            messages.pop()
+
+        token_count = sum(
+            count_tokens(message["content"], encoding_name) for message in messages
+        )
+        if token_count > max_sample_tokens:
+            too_long_agents.append(agent)
+            continue
+
+        line = json.dumps({"messages": messages})
+        samples.append(
+            FinetuningSample(
+                agent=agent,
+                line=line,
+                digest=hashlib.sha256(line.encode("utf-8")).digest(),
+                token_count=token_count,
+            )
+        )
+
+    return samples, too_long_agents
+
+
+def _file_samples(
+    path: Path,
+    agent_prompts: dict[str, str],
+    max_sample_tokens: int,
+    encoding_name: str,
+) -> tuple[list[FinetuningSample], list[str]]:
+    """Loads a discussion file and converts it into training examples (run in a worker)."""
+    try:
+        with open(path) as f:
+            discussion = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return [], []
+
+    if not _is_discussion(discussion):
+        return [], []
+
+    return discussion_samples(
+        discussion, agent_prompts, max_sample_tokens, encoding_name
+    )
+
+
+def _file_name(agent: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", agent).strip("_")
+
+
+class _ShardWriter:
+    """Appends JSONL lines to numbered shard files of at most `max_shard_bytes`."""
+
+    def __init__(self, save_dir: Path, name: str, max_shard_bytes: int) -> None:
+        self.save_dir = save_dir
+        self.name = name
+        self.max_shard_bytes = max_shard_bytes
+        self.paths: list[Path] = []
+        self._file = None
+        self._num_bytes = 0
+
+    def write(self, line: str) -> None:
+        data = (line + "\n").encode("utf-8")
+
+        if self._file is None or (
+            self._num_bytes > 0 and self._num_bytes + len(data) > self.max_shard_bytes
+        ):
+            self.close()
+            path = self.save_dir / f"{self.name}_training_data_{len(self.paths):03d}.jsonl"
+            self.paths.append(path)
+            self._file = open(path, "wb")
+            self._num_bytes = 0
+
+        self._file.write(data)
+        self._num_bytes += len(data)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _iter_samples(
+    discussion_paths: Iterable[Path],
+    agent_prompts: dict[str, str],
+    max_sample_tokens: int,
+    encoding_name: str,
+    num_workers: int,
+    chunk_size: int,
+) -> Iterator[tuple[list[FinetuningSample], list[str]]]:
+    """Yields the training examples of each discussion file, in order."""
+    convert = partial(
+        _file_samples,
+        agent_prompts=agent_prompts,
+        max_sample_tokens=max_sample_tokens,
+        encoding_name=encoding_name,
+    )
+
+    if num_workers <= 1:
+        yield from map(convert, discussion_paths)
+        return
+
+    # Each worker process tokenizes with its own cached encoder
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        yield from executor.map(convert, discussion_paths, chunksize=chunk_size)
+
+
+def build_finetuning_datasets(
+    discussion_paths: Iterable[Path],
+    save_dir: Path,
+    agent_prompts: dict[str, str],
+    models: tuple[str, ...] = tuple(FINETUNING_MODEL_TO_TRAINING_PRICE_PER_TOKEN),
+    num_epochs: int = DEFAULT_FINETUNING_EPOCHS,
+    max_sample_tokens: int = DEFAULT_MAX_SAMPLE_TOKENS,
+    max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+    num_workers: int | None = None,
+    chunk_size: int = 32,
+    encoding_name: str = "cl100k_base",
+    dry_run: bool = False,
+) -> dict[str, FinetuningDataset]:
+    """Converts saved discussions into per-agent chat-format JSONL training data.
+
+    Discussion files are streamed through a process pool that loads and
+    tokenizes them (see `discussion_samples`), so only the examples of the
+    files in flight are held in memory. Identical examples are written once
+    (deduplicated by hash) and each agent's data is split into shards
+    `{agent}_training_data_{i:03d}.jsonl` of at most `max_shard_bytes`.
+
+    The files are streamed twice: a first pass counts the examples and tokens
+    and prints the training cost per model of every dataset, before a second
+    pass writes the shards. With `dry_run`, only the first pass runs, which
+    gives the cost of fine-tuning before committing to it.
+
+    :param discussion_paths: Paths of discussion JSON files (as saved by `save_meeting`).
+        Files that are not discussions are ignored.
+    :param save_dir: Directory to save the JSONL shards.
+    :param agent_prompts: Mapping from agent title to the system prompt of its examples
+        (e.g., `{agent.title: agent.prompt for agent in agents}`). Only these
+        agents get datasets.
+    :param models: The fine-tunable models to report the training cost for.
+    :param num_epochs: Number of fine-tuning epochs.
+    :param max_sample_tokens: Examples with more tokens are dropped.
+    :param max_shard_bytes: The maximum size of a JSONL shard.
+    :param num_workers: Number of worker processes (defaults to the number of CPUs;
+        1 converts the files in this process).
+    :param chunk_size: Number of files sent to a worker at a time.
+    :param encoding_name: The name of the encoding used to count tokens.
+    :param dry_run: If True, count tokens and costs without writing any files.
+    :return: Mapping from agent title to its dataset.
+    """
+    for model in models:
+        if model not in FINETUNING_MODEL_TO_TRAINING_PRICE_PER_TOKEN:
+            raise ValueError(f'Cost of model "{model}" not known')
+
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+
+    # The paths are streamed twice (counting, then writing)
+    discussion_paths = list(discussion_paths)
+    iter_samples = partial(
+        _iter_samples,
+        discussion_paths,
+        agent_prompts,
+        max_sample_tokens,
+        encoding_name,
+        num_workers,
+        chunk_size,
+    )
+
+    # Count the examples and tokens, and report the cost before writing anything
+    datasets = {agent: FinetuningDataset(agent=agent) for agent in agent_prompts}
+    seen_digests: set[bytes] = set()
+    num_files = 0
+
+    for samples, too_long_agents in iter_samples():
+        num_files += 1
+
+        for sample in samples:
+            dataset = datasets[sample.agent]
+
+            # Drop identical examples (e.g., copies of the same discussion)
+            if sample.digest in seen_digests:
+                dataset.num_duplicates += 1
+                continue
+
+            seen_digests.add(sample.digest)
+            dataset.num_samples += 1
+            dataset.token_count += sample.token_count
+
+        for agent in too_long_agents:
+            datasets[agent].num_too_long += 1
+
+    for dataset in datasets.values():
+        dataset.costs = {
+            model: compute_finetuning_cost(model, dataset.token_count, num_epochs)
+            for model in models
+        }
+
+    _print_datasets_report(datasets, num_files, num_epochs)
+
+    if dry_run:
+        return datasets
+
+    # Write the unique examples of each agent to its shards
+    save_dir.mkdir(parents=True, exist_ok=True)
+    writers = {
+        agent: _ShardWriter(save_dir, _file_name(agent), max_shard_bytes)
+        for agent in agent_prompts
+    }
+    seen_digests.clear()
+
+    try:
+        for samples, _ in iter_samples():
+            for sample in samples:
+                if sample.digest not in seen_digests:
+                    seen_digests.add(sample.digest)
+                    writers[sample.agent].write(sample.line)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for agent, dataset in datasets.items():
+        dataset.paths = writers[agent].paths
+        print(f"{agent}: wrote {len(dataset.paths):,} shards to {save_dir}")
+
+    return datasets
+
+
+def _print_datasets_report(
+    datasets: dict[str, FinetuningDataset], num_files: int, num_epochs: int
+) -> None:
+    """Prints the size and training cost of each dataset."""
+    print(f"Discussion files: {num_files:,}")
+
+    for dataset in datasets.values():
+        print(
+            f"{dataset.agent}: {dataset.num_samples:,} examples "
+            f"({dataset.num_duplicates:,} duplicates, {dataset.num_too_long:,} too long), "
+            f"{dataset.token_count:,} tokens"
+        )
+
+        for model, cost in dataset.costs.items():
+            print(f"  Finetuning cost using {model} ({num_epochs} epochs): ${cost:.2f}")
+
+
+def build_finetuning_datasets_from_directory(
+    discussion_dir: Path,
+    save_dir: Path,
+    agent_prompts_path: Path,
+    pattern: str = "**/*.json",
+    max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+    num_workers: int | None = None,
+    dry_run: bool = False,
+) -> None:
+    """Builds per-agent fine-tuning datasets from a directory of saved discussions.
+
+    :param discussion_dir: Directory of saved discussions.
+    :param save_dir: Directory to save the JSONL shards.
+    :param agent_prompts_path: Path to a JSON file mapping agent title to system prompt.
+    :param pattern: Glob pattern of the discussion files within `discussion_dir`.
+    :param max_shard_bytes: The maximum size of a JSONL shard.
+    :param num_workers: Number of worker processes (defaults to the number of CPUs).
+    :param dry_run: If True, only report token counts and costs.
+    """
+    with open(agent_prompts_path) as f:
+        agent_prompts = json.load(f)
+
+    build_finetuning_datasets(
+        discussion_paths=sorted(discussion_dir.glob(pattern)),
+        save_dir=save_dir,
+        agent_prompts=agent_prompts,
+        max_shard_bytes=max_shard_bytes,
+        num_workers=num_workers,
+        dry_run=dry_run,
+    )
+
+
+if __name__ == "__main__":
+    from tap import tapify
+
+    tapify(build_finetuning_datasets_from_directory)
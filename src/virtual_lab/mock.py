@@ -0,0 +1,684 @@
+"""Local stand-in for the OpenAI chat completions and Responses APIs, for offline runs."""
+
+from __future__ import annotations
+
+import email.parser
+import email.policy
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Literal
+
+from openai import AsyncOpenAI, OpenAI
+
+
+@dataclass
+class LatencyDistribution:
+    """The latency of mock completions: time to first token plus decoding time.
+
+    Attributes:
+        distribution: The distribution of the time to first token.
+        time_to_first_token: The median time to first token in seconds.
+        spread: The sigma of the log-normal distribution, or the relative
+            half-width of the uniform distribution.
+        tokens_per_second: The decoding speed after the first token.
+    """
+
+    distribution: Literal["constant", "uniform", "lognormal"] = "lognormal"
+    time_to_first_token: float = 0.5
+    spread: float = 0.3
+    tokens_per_second: float = 50.0
+
+    def sample_time_to_first_token(self, rng: random.Random) -> float:
+        """Samples a time to first token in seconds.
+
+        :param rng: The random number generator.
+        :return: The time to first token.
+        """
+        if self.distribution == "constant":
+            return self.time_to_first_token
+
+        if self.distribution == "uniform":
+            return self.time_to_first_token * rng.uniform(1 - self.spread, 1 + self.spread)
+
+        if self.distribution == "lognormal":
+            return self.time_to_first_token * rng.lognormvariate(0, self.spread)
+
+        raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+    def decode_seconds(self, num_tokens: int) -> float:
+        """Returns the time to decode the tokens after the first one.
+
+        :param num_tokens: The number of completion tokens.
+        :return: The decoding time in seconds.
+        """
+        return max(num_tokens - 1, 0) / self.tokens_per_second
+
+
+@dataclass
+class MockRequestRecord:
+    """A request served by the mock server."""
+
+    model: str
+    status: int
+    stream: bool
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    time_to_first_token: float
+    simulated_seconds: float
+    request_bytes: int = 0
+    start_time: float = field(default_factory=time.time)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Estimates the number of tokens of a text (about 4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class MockChatServer:
+    """A local HTTP server speaking the OpenAI chat completions wire format.
+
+    Serves `POST /v1/chat/completions` (streamed and non-streamed) with
+    synthetic replies whose latency, token counts, and failures are
+    configurable, so real `OpenAI` / `AsyncOpenAI` clients (including their
+    retries) can be exercised offline:
+
+        with MockChatServer(latency=LatencyDistribution(time_to_first_token=0.2)) as server:
+            run_meeting(..., client=server.client())
+
+    Prompt tokens are estimated from the message lengths. The provider's
+    prompt cache is simulated: input tokens of the longest previously seen
+    message prefix count as cached (from 1,024 tokens, in increments of 128).
+
+    The stateful Responses API (`POST /v1/responses`) is emulated as well:
+    every response is stored, and a request with `previous_response_id`
+    continues that response's conversation (unknown IDs fail with HTTP 400).
+    As with the real API, its input tokens cover the whole conversation, and
+    `records` keep the size of each request body, which shows how much input
+    is uploaded per call.
+
+    The Files and Batch endpoints (`POST /v1/files`, `POST /v1/batches`,
+    `GET /v1/batches/{id}`, `GET /v1/files/{id}/content`) are served as well.
+    A batch of chat completions (or Responses API requests) completes
+    `batch_latency_seconds` after it is created, with the same synthetic
+    replies and failure injection.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyDistribution | None = None,
+        completion_tokens: tuple[int, int] = (200, 600),
+        failure_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after_seconds: float = 1.0,
+        prompt_cache: bool = True,
+        batch_latency_seconds: float = 1.0,
+        seed: int | None = None,
+    ) -> None:
+        """Initializes the server.
+
+        :param latency: The latency distribution of the completions.
+        :param completion_tokens: The range (inclusive) of the number of completion tokens,
+            capped by the request's `max_tokens` / `max_completion_tokens`.
+        :param failure_rate: The probability that a request fails with HTTP 500.
+        :param rate_limit_rate: The probability that a request fails with HTTP 429.
+        :param retry_after_seconds: The Retry-After header of rate limited responses.
+        :param prompt_cache: Whether to simulate the provider's prompt cache.
+        :param batch_latency_seconds: The time for a batch to complete after it is created.
+        :param seed: The random seed.
+        """
+        self.latency = latency or LatencyDistribution()
+        self.completion_tokens = completion_tokens
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.prompt_cache = prompt_cache
+        self.batch_latency_seconds = batch_latency_seconds
+        self.records: list[MockRequestRecord] = []
+        self.files: dict[str, dict[str, Any]] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+        self.responses: dict[str, list[dict[str, Any]]] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._seen_prefixes: set[str] = set()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    # ------------------------------------------------------------------
+    # Synthetic completions
+    # ------------------------------------------------------------------
+
+    def _cached_tokens(self, messages: list[dict[str, Any]]) -> int:
+        """Returns the number of cached tokens and records the prefixes of the request."""
+        prefix_hash = hashlib.sha256()
+        prefix_tokens = 0
+        cached_tokens = 0
+
+        with self._lock:
+            for message in messages:
+                prefix_hash.update(json.dumps(message, sort_keys=True).encode("utf-8"))
+                prefix_tokens += _estimate_tokens(str(message.get("content", ""))) + 4
+                digest = prefix_hash.hexdigest()
+
+                if digest in self._seen_prefixes:
+                    cached_tokens = prefix_tokens
+
+                self._seen_prefixes.add(digest)
+
+        if cached_tokens < 1024:
+            return 0
+
+        return cached_tokens // 128 * 128
+
+    def _plan(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Samples the outcome, token counts, and latency of a request."""
+        messages = request.get("messages", [])
+        prompt_tokens = sum(
+            _estimate_tokens(str(message.get("content", ""))) + 4 for message in messages
+        )
+
+        with self._lock:
+            draw = self._rng.random()
+            completion_tokens = self._rng.randint(*self.completion_tokens)
+            time_to_first_token = self.latency.sample_time_to_first_token(self._rng)
+
+        max_tokens = (
+            request.get("max_completion_tokens")
+            or request.get("max_tokens")
+            or request.get("max_output_tokens")
+        )
+        if max_tokens is not None:
+            completion_tokens = min(completion_tokens, max_tokens)
+
+        if draw < self.rate_limit_rate:
+            status = 429
+        elif draw < self.rate_limit_rate + self.failure_rate:
+            status = 500
+        else:
+            status = 200
+
+        return {
+            "status": status,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": (
+                self._cached_tokens(messages) if self.prompt_cache and status == 200 else 0
+            ),
+            "time_to_first_token": time_to_first_token,
+            "decode_seconds": self.latency.decode_seconds(completion_tokens),
+        }
+
+    @staticmethod
+    def _words(num_tokens: int, model: str) -> list[str]:
+        """Returns the words of a synthetic reply (one word per token)."""
+        words = [f"[mock {model}]"] + ["lorem", "ipsum", "dolor", "sit", "amet"] * (
+            num_tokens // 5 + 1
+        )
+        return words[:max(num_tokens, 1)]
+
+    def _usage(self, plan: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "prompt_tokens": plan["prompt_tokens"],
+            "completion_tokens": plan["completion_tokens"],
+            "total_tokens": plan["prompt_tokens"] + plan["completion_tokens"],
+            "prompt_tokens_details": {"cached_tokens": plan["cached_tokens"]},
+        }
+
+    def _completion_body(self, model: str, plan: dict[str, Any]) -> dict[str, Any]:
+        """Returns the JSON body of a non-streamed chat completion."""
+        return {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": " ".join(self._words(plan["completion_tokens"], model)),
+                    },
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": self._usage(plan),
+        }
+
+    def _response_body(
+        self, response_id: str, model: str, text: str, plan: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Returns the JSON body of a Responses API response."""
+        return {
+            "id": response_id,
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": model,
+            "output": [
+                {
+                    "id": f"msg_mock_{uuid.uuid4().hex[:12]}",
+                    "type": "message",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}],
+                }
+            ],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": plan["prompt_tokens"],
+                "input_tokens_details": {"cached_tokens": plan["cached_tokens"]},
+                "output_tokens": plan["completion_tokens"],
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": plan["prompt_tokens"] + plan["completion_tokens"],
+            },
+        }
+
+    @staticmethod
+    def _error_body(status: int) -> dict[str, Any]:
+        if status == 429:
+            return {"error": {"message": "Mock rate limit", "type": "rate_limit_exceeded"}}
+
+        return {"error": {"message": "Mock server error", "type": "server_error"}}
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(
+                self, status: int, body: dict[str, Any], headers: dict[str, str] | None = None
+            ) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_not_found(self) -> None:
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                path = self.path.rstrip("/")
+
+                if path.endswith("/chat/completions"):
+                    server._serve_chat_completion(
+                        self, json.loads(body or b"{}"), request_bytes=len(body)
+                    )
+                elif path.endswith("/responses"):
+                    server._serve_response(
+                        self, json.loads(body or b"{}"), request_bytes=len(body)
+                    )
+                elif path.endswith("/files"):
+                    self._send_json(
+                        200, server._create_file(self.headers["Content-Type"], body)
+                    )
+                elif path.endswith("/batches"):
+                    self._send_json(200, server._create_batch(json.loads(body)))
+                else:
+                    self._send_not_found()
+
+            def do_GET(self) -> None:
+                parts = self.path.rstrip("/").split("/")
+
+                if parts[-2] == "batches" and parts[-1] in server.batches:
+                    self._send_json(200, server.batches[parts[-1]])
+                elif parts[-1] == "content" and parts[-2] in server.files:
+                    data = server.files[parts[-2]]["content"]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                else:
+                    self._send_not_found()
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def _record_and_wait(
+        self, model: str, stream: bool, plan: dict[str, Any], request_bytes: int
+    ) -> None:
+        """Records a request and waits for its time to first token."""
+        with self._lock:
+            self.records.append(
+                MockRequestRecord(
+                    model=model,
+                    status=plan["status"],
+                    stream=stream,
+                    prompt_tokens=plan["prompt_tokens"],
+                    completion_tokens=plan["completion_tokens"],
+                    cached_tokens=plan["cached_tokens"],
+                    time_to_first_token=plan["time_to_first_token"],
+                    simulated_seconds=plan["time_to_first_token"]
+                    + (plan["decode_seconds"] if plan["status"] == 200 else 0),
+                    request_bytes=request_bytes,
+                )
+            )
+
+        time.sleep(plan["time_to_first_token"])
+
+    def _send_error(self, handler: BaseHTTPRequestHandler, status: int) -> None:
+        handler._send_json(
+            status,
+            self._error_body(status),
+            headers=(
+                {"Retry-After": f"{self.retry_after_seconds:g}"} if status == 429 else None
+            ),
+        )
+
+    def _serve_response(
+        self,
+        handler: BaseHTTPRequestHandler,
+        request: dict[str, Any],
+        request_bytes: int = 0,
+    ) -> None:
+        """Serves a (non-streamed) Responses API request, continuing a stored conversation."""
+        model = request.get("model", "mock")
+        previous_response_id = request.get("previous_response_id")
+
+        if request.get("stream"):
+            handler._send_json(
+                400,
+                {"error": {"message": "The mock Responses API does not support streaming."}},
+            )
+            return
+
+        if previous_response_id is not None and previous_response_id not in self.responses:
+            handler._send_json(
+                400,
+                {
+                    "error": {
+                        "message": (
+                            f"Previous response with id '{previous_response_id}' not found."
+                        ),
+                        "type": "invalid_request_error",
+                        "param": "previous_response_id",
+                    }
+                },
+            )
+            return
+
+        # Instructions are not carried over from the previous response
+        input_messages = request.get("input", [])
+        if isinstance(input_messages, str):
+            input_messages = [{"role": "user", "content": input_messages}]
+
+        conversation = self.responses.get(previous_response_id, []) + input_messages
+        messages = (
+            [{"role": "system", "content": request["instructions"]}]
+            if request.get("instructions")
+            else []
+        ) + conversation
+
+        plan = self._plan({**request, "messages": messages})
+        self._record_and_wait(model, False, plan, request_bytes)
+
+        if plan["status"] != 200:
+            self._send_error(handler, plan["status"])
+            return
+
+        response_id = f"resp_mock_{uuid.uuid4().hex[:12]}"
+        text = " ".join(self._words(plan["completion_tokens"], model))
+
+        with self._lock:
+            self.responses[response_id] = conversation + [
+                {"role": "assistant", "content": text}
+            ]
+
+        time.sleep(plan["decode_seconds"])
+        handler._send_json(200, self._response_body(response_id, model, text, plan))
+
+    def _serve_chat_completion(
+        self,
+        handler: BaseHTTPRequestHandler,
+        request: dict[str, Any],
+        request_bytes: int = 0,
+    ) -> None:
+        model = request.get("model", "mock")
+        stream = bool(request.get("stream"))
+        plan = self._plan(request)
+        self._record_and_wait(model, stream, plan, request_bytes)
+
+        if plan["status"] != 200:
+            self._send_error(handler, plan["status"])
+            return
+
+        if not stream:
+            time.sleep(plan["decode_seconds"])
+            handler._send_json(200, self._completion_body(model, plan))
+            return
+
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        words = self._words(plan["completion_tokens"], model)
+
+        # Stream the reply in a few chunks as server-sent events
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        def send_chunk(delta: dict[str, Any], usage: dict[str, Any] | None = None) -> None:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": (
+                    [{"index": 0, "delta": delta, "finish_reason": None}] if delta else []
+                ),
+                "usage": usage,
+            }
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+
+        num_chunks = min(len(words), 10)
+        chunk_size = -(-len(words) // num_chunks)
+        for start in range(0, len(words), chunk_size):
+            if start > 0:
+                time.sleep(plan["decode_seconds"] * chunk_size / len(words))
+            send_chunk({"content": " ".join(words[start:start + chunk_size]) + " "})
+
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send_chunk({}, usage=self._usage(plan))
+
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+
+    # ------------------------------------------------------------------
+    # Files and batches
+    # ------------------------------------------------------------------
+
+    def _add_file(self, filename: str, purpose: str, content: bytes) -> dict[str, Any]:
+        file_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        file_object = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+        with self._lock:
+            self.files[file_id] = {**file_object, "content": content}
+
+        return file_object
+
+    def _create_file(self, content_type: str, body: bytes) -> dict[str, Any]:
+        """Stores a file uploaded as multipart/form-data."""
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body
+        )
+        fields = {
+            part.get_param("name", header="content-disposition"): part
+            for part in message.iter_parts()
+        }
+        file_part = fields["file"]
+
+        return self._add_file(
+            filename=file_part.get_filename() or "upload.jsonl",
+            purpose=fields["purpose"].get_content().strip(),
+            content=file_part.get_payload(decode=True),
+        )
+
+    def _create_batch(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Creates a batch and completes it in the background."""
+        batch_id = f"batch_mock_{uuid.uuid4().hex[:12]}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": request["endpoint"],
+            "input_file_id": request["input_file_id"],
+            "completion_window": request["completion_window"],
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "metadata": request.get("metadata"),
+        }
+        self.batches[batch_id] = batch
+
+        threading.Thread(target=self._process_batch, args=(batch_id,), daemon=True).start()
+
+        return batch
+
+    def _process_batch(self, batch_id: str) -> None:
+        batch = self.batches[batch_id]
+        lines = self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+        outputs = []
+
+        for line in lines:
+            if not line.strip():
+                continue
+
+            item = json.loads(line)
+            body = item["body"]
+            is_response = batch["endpoint"] == "/v1/responses"
+            plan = self._plan({**body, "messages": body["input"]} if is_response else body)
+            model = body.get("model", "mock")
+
+            with self._lock:
+                self.records.append(
+                    MockRequestRecord(
+                        model=model,
+                        status=plan["status"],
+                        stream=False,
+                        prompt_tokens=plan["prompt_tokens"],
+                        completion_tokens=plan["completion_tokens"],
+                        cached_tokens=plan["cached_tokens"],
+                        time_to_first_token=0.0,
+                        simulated_seconds=0.0,
+                        request_bytes=len(line.encode("utf-8")),
+                    )
+                )
+
+            if plan["status"] != 200:
+                response_body = self._error_body(plan["status"])
+            elif is_response:
+                response_body = self._response_body(
+                    f"resp_mock_{uuid.uuid4().hex[:12]}",
+                    model,
+                    " ".join(self._words(plan["completion_tokens"], model)),
+                    plan,
+                )
+            else:
+                response_body = self._completion_body(model, plan)
+
+            outputs.append(
+                {
+                    "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                    "custom_id": item["custom_id"],
+                    "response": {
+                        "status_code": plan["status"],
+                        "request_id": uuid.uuid4().hex,
+                        "body": response_body,
+                    },
+                    "error": None,
+                }
+            )
+
+        time.sleep(self.batch_latency_seconds)
+
+        output_file = self._add_file(
+            filename=f"{batch_id}_output.jsonl",
+            purpose="batch_output",
+            content="".join(json.dumps(output) + "\n" for output in outputs).encode("utf-8"),
+        )
+        num_failed = sum(output["response"]["status_code"] != 200 for output in outputs)
+        batch.update(
+            status="completed",
+            completed_at=int(time.time()),
+            output_file_id=output_file["id"],
+            request_counts={
+                "total": len(outputs),
+                "completed": len(outputs) - num_failed,
+                "failed": num_failed,
+            },
+        )
+
+    # ------------------------------------------------------------------
+    # Lifecycle and clients
+    # ------------------------------------------------------------------
+
+    @property
+    def url(self) -> str:
+        """The base URL of the OpenAI-compatible API (ending in /v1)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> MockChatServer:
+        """Starts serving on a free local port in a background thread."""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        """Stops the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def client(self, **kwargs: Any) -> OpenAI:
+        """Returns an `OpenAI` client that talks to this server.
+
+        :param kwargs: Additional arguments for `OpenAI` (e.g., max_retries).
+        """
+        return OpenAI(base_url=self.url, api_key="mock", **kwargs)
+
+    def async_client(self, **kwargs: Any) -> AsyncOpenAI:
+        """Returns an `AsyncOpenAI` client that talks to this server.
+
+        :param kwargs: Additional arguments for `AsyncOpenAI` (e.g., max_retries).
+        """
+        return AsyncOpenAI(base_url=self.url, api_key="mock", **kwargs)
+
+    def __enter__(self) -> MockChatServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
@@ -0,0 +1,581 @@
+"""Runs many independent copies of a meeting in parallel and merges their answers."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field, fields, is_dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Literal
+
+from openai import AsyncOpenAI
+
+from virtual_lab.agent import Agent
+from virtual_lab.backends import Provider, get_client
+from virtual_lab.constants import CONSISTENT_TEMPERATURE, CREATIVE_TEMPERATURE
+from virtual_lab.convergence import EarlyStopping
+from virtual_lab.prompts import create_merge_prompt
+from virtual_lab.rate_limiter import RateLimiter
+from virtual_lab.response_cache import AsyncCachedOpenAI, ResponseCache
+from virtual_lab.routing import Budget, ModelRouter
+from virtual_lab.run_meeting_v2 import async_run_meeting
+from virtual_lab.tracing import SpanExporter
+
+
+@dataclass
+class MeetingRun:
+    """The outcome of one meeting in a parallel batch.
+
+    Attributes:
+        save_name: The name the discussion was saved under.
+        summary: The summary of the meeting (None if the meeting failed).
+        error: The error message if the meeting failed or timed out.
+        elapsed_seconds: Wall-clock time of the meeting.
+        token_counts: The "input", "output" and "cached" token counts of the meeting.
+    """
+    save_name: str
+    summary: str | None = None
+    error: str | None = None
+    elapsed_seconds: float = 0.0
+    token_counts: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the meeting produced a summary."""
+        return self.error is None
+
+
+# File in the save directory with the inputs and summaries of the merges of a tree-reduce merge
+MERGE_TREE_STATE_FILE = "merge_tree_state.json"
+
+
+@dataclass
+class MergeNode:
+    """One merge meeting of a tree-reduce merge.
+
+    Attributes:
+        save_name: The name the merge discussion was saved under.
+        level: The level of the merge (1 merges meeting summaries, 2 merges level 1 merges, ...).
+        children: The save names of the meetings or merges it merged.
+        leaves: The save names of the meetings that contributed to it (its provenance).
+        run: The outcome of the merge meeting.
+        cached: Whether the merge was reused from an earlier run with the same inputs.
+    """
+    save_name: str
+    level: int
+    children: tuple[str, ...]
+    leaves: tuple[str, ...]
+    run: MeetingRun
+    cached: bool = False
+
+
+@dataclass
+class ParallelMeetingsResult:
+    """The outcome of a batch of parallel meetings and their merge meeting.
+
+    Attributes:
+        runs: One entry per meeting, in iteration order.
+        merged_summary: The summary of the merge meeting (None if not run).
+        merge_run: The outcome of the (final) merge meeting (None if not run).
+        merge_tree: The merges of a tree-reduce merge, level by level
+            (empty for a single merge meeting).
+    """
+    runs: list[MeetingRun]
+    merged_summary: str | None = None
+    merge_run: MeetingRun | None = None
+    merge_tree: list[MergeNode] = field(default_factory=list)
+
+    @property
+    def summaries(self) -> tuple[str, ...]:
+        """The summaries of the successful meetings, in iteration order."""
+        return tuple(run.summary for run in self.runs if run.summary is not None)
+
+    @property
+    def merge_runs(self) -> list[MeetingRun]:
+        """The outcomes of all merge meetings, including intermediate merges."""
+        if self.merge_tree:
+            return [node.run for node in self.merge_tree]
+
+        return [self.merge_run] if self.merge_run is not None else []
+
+    @property
+    def token_counts(self) -> dict[str, int]:
+        """The total token counts over all meetings, including the merge meetings."""
+        runs = self.runs + self.merge_runs
+        return {
+            key: sum(run.token_counts.get(key, 0) for run in runs)
+            for key in ("input", "output", "cached")
+        }
+
+
+def _agent_fingerprint(agent: Any) -> Any:
+    """Returns the parts of an agent that affect its replies."""
+    if agent is None:
+        return None
+
+    return [
+        getattr(agent, name, None)
+        for name in ("title", "pmpt_id", "prompt", "system_prompt", "model")
+    ]
+
+
+def _fingerprint(value: Any) -> Any:
+    """Returns a JSON-serializable form of a meeting argument that is the same in every run.
+
+    Agents are reduced to the parts that affect their replies, dataclasses
+    (e.g., EarlyStopping or ContextRetrieval) to their fields, and objects
+    with a `fingerprint()` method (e.g., a RetrievalIndex) to its result.
+    Any other object (e.g., a TokenLedger or span exporter) does not change
+    the replies and is reduced to its type, since its repr may hold a memory
+    address.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, Path):
+        return str(value)
+
+    if isinstance(value, (list, tuple)):
+        return [_fingerprint(item) for item in value]
+
+    if isinstance(value, dict):
+        return {str(key): _fingerprint(item) for key, item in value.items()}
+
+    if hasattr(value, "fingerprint"):
+        return value.fingerprint()
+
+    if hasattr(value, "title") and any(
+        hasattr(value, name) for name in ("pmpt_id", "prompt", "system_prompt")
+    ):
+        return _agent_fingerprint(value)
+
+    if is_dataclass(value) and not isinstance(value, type):
+        return {
+            "type": type(value).__name__,
+            **{item.name: _fingerprint(getattr(value, item.name)) for item in fields(value)},
+        }
+
+    return type(value).__qualname__
+
+
+def meeting_input_hash(meeting_args: dict[str, Any]) -> str:
+    """Hashes the inputs of a meeting, so that unchanged meetings can reuse their result.
+
+    :param meeting_args: The arguments of `async_run_meeting` (agents are
+        fingerprinted by their title, prompt and model).
+    :return: The hex digest of the inputs.
+    """
+    return hashlib.sha256(
+        json.dumps(_fingerprint(meeting_args), sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+async def async_run_one_meeting(
+    save_name: str, timeout: float | None, **meeting_kwargs
+) -> MeetingRun:
+    """Runs a single meeting, capturing failures and timeouts instead of raising.
+
+    :param save_name: The name of the discussion file that will be saved.
+    :param timeout: The maximum time of the meeting in seconds (None for no limit).
+    :param meeting_kwargs: Other arguments of `async_run_meeting`.
+    :return: The run, with the summary or the error and the token counts of the meeting.
+    """
+    run = MeetingRun(
+        save_name=save_name, token_counts={"input": 0, "output": 0, "cached": 0}
+    )
+    start_time = time.time()
+
+    # The meeting adds the usage of each call to token_counts, so failed runs keep theirs
+    try:
+        run.summary = await asyncio.wait_for(
+            async_run_meeting(
+                save_name=save_name,
+                return_summary=True,
+                token_counts=run.token_counts,
+                **meeting_kwargs,
+            ),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        run.error = f"Timed out after {timeout} seconds"
+    except Exception as e:
+        run.error = f"{type(e).__name__}: {e}"
+    else:
+        # The meeting stopped early without a summary when the budget ran out
+        if run.summary is None:
+            run.error = "Stopped early without a summary (budget used up)"
+
+    run.elapsed_seconds = time.time() - start_time
+
+    return run
+
+
+async def _tree_merge(
+    leaves: list[MeetingRun],
+    group_size: int,
+    merge_save_name: str,
+    state_path: Path,
+    merge_args: dict[str, Any],
+    run_merge: Callable[[str, tuple[str, ...]], Awaitable[MeetingRun]],
+) -> tuple[list[MergeNode], MeetingRun | None]:
+    """Merges meeting summaries in groups of `group_size`, level by level, until one remains.
+
+    The merges of a level run concurrently. The last merge is saved as
+    `merge_save_name` and the intermediate merges as
+    `{merge_save_name}_level{level}_{i}`. A merge whose inputs (its summaries
+    and `merge_args`) are unchanged since an earlier run is reused from
+    `state_path` instead of being run again, so changing a few meetings only
+    re-runs the merges on their path to the final merge. A failed merge is
+    dropped, like a failed meeting; if that leaves a single summary before
+    the last level, it still goes through the final merge.
+
+    :return: The merge nodes and the outcome of the final merge (None if all merges
+        of a level failed).
+    """
+    state: dict[str, dict[str, Any]] = {}
+    if state_path.exists():
+        with open(state_path) as f:
+            state = json.load(f)
+
+    def save_state() -> None:
+        tmp_path = state_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp_path, state_path)
+
+    nodes: list[MergeNode] = []
+    # The current level: (save name, summary, leaves) of each meeting or merge
+    items = [(run.save_name, run.summary, (run.save_name,)) for run in leaves]
+    final_run = None
+    level = 0
+
+    # Merge level by level until the final merge (a single group) has run
+    while items:
+        level += 1
+        groups = [items[i:i + group_size] for i in range(0, len(items), group_size)]
+        is_final = len(groups) == 1
+
+        async def merge_group(
+            index: int, group: list[tuple[str, str, tuple[str, ...]]]
+        ) -> tuple[tuple[str, str, tuple[str, ...]] | None, MergeNode | None]:
+            # A lone remainder moves up a level unmerged
+            if len(group) == 1 and not is_final:
+                return group[0], None
+
+            save_name = (
+                merge_save_name if is_final else f"{merge_save_name}_level{level}_{index + 1}"
+            )
+            children = tuple(name for name, _, _ in group)
+            summaries = tuple(summary for _, summary, _ in group)
+            node_leaves = tuple(leaf for _, _, group_leaves in group for leaf in group_leaves)
+            input_hash = meeting_input_hash({**merge_args, "summaries": summaries})
+
+            previous = state.get(save_name)
+            if (
+                previous is not None
+                and previous["input_hash"] == input_hash
+                and (state_path.parent / f"{save_name}.json").exists()
+            ):
+                run = MeetingRun(
+                    save_name=save_name,
+                    summary=previous["summary"],
+                    token_counts={"input": 0, "output": 0, "cached": 0},
+                )
+                cached = True
+            else:
+                run = await run_merge(save_name, summaries)
+                cached = False
+
+                if run.succeeded:
+                    state[save_name] = {
+                        "input_hash": input_hash,
+                        "summary": run.summary,
+                        "children": list(children),
+                        "leaves": list(node_leaves),
+                    }
+                    save_state()
+
+            node = MergeNode(
+                save_name=save_name,
+                level=level,
+                children=children,
+                leaves=node_leaves,
+                run=run,
+                cached=cached,
+            )
+
+            if not run.succeeded:
+                print(f"Warning: merge {save_name} failed, dropping {len(node_leaves)} meetings")
+                return None, node
+
+            return (save_name, run.summary, node_leaves), node
+
+        results = await asyncio.gather(
+            *(merge_group(index, group) for index, group in enumerate(groups))
+        )
+        items = [item for item, _ in results if item is not None]
+        nodes += [node for _, node in results if node is not None]
+
+        if is_final:
+            final_run = nodes[-1].run
+            break
+
+    return nodes, final_run
+
+
+def _print_runs_report(result: ParallelMeetingsResult) -> None:
+    """Print per-run latency and token counts plus batch totals."""
+    runs = result.runs + result.merge_runs
+    cached_names = {node.save_name for node in result.merge_tree if node.cached}
+
+    for run in runs:
+        status = "ok" if run.succeeded else f"FAILED ({run.error})"
+        if run.save_name in cached_names:
+            status = "reused"
+        print(
+            f"{run.save_name}: {status}, "
+            f"time {run.elapsed_seconds:.1f}s, "
+            f"input tokens {run.token_counts.get('input', 0):,} "
+            f"({run.token_counts.get('cached', 0):,} cached), "
+            f"output tokens {run.token_counts.get('output', 0):,}"
+        )
+
+    num_succeeded = sum(run.succeeded for run in result.runs)
+    token_counts = result.token_counts
+    print(f"Successful meetings: {num_succeeded}/{len(result.runs)}")
+    print(f"Total input token count: {token_counts['input']:,}")
+    print(f"Total cached input token count: {token_counts['cached']:,}")
+    print(f"Total output token count: {token_counts['output']:,}")
+
+
+async def async_run_parallel_meetings(
+    meeting_type: Literal["team", "individual"],
+    agenda: str,
+    save_dir: Path,
+    num_iterations: int,
+    team_lead: Agent | None = None,
+    team_members: tuple[Agent, ...] | None = None,
+    team_member: Agent | None = None,
+    agenda_questions: tuple[str, ...] = (),
+    agenda_rules: tuple[str, ...] = (),
+    summaries: tuple[str, ...] = (),
+    contexts: tuple[str, ...] = (),
+    num_rounds: int = 0,
+    temperature: float = CREATIVE_TEMPERATURE,
+    model: str | None = None,
+    save_name_prefix: str = "discussion",
+    max_concurrent_meetings: int = 5,
+    max_concurrency_per_meeting: int = 4,
+    requests_per_minute: float | None = None,
+    tokens_per_minute: float | None = None,
+    timeout: float | None = None,
+    merge: bool = True,
+    merge_agent: Agent | None = None,
+    merge_save_name: str = "merged",
+    merge_num_rounds: int = 0,
+    merge_temperature: float = CONSISTENT_TEMPERATURE,
+    merge_group_size: int | None = None,
+    client: AsyncOpenAI | None = None,
+    cache: ResponseCache | None = None,
+    save_trace: bool = False,
+    span_exporters: tuple[SpanExporter, ...] = (),
+    router: ModelRouter | None = None,
+    budget: Budget | None = None,
+    early_stopping: EarlyStopping | None = None,
+    provider: Provider = "openai",
+) -> ParallelMeetingsResult:
+    """Runs `num_iterations` independent copies of a meeting and merges their summaries.
+
+    Each copy is saved as `{save_name_prefix}_{i}` (1-indexed) in `save_dir`.
+    A failed or timed-out copy is recorded in the result and skipped by the
+    merge instead of aborting the batch. The merge meeting is an individual
+    meeting with `merge_agent` over the successful summaries and a merge
+    agenda from `create_merge_prompt`.
+
+    With many meetings, their summaries may not fit in one merge meeting's
+    context. With `merge_group_size`, the summaries are instead merged in a
+    tree: groups of `merge_group_size` are merged concurrently, then the
+    merges are merged in groups, until one merge remains (see `_tree_merge`).
+    The result's `merge_tree` records which meetings contributed to each
+    merge, and merges whose inputs did not change are reused from
+    `save_dir / MERGE_TREE_STATE_FILE` in later runs.
+
+    :param meeting_type: "team" or "individual".
+    :param agenda: The agenda for the meetings.
+    :param save_dir: Directory to save the discussions.
+    :param num_iterations: Number of independent meetings to run.
+    :param team_lead: Team lead for team meetings.
+    :param team_members: Team members for team meetings.
+    :param team_member: Single agent for individual meetings.
+    :param agenda_questions: Questions that must be answered.
+    :param agenda_rules: Rules that must be followed.
+    :param summaries: Summaries of previous meetings.
+    :param contexts: Additional context strings.
+    :param num_rounds: Number of discussion rounds per meeting.
+    :param temperature: Sampling temperature for the meetings.
+    :param model: Optional explicit model name to use.
+    :param save_name_prefix: Prefix of the saved discussion names.
+    :param max_concurrent_meetings: Maximum number of meetings running at once.
+    :param max_concurrency_per_meeting: Maximum concurrent requests within one meeting.
+    :param requests_per_minute: Optional request rate limit (per model) shared by all meetings.
+    :param tokens_per_minute: Optional token rate limit (per model) shared by all meetings.
+                              Without either limit, the process-wide RateLimiter
+                              still retries rate-limited and failed calls.
+    :param timeout: Optional wall-clock timeout in seconds for each meeting.
+    :param merge: Whether to run the merge meeting after the batch.
+    :param merge_agent: Agent running the merge meeting
+                        (defaults to `team_lead` or `team_member`).
+    :param merge_save_name: Name of the saved merge discussion.
+    :param merge_num_rounds: Number of rounds of the merge meeting.
+    :param merge_temperature: Sampling temperature for the merge meeting.
+    :param merge_group_size: If given, merge the summaries in a tree of merges
+                             of at most this many summaries each, instead of
+                             in one merge meeting.
+    :param client: Optional shared `AsyncOpenAI`-compatible client
+                   (the pooled client of `provider` is used if None).
+    :param cache: Optional ResponseCache shared by all meetings. Each meeting
+                  caches under its save name, so the copies get independent
+                  completions (and each replays its own in a re-run).
+    :param save_trace: If True, save the spans of each meeting next to its discussion.
+    :param span_exporters: Additional span exporters shared by all meetings.
+    :param router: Optional ModelRouter choosing the model of each call.
+    :param budget: Optional Budget shared by all meetings (including the merge),
+                   which caps the cost of the whole batch.
+    :param early_stopping: Optional EarlyStopping settings of the meetings
+                           (not the merge), which skip turns and rounds once
+                           a meeting's discussion has converged.
+    :param provider: The chat backend used when no `client` is given
+                     ("openai", "google" or "mock").
+    :return: A ParallelMeetingsResult with per-run outcomes and the merged summary.
+    """
+    if num_iterations < 1:
+        raise ValueError("num_iterations must be at least 1.")
+    if max_concurrent_meetings < 1:
+        raise ValueError("max_concurrent_meetings must be at least 1.")
+    if merge_group_size is not None and merge_group_size < 2:
+        raise ValueError("merge_group_size must be at least 2.")
+
+    if client is None and not (cache is not None and cache.replay_only):
+        client = get_client(provider, asynchronous=True)
+
+    # The copies send identical requests, so each caches its completions in its
+    # own namespace instead of replaying the first copy's completions
+    def cached_client(save_name: str) -> AsyncOpenAI | AsyncCachedOpenAI | None:
+        if cache is None:
+            return client
+
+        return AsyncCachedOpenAI(cache=cache, client=client, namespace=save_name)
+
+    rate_limiter = (
+        RateLimiter(requests_per_minute, tokens_per_minute)
+        if requests_per_minute is not None or tokens_per_minute is not None
+        else None
+    )
+    meeting_semaphore = asyncio.Semaphore(max_concurrent_meetings)
+
+    async def run_iteration(iteration_num: int) -> MeetingRun:
+        save_name = f"{save_name_prefix}_{iteration_num + 1}"
+
+        async with meeting_semaphore:
+            return await async_run_one_meeting(
+                save_name=save_name,
+                timeout=timeout,
+                meeting_type=meeting_type,
+                agenda=agenda,
+                save_dir=save_dir,
+                team_lead=team_lead,
+                team_members=team_members,
+                team_member=team_member,
+                agenda_questions=agenda_questions,
+                agenda_rules=agenda_rules,
+                summaries=summaries,
+                contexts=contexts,
+                num_rounds=num_rounds,
+                temperature=temperature,
+                model=model,
+                provider=provider,
+                max_concurrency=max_concurrency_per_meeting,
+                client=cached_client(save_name),
+                rate_limiter=rate_limiter,
+                save_trace=save_trace,
+                span_exporters=span_exporters,
+                router=router,
+                budget=budget,
+                early_stopping=early_stopping,
+            )
+
+    runs = await asyncio.gather(
+        *(run_iteration(iteration_num) for iteration_num in range(num_iterations))
+    )
+    result = ParallelMeetingsResult(runs=list(runs))
+
+    # Merge the successful summaries
+    if merge and result.summaries:
+        if merge_agent is None:
+            merge_agent = team_lead if meeting_type == "team" else team_member
+
+        merge_args = {
+            "meeting_type": "individual",
+            "agenda": create_merge_prompt(
+                agenda=agenda,
+                agenda_questions=agenda_questions,
+                agenda_rules=agenda_rules,
+            ),
+            "team_member": merge_agent,
+            "contexts": contexts,
+            "num_rounds": merge_num_rounds,
+            "temperature": merge_temperature,
+            "model": model,
+        }
+
+        async def run_merge(save_name: str, merge_summaries: tuple[str, ...]) -> MeetingRun:
+            async with meeting_semaphore:
+                return await async_run_one_meeting(
+                    save_name=save_name,
+                    timeout=timeout,
+                    **merge_args,
+                    save_dir=save_dir,
+                    summaries=merge_summaries,
+                    provider=provider,
+                    client=cached_client(save_name),
+                    rate_limiter=rate_limiter,
+                    save_trace=save_trace,
+                    span_exporters=span_exporters,
+                    router=router,
+                    budget=budget,
+                )
+
+        if merge_group_size is None:
+            result.merge_run = await run_merge(merge_save_name, result.summaries)
+        else:
+            result.merge_tree, result.merge_run = await _tree_merge(
+                leaves=[run for run in result.runs if run.succeeded],
+                group_size=merge_group_size,
+                merge_save_name=merge_save_name,
+                state_path=save_dir / MERGE_TREE_STATE_FILE,
+                merge_args=merge_args,
+                run_merge=run_merge,
+            )
+
+        if result.merge_run is not None:
+            result.merged_summary = result.merge_run.summary
+    elif merge:
+        print("Warning: no meeting succeeded, skipping merge meeting")
+
+    _print_runs_report(result)
+
+    return result
+
+
+def run_parallel_meetings(*args, **kwargs) -> ParallelMeetingsResult:
+    """Runs `async_run_parallel_meetings` to completion from synchronous code.
+
+    Inside a running event loop (e.g., a Jupyter notebook), use
+    `await async_run_parallel_meetings(...)` instead.
+
+    See `async_run_parallel_meetings` for the parameters.
+    """
+    return asyncio.run(async_run_parallel_meetings(*args, **kwargs))
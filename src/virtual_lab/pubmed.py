@@ -0,0 +1,432 @@
+"""Pooled, cached, and concurrent access to PubMed Central articles."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from virtual_lab.rate_limiter import get_rate_limiter
+
+# requests is only imported once a client is created
+if TYPE_CHECKING:
+    import requests
+
+    from virtual_lab.retrieval import ArticlePassages
+
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+BIOC_URL = "https://www.ncbi.nlm.nih.gov/research/bionlp/RESTful/pmcoa.cgi/BioC_JSON"
+DEFAULT_PUBMED_CACHE_DIR = Path(
+    os.environ.get("VIRTUAL_LAB_CACHE_DIR", Path.home() / ".cache" / "virtual_lab")
+) / "pubmed"
+FULL_TEXT_SECTION_TYPES = ("ABSTRACT", "INTRO", "RESULTS", "DISCUSS", "CONCL", "METHODS")
+
+# A suggested maximum number of tokens of article passages returned by one PubMed
+# search (passage selection is off unless a client is given a budget)
+SUGGESTED_PASSAGE_TOKEN_BUDGET = 3000
+
+# The maximum number of tokens of an article passage (paragraphs are grouped up to it)
+DEFAULT_MAX_ARTICLE_PASSAGE_TOKENS = 200
+
+
+def parse_bioc_article(article: list[dict[str, Any]]) -> dict[str, Any]:
+    """Parses a BioC JSON article into its title and main text passages.
+
+    Note: This only keeps main text, ignoring tables, figures, and references.
+
+    :param article: The BioC JSON article.
+    :return: A dictionary with the "title" and the "passages" of the article,
+        each passage with its "section_type" and "text".
+    """
+    document = article[0]["documents"][0]
+
+    title = next(
+        passage["text"]
+        for passage in document["passages"]
+        if passage["infons"]["section_type"] == "TITLE"
+    )
+
+    passages = [
+        {"section_type": passage["infons"]["section_type"], "text": passage["text"]}
+        for passage in document["passages"]
+        if passage["infons"]["type"] in {"abstract", "paragraph"}
+        and passage["infons"]["section_type"] in FULL_TEXT_SECTION_TYPES
+    ]
+
+    return {"title": title, "passages": passages}
+
+
+def select_article_content(
+    article: dict[str, Any] | None, abstract_only: bool = False
+) -> tuple[str | None, list[str] | None]:
+    """Selects the title and content (abstract or full text) of a parsed article.
+
+    :param article: The parsed article (see `parse_bioc_article`) or None if not found.
+    :param abstract_only: Whether to return only the abstract instead of the full text.
+    :return: The title and content (list of paragraphs) or None if the article is not found.
+    """
+    if article is None or article.get("title") is None:
+        return None, None
+
+    section_types = ("ABSTRACT",) if abstract_only else FULL_TEXT_SECTION_TYPES
+    content = [
+        passage["text"]
+        for passage in article["passages"]
+        if passage["section_type"] in section_types
+    ]
+
+    return article["title"], content
+
+
+def _write_json_atomic(path: Path, data: Any) -> None:
+    """Writes JSON to a path atomically so concurrent readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, suffix=".tmp", delete=False, encoding="utf-8"
+    ) as file:
+        json.dump(data, file)
+
+    os.replace(file.name, path)
+
+
+class PubMedClient:
+    """Fetches PubMed Central searches and articles with connection pooling and caching.
+
+    Parsed articles are cached on disk by PMC ID (articles do not change), and
+    search results are cached with a time-to-live. Articles are fetched
+    concurrently over a pooled HTTP session.
+
+    With a `passage_token_budget`, searches return only the passages of the
+    articles most relevant to the query (see `select_article_passages`)
+    instead of their full text. The passage index of each article is built
+    once and cached in memory by PMC ID.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path | None = DEFAULT_PUBMED_CACHE_DIR,
+        search_ttl_seconds: float = 24 * 60 * 60,
+        max_workers: int = 8,
+        timeout: float = 30,
+        eutils_url: str = EUTILS_URL,
+        bioc_url: str = BIOC_URL,
+        passage_token_budget: int | None = None,
+        max_passage_tokens: int = DEFAULT_MAX_ARTICLE_PASSAGE_TOKENS,
+        passage_embedding_weight: float = 0.0,
+    ) -> None:
+        """Initializes the client.
+
+        :param cache_dir: The directory of the on-disk cache (None to cache in memory only).
+        :param search_ttl_seconds: How long cached search results remain valid.
+        :param max_workers: The maximum number of concurrent article downloads.
+        :param timeout: The timeout of each HTTP request in seconds.
+        :param eutils_url: The base URL of the NCBI E-utilities (esearch) API.
+        :param bioc_url: The base URL of the BioC JSON article API.
+        :param passage_token_budget: The maximum number of tokens of article passages
+            returned by a search (None, the default, to return the full text of the
+            articles; e.g. SUGGESTED_PASSAGE_TOKEN_BUDGET to opt in).
+        :param max_passage_tokens: The maximum number of tokens of an article passage.
+        :param passage_embedding_weight: The weight of the local embedding similarity
+            in the ranking of passages (0 to rank with BM25 only).
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.search_ttl_seconds = search_ttl_seconds
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.eutils_url = eutils_url.rstrip("/")
+        self.bioc_url = bioc_url.rstrip("/")
+        self.passage_token_budget = passage_token_budget
+        self.max_passage_tokens = max_passage_tokens
+        self.passage_embedding_weight = passage_embedding_weight
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._memory_cache: dict[str, Any] = {}
+        self._passage_indexes: dict[tuple[str, bool], ArticlePassages] = {}
+        self._lock = threading.Lock()
+
+    def _cache_get(self, key: str, ttl_seconds: float | None = None) -> Any | None:
+        """Returns a cached value (from memory, then disk) or None if missing or expired."""
+        with self._lock:
+            entry = self._memory_cache.get(key)
+
+        if entry is None and self.cache_dir is not None:
+            try:
+                entry = json.loads((self.cache_dir / f"{key}.json").read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                entry = None
+
+        if entry is None:
+            return None
+
+        if ttl_seconds is not None and time.time() - entry["time"] > ttl_seconds:
+            return None
+
+        with self._lock:
+            self._memory_cache[key] = entry
+
+        return entry["value"]
+
+    def _cache_put(self, key: str, value: Any) -> None:
+        entry = {"time": time.time(), "value": value}
+
+        with self._lock:
+            self._memory_cache[key] = entry
+
+        if self.cache_dir is not None:
+            _write_json_atomic(self.cache_dir / f"{key}.json", entry)
+
+    def _get(self, url: str) -> requests.Response:
+        """Sends a GET request through the process-wide rate limiter ("pubmed" limits).
+
+        Rate limited (429) and failed (5xx) requests are retried with backoff.
+        """
+
+        def get() -> requests.Response:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return response
+
+        return get_rate_limiter().call(get, model="pubmed")
+
+    def search(self, query: str, retmax: int) -> list[str]:
+        """Searches PubMed Central, returning the PMC IDs of the top articles by relevance.
+
+        :param query: The search query.
+        :param retmax: The maximum number of PMC IDs to return.
+        :return: The list of PMC IDs.
+        """
+        key = "searches/" + hashlib.sha256(f"{query}\n{retmax}".encode("utf-8")).hexdigest()
+        pmcids = self._cache_get(key, ttl_seconds=self.search_ttl_seconds)
+
+        if pmcids is None:
+            search_url = (
+                f"{self.eutils_url}/esearch.fcgi?db=pmc&term={urllib.parse.quote_plus(query)}"
+                f"&retmax={retmax}&retmode=json&sort=relevance"
+            )
+            response = self._get(search_url)
+            pmcids = response.json()["esearchresult"]["idlist"]
+            self._cache_put(key, pmcids)
+
+        return pmcids
+
+    def get_article(self, pmcid: str) -> dict[str, Any] | None:
+        """Gets a parsed PubMed Central article (see `parse_bioc_article`) given a PMC ID.
+
+        Articles that are not available are cached as well (as None).
+
+        :param pmcid: The PMC ID of the article.
+        :return: The parsed article or None if the article is not found.
+        """
+        key = f"articles/PMC{pmcid}"
+        entry = self._cache_get(key)
+
+        if entry is None:
+            response = self._get(f"{self.bioc_url}/PMC{pmcid}/unicode")
+
+            try:
+                entry = {"article": parse_bioc_article(response.json())}
+            except json.JSONDecodeError:
+                entry = {"article": None}
+
+            self._cache_put(key, entry)
+
+        return entry["article"]
+
+    def get_articles(self, pmcids: list[str]) -> list[dict[str, Any] | None]:
+        """Gets multiple parsed articles concurrently, in the order of the PMC IDs.
+
+        :param pmcids: The PMC IDs of the articles.
+        :return: The parsed articles (None for articles that are not found).
+        """
+        if len(pmcids) <= 1:
+            return [self.get_article(pmcid) for pmcid in pmcids]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pmcids))) as executor:
+            return list(executor.map(self.get_article, pmcids))
+
+    def get_passage_index(
+        self, pmcid: str, abstract_only: bool = False
+    ) -> ArticlePassages | None:
+        """Gets the passage index of an article, building it on first use.
+
+        :param pmcid: The PMC ID of the article.
+        :param abstract_only: Whether to index only the abstract instead of the full text.
+        :return: The passage index or None if the article is not found.
+        """
+        # Imported here since virtual_lab.retrieval depends on virtual_lab.utils
+        from virtual_lab.retrieval import ArticlePassages
+
+        key = (pmcid, abstract_only)
+        with self._lock:
+            index = self._passage_indexes.get(key)
+
+        if index is None:
+            title, content = select_article_content(
+                self.get_article(pmcid), abstract_only=abstract_only
+            )
+
+            if title is None:
+                return None
+
+            index = ArticlePassages(pmcid, title, content, self.max_passage_tokens)
+
+            with self._lock:
+                self._passage_indexes[key] = index
+
+        return index
+
+
+_default_client: PubMedClient | None = None
+
+
+def get_pubmed_client() -> PubMedClient:
+    """Returns the process-wide PubMed client used by the PubMed search tool."""
+    global _default_client
+
+    if _default_client is None:
+        _default_client = PubMedClient()
+
+    return _default_client
+
+
+def set_pubmed_client(client: PubMedClient | None) -> None:
+    """Sets the process-wide PubMed client (None to recreate the default on next use).
+
+    :param client: The PubMed client to use.
+    """
+    global _default_client
+    _default_client = client
+
+
+class LocalPubMedServer:
+    """A local stand-in for the esearch and BioC JSON APIs, for offline tests.
+
+    Serves a fixed set of articles. Every search returns the PMC IDs in
+    `search_results[query]` if given, else all PMC IDs in order. Like the NCBI
+    servers, it keeps connections alive, and `num_connections` counts the
+    connections opened by clients (to check that they are pooled).
+
+    Example:
+        with LocalPubMedServer(articles={"123": bioc_article}) as server:
+            set_pubmed_client(server.client(cache_dir=None))
+            run_pubmed_search("nanobodies")
+    """
+
+    def __init__(
+        self,
+        articles: dict[str, list[dict[str, Any]]],
+        search_results: dict[str, list[str]] | None = None,
+        latency_seconds: float = 0.0,
+    ) -> None:
+        """Initializes the server.
+
+        :param articles: A mapping from PMC ID (without the "PMC" prefix) to BioC JSON article.
+        :param search_results: Optional mapping from query to the PMC IDs it returns.
+        :param latency_seconds: Artificial latency added to every response.
+        """
+        self.articles = articles
+        self.search_results = search_results or {}
+        self.latency_seconds = latency_seconds
+        self.num_requests = 0
+        self.num_connections = 0
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                server.num_connections += 1
+                super().setup()
+
+            def do_GET(self) -> None:
+                server.num_requests += 1
+                time.sleep(server.latency_seconds)
+
+                url = urllib.parse.urlparse(self.path)
+                params = urllib.parse.parse_qs(url.query)
+
+                if url.path.endswith("/esearch.fcgi"):
+                    query = params.get("term", [""])[0]
+                    retmax = int(params.get("retmax", ["20"])[0])
+                    pmcids = server.search_results.get(query, list(server.articles))
+                    body = json.dumps({"esearchresult": {"idlist": pmcids[:retmax]}})
+                elif url.path.startswith("/bioc/PMC"):
+                    pmcid = url.path.split("/")[2].removeprefix("PMC")
+                    article = server.articles.get(pmcid)
+                    body = (
+                        json.dumps(article)
+                        if article is not None
+                        else f"[Error] : No result can be found. <br><h3>PMC{pmcid}</h3>"
+                    )
+                else:
+                    self.send_error(404)
+                    return
+
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        """The base URL of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalPubMedServer":
+        """Starts serving on a free local port in a background thread."""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        """Stops the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def client(self, **kwargs: Any) -> PubMedClient:
+        """Returns a PubMedClient that talks to this server.
+
+        :param kwargs: Additional arguments for PubMedClient (e.g., cache_dir).
+        """
+        return PubMedClient(
+            eutils_url=f"{self.url}/entrez/eutils", bioc_url=f"{self.url}/bioc", **kwargs
+        )
+
+    def __enter__(self) -> "LocalPubMedServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
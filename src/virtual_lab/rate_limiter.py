@@ -0,0 +1,442 @@
+"""Rate limiting and retries for LLM and tool calls shared across concurrent meetings."""
+
+import asyncio
+import email.utils
+import logging
+import random
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+from virtual_lab.constants import PUBMED_REQUESTS_PER_MINUTE
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, and server errors
+_RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class _TokenBucket:
+    """A token bucket refilled at a constant rate that callers may overdraw.
+
+    Overdrawing puts the bucket in debt, and the returned wait time makes
+    concurrent callers queue up in the order of their reservations.
+    """
+
+    def __init__(self, per_minute: float, capacity: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.level = self.capacity
+        self.last_time = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes `amount` from the bucket and returns the seconds until it is covered.
+
+        A negative `amount` refunds tokens, up to the capacity of the bucket.
+        """
+        self.level = min(self.capacity, self.level + (now - self.last_time) * self.rate)
+        self.last_time = now
+        self.level = min(self.capacity, self.level - amount)
+
+        return max(0.0, -self.level / self.rate)
+
+
+def _status_code(error: BaseException) -> int | None:
+    """Returns the HTTP status of an API error (OpenAI, requests, or Google GenAI)."""
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status_code", None)
+
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code
+
+    return status
+
+
+def _loaded_error_types(module_name: str, *names: str) -> tuple[type, ...]:
+    """Returns exception classes of a module, or none if the module is not imported.
+
+    An error can only come from a package that is already imported, so the
+    classes are looked up in `sys.modules` instead of importing openai and
+    requests (which are slow to import) here.
+    """
+    module = sys.modules.get(module_name)
+
+    return tuple(getattr(module, name) for name in names) if module is not None else ()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Checks whether a failed call may succeed when retried.
+
+    :param error: The exception raised by the call.
+    :return: True for connection errors, timeouts, rate limits (429), and server errors (5xx).
+    """
+    if isinstance(
+        error,
+        _loaded_error_types("openai", "APIConnectionError")
+        + _loaded_error_types("requests", "ConnectionError", "Timeout"),
+    ):
+        return True
+
+    # Google GenAI errors are matched by module to avoid importing the optional package
+    is_api_error = isinstance(
+        error,
+        _loaded_error_types("openai", "APIStatusError")
+        + _loaded_error_types("requests", "HTTPError"),
+    )
+    if not is_api_error and not type(error).__module__.startswith("google.genai"):
+        return False
+
+    status = _status_code(error)
+
+    return status is not None and (status in _RETRYABLE_STATUS_CODES or status >= 500)
+
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """Returns the delay requested by the `retry-after-ms` / `retry-after` headers of an error.
+
+    :param error: The exception raised by the call.
+    :return: The delay in seconds or None if the error has no such header.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1000
+    except ValueError:
+        pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+
+    try:
+        return float(retry_after)
+    except ValueError:
+        # HTTP date
+        retry_time = email.utils.parsedate_to_datetime(retry_after)
+        return max(0.0, retry_time.timestamp() - time.time()) if retry_time else None
+
+
+class RateLimiter:
+    """Paces and retries LLM and tool calls across all meetings in the process.
+
+    Requests and tokens per minute are limited with token buckets per model
+    (e.g., "gpt-4.1", or "pubmed" for PubMed tool calls), so concurrent
+    meetings and threads share one budget per provider limit. Calls that fail
+    with a connection error, a rate limit (429), or a server error are retried
+    with jittered exponential backoff, waiting at least as long as the
+    provider's `retry-after` header. A 429 pauses all calls to that model for
+    the requested time, so one throttle event slows the batch down instead of
+    failing it. Each call gives up once `timeout_seconds` have passed. Retries
+    are counted in `num_retries` and logged at INFO level to the
+    "virtual_lab.rate_limiter" logger.
+
+    A single limiter can be shared by sync and async code (see
+    `get_rate_limiter` for the process-wide limiter).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        model_limits: dict[str, tuple[float | None, float | None]] | None = None,
+        max_retries: int = 6,
+        initial_backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        timeout_seconds: float | None = 600.0,
+        seed: int | None = None,
+    ) -> None:
+        """Initializes the rate limiter.
+
+        :param requests_per_minute: The default maximum number of requests started
+            per minute for each model (None for no limit).
+        :param tokens_per_minute: The default maximum number of tokens per minute
+            for each model (None for no limit).
+        :param model_limits: Per-model (requests_per_minute, tokens_per_minute)
+            limits that override the defaults.
+        :param max_retries: The maximum number of retries of a failed call.
+        :param initial_backoff_seconds: The backoff before the first retry
+            (doubled for each further retry, with full jitter).
+        :param max_backoff_seconds: The maximum backoff between retries.
+        :param timeout_seconds: The deadline of a call including waits and
+            retries (None for no deadline).
+        :param seed: The random seed of the backoff jitter.
+        """
+        for limit in (requests_per_minute, tokens_per_minute):
+            if limit is not None and limit <= 0:
+                raise ValueError("Rate limits must be positive.")
+
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.model_limits = dict(model_limits or {})
+        self.max_retries = max_retries
+        self.initial_backoff_seconds = initial_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.num_retries = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets: dict[tuple[str, str], _TokenBucket | None] = {}
+        self._paused_until: dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Pacing
+    # ------------------------------------------------------------------
+
+    def _bucket(self, model: str, kind: str) -> _TokenBucket | None:
+        if (model, kind) not in self._buckets:
+            requests_limit, tokens_limit = self.model_limits.get(
+                model, (self.requests_per_minute, self.tokens_per_minute)
+            )
+            if kind == "requests":
+                # Space requests out evenly, allowing bursts of one second's worth
+                bucket = (
+                    _TokenBucket(requests_limit, capacity=max(requests_limit / 60, 1.0))
+                    if requests_limit is not None
+                    else None
+                )
+            else:
+                # Providers count tokens per minute, so a full minute's worth may burst
+                bucket = (
+                    _TokenBucket(tokens_limit, capacity=tokens_limit)
+                    if tokens_limit is not None
+                    else None
+                )
+
+            self._buckets[(model, kind)] = bucket
+
+        return self._buckets[(model, kind)]
+
+    def reserve(self, model: str = "default", tokens: int = 0) -> float:
+        """Reserves a request (and its estimated tokens) and returns how long to wait.
+
+        :param model: The model (or tool) of the call.
+        :param tokens: The estimated number of tokens of the call.
+        :return: The number of seconds to wait before starting the call.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until.get(model, 0.0) - now)
+
+            request_bucket = self._bucket(model, "requests")
+            if request_bucket is not None:
+                wait = max(wait, request_bucket.reserve(1, now))
+
+            token_bucket = self._bucket(model, "tokens")
+            if token_bucket is not None and tokens:
+                wait = max(wait, token_bucket.reserve(tokens, now))
+
+        return wait
+
+    def record_tokens(self, model: str, tokens: int) -> None:
+        """Charges (or refunds, if negative) tokens once the actual usage of a call is known.
+
+        :param model: The model of the call.
+        :param tokens: The actual minus the estimated number of tokens.
+        """
+        with self._lock:
+            token_bucket = self._bucket(model, "tokens")
+            if token_bucket is not None:
+                token_bucket.reserve(tokens, time.monotonic())
+
+    def pause(self, model: str, seconds: float) -> None:
+        """Holds back all calls to a model (e.g., after a 429 with a `retry-after` header).
+
+        :param model: The model to pause.
+        :param seconds: The length of the pause.
+        """
+        with self._lock:
+            self._paused_until[model] = max(
+                self._paused_until.get(model, 0.0), time.monotonic() + seconds
+            )
+
+    def acquire_sync(self, model: str = "default", tokens: int = 0) -> float:
+        """Blocks until a call is allowed to start.
+
+        :param model: The model (or tool) of the call.
+        :param tokens: The estimated number of tokens of the call.
+        :return: The number of seconds waited.
+        """
+        wait = self.reserve(model, tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
+
+    async def acquire(self, model: str = "default", tokens: int = 0) -> float:
+        """Waits until a call is allowed to start.
+
+        :param model: The model (or tool) of the call.
+        :param tokens: The estimated number of tokens of the call.
+        :return: The number of seconds waited.
+        """
+        wait = self.reserve(model, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        return wait
+
+    # ------------------------------------------------------------------
+    # Retries
+    # ------------------------------------------------------------------
+
+    def _retry_delay(
+        self, error: BaseException, model: str, attempt: int, start_time: float
+    ) -> float:
+        """Returns the backoff before retrying a failed call, or re-raises the error."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            raise error
+
+        with self._lock:
+            delay = self._rng.uniform(
+                0, min(self.max_backoff_seconds, self.initial_backoff_seconds * 2**attempt)
+            )
+
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        if _status_code(error) == 429:
+            self.pause(model, delay)
+
+        if (
+            self.timeout_seconds is not None
+            and time.monotonic() + delay - start_time > self.timeout_seconds
+        ):
+            raise error
+
+        with self._lock:
+            self.num_retries += 1
+
+        logger.info(
+            "Retrying %s call in %.1fs after %s (retry %d/%d)",
+            model,
+            delay,
+            type(error).__name__,
+            attempt + 1,
+            self.max_retries,
+        )
+
+        return delay
+
+    def _check_deadline(self, model: str, start_time: float) -> None:
+        if (
+            self.timeout_seconds is not None
+            and time.monotonic() - start_time > self.timeout_seconds
+        ):
+            raise TimeoutError(
+                f"Call to {model} did not complete within {self.timeout_seconds:g}s."
+            )
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        model: str = "default",
+        tokens: int = 0,
+        stats: dict[str, Any] | None = None,
+    ) -> T:
+        """Runs a call once it is allowed to start, retrying it if it fails transiently.
+
+        :param fn: The call to run.
+        :param model: The model (or tool) of the call.
+        :param tokens: The estimated number of tokens of the call (reserved
+            once, not again for each retry).
+        :param stats: Optional dictionary that is updated in place with the
+            number of "retries" and the "wait_seconds" spent rate limited.
+        :return: The result of the call.
+        """
+        start_time = time.monotonic()
+        stats = stats if stats is not None else {}
+        stats.setdefault("retries", 0)
+        stats.setdefault("wait_seconds", 0.0)
+
+        for attempt in range(self.max_retries + 1):
+            # The tokens are reserved once per call (the caller then charges or
+            # refunds the difference to the actual usage), so retries only
+            # take a request
+            stats["wait_seconds"] += self.acquire_sync(model, tokens if attempt == 0 else 0)
+            self._check_deadline(model, start_time)
+
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._retry_delay(e, model, attempt, start_time)
+
+            stats["retries"] += 1
+            time.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+    async def acall(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        model: str = "default",
+        tokens: int = 0,
+        stats: dict[str, Any] | None = None,
+    ) -> T:
+        """Async version of `call`.
+
+        :param fn: A function returning the awaitable call to run.
+        :param model: The model (or tool) of the call.
+        :param tokens: The estimated number of tokens of the call.
+        :param stats: Optional dictionary that is updated in place with the
+            number of "retries" and the "wait_seconds" spent rate limited.
+        :return: The result of the call.
+        """
+        start_time = time.monotonic()
+        stats = stats if stats is not None else {}
+        stats.setdefault("retries", 0)
+        stats.setdefault("wait_seconds", 0.0)
+
+        for attempt in range(self.max_retries + 1):
+            stats["wait_seconds"] += await self.acquire(model, tokens if attempt == 0 else 0)
+            self._check_deadline(model, start_time)
+
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self._retry_delay(e, model, attempt, start_time)
+
+            stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+
+_default_limiter: RateLimiter | None = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the process-wide rate limiter used for LLM and tool calls by default.
+
+    It retries transient failures and limits PubMed tool calls to NCBI's rate
+    limit; use `set_rate_limiter` to add per-model request or token limits.
+    """
+    global _default_limiter
+
+    # Threads of concurrent meetings must share one limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter(
+                model_limits={"pubmed": (PUBMED_REQUESTS_PER_MINUTE, None)}
+            )
+
+        return _default_limiter
+
+
+def set_rate_limiter(limiter: RateLimiter | None) -> None:
+    """Replaces the process-wide rate limiter (None restores the default).
+
+    :param limiter: The rate limiter to use.
+    """
+    global _default_limiter
+
+    with _default_limiter_lock:
+        _default_limiter = limiter
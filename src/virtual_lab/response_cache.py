@@ -0,0 +1,333 @@
+"""Content-addressed on-disk cache of chat completions for re-runs and offline replay."""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletion
+from openai.types.responses import Response
+
+
+class ResponseCache:
+    """An on-disk cache of chat completions keyed by a hash of the request.
+
+    Each completion (or Responses API response) is stored as `<sha256>.json`
+    in `cache_dir`. The key covers the model, temperature, messages, and tools
+    (and any other request parameters), so a cached completion is only
+    returned for an identical request. When the cache grows beyond
+    `max_size_bytes`, the least recently used entries are evicted (checked
+    every `evict_every` writes, or on demand with `evict`).
+
+    In replay-only mode, the cache never calls the API and a cache miss (or an
+    uncached request, such as a streamed one) raises an error, which allows
+    fully offline re-runs of a meeting.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_size_bytes: int | None = 1024**3,
+        replay_only: bool = False,
+        evict_every: int | None = 100,
+    ) -> None:
+        """Initializes the cache.
+
+        :param cache_dir: The directory in which cached completions are stored.
+        :param max_size_bytes: The maximum total size of the cache (None for no limit).
+        :param replay_only: Whether to raise an error on a cache miss instead of calling the API.
+        :param evict_every: The number of writes between evictions, which scan the
+            whole cache directory (None to only evict when `evict` is called).
+        """
+        if evict_every is not None and evict_every < 1:
+            raise ValueError("evict_every must be at least 1.")
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_bytes
+        self.replay_only = replay_only
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._num_writes = 0
+
+    @staticmethod
+    def request_key(request: dict[str, Any], namespace: str | None = None) -> str:
+        """Returns the content hash of a completion request.
+
+        :param request: The keyword arguments of `chat.completions.create`.
+        :param namespace: Optional namespace of the request (e.g., the save name of
+            one of several independent runs of a meeting), so that identical
+            requests in different namespaces get different completions.
+        :return: The hex SHA-256 digest of the canonical JSON form of the request.
+        """
+        canonical = json.dumps(
+            request, sort_keys=True, separators=(",", ":"), default=str
+        )
+        if namespace is not None:
+            canonical = f"{namespace}\n{canonical}"
+
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(
+        self,
+        request: dict[str, Any],
+        response_type: type[ChatCompletion] | type[Response] = ChatCompletion,
+        namespace: str | None = None,
+    ) -> ChatCompletion | Response | None:
+        """Returns the cached completion of a request, or None on a cache miss.
+
+        :param request: The keyword arguments of `chat.completions.create` (or `responses.create`).
+        :param response_type: The type of the cached completion.
+        :param namespace: Optional namespace of the request (see `request_key`).
+        :return: The cached completion or None.
+        """
+        path = self._path(self.request_key(request, namespace))
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            self.check_uncached(request, reason=f"Cache miss (key {path.stem})")
+
+            return None
+
+        # Mark as recently used for eviction
+        os.utime(path)
+        self.hits += 1
+
+        # Built without validation, as the SDK does, since providers may leave out fields
+        return response_type.construct(**data)
+
+    def check_uncached(
+        self, request: dict[str, Any], reason: str = "Uncached request"
+    ) -> None:
+        """Raises a ValueError in replay-only mode, where a request that is not
+        served from the cache cannot be sent to the API.
+
+        :param request: The keyword arguments of `chat.completions.create` (or `responses.create`).
+        :param reason: Why the request is not served from the cache.
+        """
+        if self.replay_only:
+            raise ValueError(
+                f"{reason} in replay-only mode for model {request.get('model')!r}"
+            )
+
+    def put(
+        self,
+        request: dict[str, Any],
+        completion: ChatCompletion | Response,
+        namespace: str | None = None,
+    ) -> None:
+        """Stores the completion of a request and evicts old entries every `evict_every` writes.
+
+        :param request: The keyword arguments of `chat.completions.create` (or `responses.create`).
+        :param completion: The completion returned by the API.
+        :param namespace: Optional namespace of the request (see `request_key`).
+        """
+        path = self._path(self.request_key(request, namespace))
+
+        # Write atomically (with a unique temporary file, since concurrent
+        # meetings may store the same request) so no run sees a partial entry
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.cache_dir, suffix=".tmp", delete=False, encoding="utf-8"
+        ) as file:
+            file.write(completion.model_dump_json())
+
+        os.replace(file.name, path)
+
+        self._num_writes += 1
+        if self.evict_every is not None and self._num_writes % self.evict_every == 0:
+            self.evict()
+
+    def size_bytes(self) -> int:
+        """Returns the total size of the cached completions in bytes."""
+        return sum(path.stat().st_size for path in self.cache_dir.glob("*.json"))
+
+    def evict(self) -> None:
+        """Deletes the least recently used entries until the cache fits in `max_size_bytes`."""
+        if self.max_size_bytes is None:
+            return
+
+        entries = [(path, path.stat()) for path in self.cache_dir.glob("*.json")]
+        total_size = sum(stat.st_size for _, stat in entries)
+
+        for path, stat in sorted(entries, key=lambda entry: entry[1].st_mtime):
+            if total_size <= self.max_size_bytes:
+                break
+
+            path.unlink(missing_ok=True)
+            total_size -= stat.st_size
+
+    def clear(self) -> None:
+        """Deletes all cached completions."""
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+class _CachedCompletions:
+    def __init__(
+        self, client: OpenAI | None, cache: ResponseCache, namespace: str | None
+    ) -> None:
+        self._client = client
+        self._cache = cache
+        self._namespace = namespace
+
+    def create(self, **kwargs: Any) -> ChatCompletion:
+        # Streamed responses are passed through uncached
+        if kwargs.get("stream"):
+            self._cache.check_uncached(kwargs, reason="Streamed request")
+            return self._client.chat.completions.create(**kwargs)
+
+        completion = self._cache.get(kwargs, namespace=self._namespace)
+        if completion is None:
+            completion = self._client.chat.completions.create(**kwargs)
+            self._cache.put(kwargs, completion, namespace=self._namespace)
+
+        return completion
+
+
+class _AsyncCachedCompletions:
+    def __init__(
+        self, client: AsyncOpenAI | None, cache: ResponseCache, namespace: str | None
+    ) -> None:
+        self._client = client
+        self._cache = cache
+        self._namespace = namespace
+
+    async def create(self, **kwargs: Any) -> ChatCompletion:
+        if kwargs.get("stream"):
+            self._cache.check_uncached(kwargs, reason="Streamed request")
+            return await self._client.chat.completions.create(**kwargs)
+
+        completion = self._cache.get(kwargs, namespace=self._namespace)
+        if completion is None:
+            completion = await self._client.chat.completions.create(**kwargs)
+            self._cache.put(kwargs, completion, namespace=self._namespace)
+
+        return completion
+
+
+class _CachedResponses:
+    def __init__(
+        self, client: OpenAI | None, cache: ResponseCache, namespace: str | None
+    ) -> None:
+        self._client = client
+        self._cache = cache
+        self._namespace = namespace
+
+    def create(self, **kwargs: Any) -> Response:
+        # Stored conversations depend on server-side state, so they are passed through uncached
+        if kwargs.get("store") or kwargs.get("previous_response_id"):
+            self._cache.check_uncached(kwargs, reason="Stored request")
+            return self._client.responses.create(**kwargs)
+
+        response = self._cache.get(kwargs, Response, namespace=self._namespace)
+        if response is None:
+            response = self._client.responses.create(**kwargs)
+            self._cache.put(kwargs, response, namespace=self._namespace)
+
+        return response
+
+
+class _AsyncCachedResponses:
+    def __init__(
+        self, client: AsyncOpenAI | None, cache: ResponseCache, namespace: str | None
+    ) -> None:
+        self._client = client
+        self._cache = cache
+        self._namespace = namespace
+
+    async def create(self, **kwargs: Any) -> Response:
+        if kwargs.get("store") or kwargs.get("previous_response_id"):
+            self._cache.check_uncached(kwargs, reason="Stored request")
+            return await self._client.responses.create(**kwargs)
+
+        response = self._cache.get(kwargs, Response, namespace=self._namespace)
+        if response is None:
+            response = await self._client.responses.create(**kwargs)
+            self._cache.put(kwargs, response, namespace=self._namespace)
+
+        return response
+
+
+class _Chat:
+    def __init__(self, completions: _CachedCompletions | _AsyncCachedCompletions) -> None:
+        self.completions = completions
+
+
+class CachedOpenAI:
+    """Wraps an `OpenAI` client so that its completions go through a ResponseCache.
+
+    `chat.completions.create` and (unless stored) `responses.create` are cached.
+    All other attributes are forwarded to the wrapped client. In replay-only mode,
+    the wrapped client may be None since the API is never called.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        client: OpenAI | None = None,
+        namespace: str | None = None,
+    ) -> None:
+        """Initializes the cached client.
+
+        :param cache: The response cache.
+        :param client: The client to call on a cache miss (created if None and not replay-only).
+        :param namespace: Optional namespace of the cached requests (see
+            `ResponseCache.request_key`).
+        """
+        if client is None and not cache.replay_only:
+            client = OpenAI()
+
+        self.cache = cache
+        self._client = client
+        self.chat = _Chat(_CachedCompletions(client, cache, namespace))
+
+        # Clients without the Responses API (e.g., Google GenAI) do not get one
+        if client is None or hasattr(client, "responses"):
+            self.responses = _CachedResponses(client, cache, namespace)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+class AsyncCachedOpenAI:
+    """Wraps an `AsyncOpenAI` client so that its completions go through a ResponseCache.
+
+    `chat.completions.create` and (unless stored) `responses.create` are cached.
+    All other attributes are forwarded to the wrapped client. In replay-only mode,
+    the wrapped client may be None since the API is never called.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        client: AsyncOpenAI | None = None,
+        namespace: str | None = None,
+    ) -> None:
+        """Initializes the cached client.
+
+        :param cache: The response cache.
+        :param client: The client to call on a cache miss (created if None and not replay-only).
+        :param namespace: Optional namespace of the cached requests (see
+            `ResponseCache.request_key`).
+        """
+        if client is None and not cache.replay_only:
+            client = AsyncOpenAI()
+
+        self.cache = cache
+        self._client = client
+        self.chat = _Chat(_AsyncCachedCompletions(client, cache, namespace))
+
+        if client is None or hasattr(client, "responses"):
+            self.responses = _AsyncCachedResponses(client, cache, namespace)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
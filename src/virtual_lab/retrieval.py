@@ -0,0 +1,602 @@
+"""Local retrieval indexes: passages of past meetings and of PubMed Central articles."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from virtual_lab.archive import _is_discussion
+from virtual_lab.utils import count_tokens
+
+
+# The maximum number of tokens of a passage (longer turns are split by paragraph)
+DEFAULT_MAX_PASSAGE_TOKENS = 300
+
+# The number of dimensions of the hashed n-gram embeddings
+EMBEDDING_DIMENSIONS = 1024
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Common words that carry no meaning for retrieval
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "their this to was we were will with which you your our not can should".split()
+)
+
+
+def terms(text: str) -> list[str]:
+    """Returns the lowercase words of a text without stopwords (the terms of BM25).
+
+    :param text: The text.
+    :return: The terms in order.
+    """
+    return [word for word in _WORD_PATTERN.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def embed(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> dict[int, float]:
+    """Returns a lightweight embedding of a text: L2-normalized hashed word and trigram counts.
+
+    Character trigrams match related word forms (e.g., "binding" and "binder")
+    that the exact terms of BM25 miss. The embedding is sparse (dimension ->
+    weight) and deterministic across processes.
+
+    :param text: The text.
+    :param dimensions: The number of hash buckets.
+    :return: The sparse embedding.
+    """
+    features: Counter[int] = Counter()
+
+    for word in terms(text):
+        features[zlib.crc32(word.encode("utf-8")) % dimensions] += 1
+
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            features[zlib.crc32(padded[i:i + 3].encode("utf-8")) % dimensions] += 0.5
+
+    norm = math.sqrt(sum(weight * weight for weight in features.values()))
+
+    return {dimension: weight / norm for dimension, weight in features.items()} if norm else {}
+
+
+def cosine_similarity(a: dict[int, float], b: dict[int, float]) -> float:
+    """Returns the cosine similarity of two normalized sparse embeddings."""
+    if len(a) > len(b):
+        a, b = b, a
+
+    return sum(weight * b.get(dimension, 0.0) for dimension, weight in a.items())
+
+
+class BM25:
+    """Okapi BM25 ranking of a fixed list of documents, given by their terms."""
+
+    def __init__(self, documents: list[list[str]], k1: float = 1.5, b: float = 0.75) -> None:
+        """Indexes the documents.
+
+        :param documents: The terms of each document (see `terms`).
+        :param k1: The term frequency saturation.
+        :param b: The document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self.term_frequencies = [Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.average_length = sum(self.lengths) / len(documents) if documents else 0.0
+
+        document_frequencies: Counter[str] = Counter()
+        for frequencies in self.term_frequencies:
+            document_frequencies.update(frequencies.keys())
+
+        self.idf = {
+            term: math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequencies.items()
+        }
+
+    def scores(self, query_terms: list[str]) -> list[float]:
+        """Returns the BM25 score of every document for a query.
+
+        :param query_terms: The terms of the query.
+        :return: The scores in document order.
+        """
+        query_terms = [term for term in set(query_terms) if term in self.idf]
+        scores = []
+
+        for frequencies, length in zip(self.term_frequencies, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+
+            for term in query_terms:
+                frequency = frequencies.get(term)
+                if frequency:
+                    score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+
+            scores.append(score)
+
+        return scores
+
+
+@dataclass
+class Passage:
+    """A retrievable piece of a past meeting.
+
+    Attributes:
+        source: The path of the file it comes from.
+        title: The name of the meeting or phase.
+        agent: The agent who said it (None for alzkb phase summaries).
+        text: The text of the passage.
+        token_count: The number of tokens of the text.
+    """
+    source: str
+    title: str
+    agent: str | None
+    text: str
+    token_count: int
+
+    def format(self) -> str:
+        """Returns the passage with its origin, as a context string for a meeting."""
+        origin = f"{self.title}, {self.agent}" if self.agent else self.title
+
+        return f"[{origin}] {self.text}"
+
+
+def split_passages(text: str, max_tokens: int = DEFAULT_MAX_PASSAGE_TOKENS) -> list[str]:
+    """Splits a text into passages of whole paragraphs of at most about `max_tokens`.
+
+    A single paragraph that is longer than `max_tokens` is kept whole.
+
+    :param text: The text.
+    :param max_tokens: The maximum number of tokens of a passage.
+    :return: The passages.
+    """
+    passages: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        paragraph_tokens = count_tokens(paragraph)
+        if current and current_tokens + paragraph_tokens > max_tokens:
+            passages.append("\n\n".join(current))
+            current, current_tokens = [], 0
+
+        current.append(paragraph)
+        current_tokens += paragraph_tokens
+
+    if current:
+        passages.append("\n\n".join(current))
+
+    return passages
+
+
+def _is_phase_summary(data: object) -> bool:
+    """Checks whether parsed JSON looks like an alzkb `MeetingContext` phase file."""
+    return isinstance(data, dict) and "summary_text" in data
+
+
+def _phase_texts(data: dict[str, Any]) -> list[str]:
+    """Returns the narrative summary and structured parts of an alzkb phase file."""
+    structured = data.get("summary_structured") or {}
+    texts = [data["summary_text"] or ""]
+
+    if structured.get("key_context"):
+        texts.append(str(structured["key_context"]))
+    if structured.get("decisions"):
+        decisions = structured["decisions"]
+        texts.append(
+            "Key decisions:\n"
+            + "\n".join(f"{i}. {decision}" for i, decision in enumerate(decisions, 1))
+        )
+    if structured.get("action_items"):
+        texts.append(
+            "Action items:\n" + "\n".join(f"- {item}" for item in structured["action_items"])
+        )
+    if structured.get("status"):
+        texts.append(f"Status: {structured['status']}")
+
+    return texts
+
+
+def file_passages(
+    path: Path, max_passage_tokens: int = DEFAULT_MAX_PASSAGE_TOKENS
+) -> list[Passage]:
+    """Splits a saved discussion or alzkb phase file into passages.
+
+    The turns of a discussion (except the "User" header, which only repeats
+    the agenda and earlier context) are split by paragraph. Files that are
+    neither are ignored.
+
+    :param path: The path of a discussion JSON file (as saved by `save_meeting`)
+        or an alzkb `{phase}_summary.json` file (as saved by `MeetingContext`).
+    :param max_passage_tokens: The maximum number of tokens of a passage.
+    :return: The passages of the file.
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return []
+
+    if _is_discussion(data):
+        title = path.stem
+        pieces = [(turn["agent"], turn["message"]) for turn in data if turn["agent"] != "User"]
+    elif _is_phase_summary(data):
+        title = path.parent.name if path.stem.endswith("_summary") else path.stem
+        pieces = [(None, text) for text in _phase_texts(data)]
+    else:
+        return []
+
+    return [
+        Passage(
+            source=str(path),
+            title=title,
+            agent=agent,
+            text=text,
+            token_count=count_tokens(text),
+        )
+        for agent, message in pieces
+        for text in split_passages(message, max_passage_tokens)
+    ]
+
+
+class RetrievalIndex:
+    """A full-text (BM25) plus hashed n-gram embedding index over passages of past meetings.
+
+    Example:
+        index = RetrievalIndex.from_directories(
+            [Path("discussions")], index_path=Path("retrieval_index.json")
+        )
+        contexts = index.select_contexts(agenda, top_k=8, token_budget=2000)
+
+    Passages are scored by their BM25 score (normalized by the best score)
+    plus `embedding_weight` times the cosine similarity of their embeddings,
+    so passages that share rare terms with the query rank first and passages
+    that only use related word forms still rank above unrelated ones.
+    """
+
+    def __init__(self, passages: Iterable[Passage] = (), embedding_weight: float = 0.5) -> None:
+        """Initializes the index.
+
+        :param passages: The passages to index.
+        :param embedding_weight: The weight of the embedding similarity relative to BM25.
+        """
+        self.embedding_weight = embedding_weight
+        self.passages: list[Passage] = []
+        self.files: dict[str, dict[str, Any]] = {}
+        self._bm25: BM25 | None = None
+        self._embeddings: list[dict[int, float]] = []
+        self.add_passages(passages)
+
+    def add_passages(self, passages: Iterable[Passage]) -> None:
+        """Adds passages to the index.
+
+        :param passages: The passages to add.
+        """
+        self.passages.extend(passages)
+        self._bm25 = None
+
+    def add_directory(
+        self,
+        directory: Path,
+        pattern: str = "**/*.json",
+        max_passage_tokens: int = DEFAULT_MAX_PASSAGE_TOKENS,
+    ) -> int:
+        """Indexes the saved discussions and alzkb phase files of a directory.
+
+        Files indexed before with the same modification time are not read again.
+
+        :param directory: The directory.
+        :param pattern: Glob pattern of the files within the directory.
+        :param max_passage_tokens: The maximum number of tokens of a passage.
+        :return: The number of files that were (re)indexed.
+        """
+        num_indexed = 0
+
+        for path in sorted(directory.glob(pattern)):
+            key = str(path)
+            mtime = os.path.getmtime(path)
+
+            if key in self.files and self.files[key]["mtime"] == mtime:
+                continue
+
+            self.passages = [passage for passage in self.passages if passage.source != key]
+            passages = file_passages(path, max_passage_tokens)
+            self.files[key] = {"mtime": mtime}
+            self.add_passages(passages)
+            num_indexed += 1
+
+        return num_indexed
+
+    def fingerprint(self) -> str:
+        """Returns a hash of the passages and settings of the index (stable across runs)."""
+        digest = hashlib.sha256(repr(self.embedding_weight).encode("utf-8"))
+
+        for passage in self.passages:
+            digest.update(
+                json.dumps(
+                    [passage.source, passage.title, passage.agent, passage.text]
+                ).encode("utf-8")
+            )
+
+        return digest.hexdigest()
+
+    def _build(self) -> BM25:
+        """Builds the BM25 index and the embeddings of the passages (after changes)."""
+        if self._bm25 is None:
+            self._bm25 = BM25([terms(passage.text) for passage in self.passages])
+            self._embeddings = [embed(passage.text) for passage in self.passages]
+
+        return self._bm25
+
+    def search(self, query: str, top_k: int = 8) -> list[tuple[Passage, float]]:
+        """Returns the passages most relevant to a query, best first.
+
+        :param query: The query (e.g., the agenda of a meeting).
+        :param top_k: The maximum number of passages.
+        :return: The passages and their scores.
+        """
+        bm25 = self._build()
+        bm25_scores = bm25.scores(terms(query))
+        max_bm25 = max(bm25_scores, default=0.0) or 1.0
+        query_embedding = embed(query)
+
+        scored = [
+            (
+                passage,
+                bm25_score / max_bm25
+                + self.embedding_weight * cosine_similarity(query_embedding, embedding),
+            )
+            for passage, bm25_score, embedding in zip(
+                self.passages, bm25_scores, self._embeddings
+            )
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+
+        return [(passage, score) for passage, score in scored[:top_k] if score > 0]
+
+    def select(self, query: str, top_k: int = 8, token_budget: int = 2000) -> list[Passage]:
+        """Returns the most relevant passages that fit in a token budget.
+
+        Passages are taken best first while they fit (a passage that does not
+        fit is skipped in favor of shorter, lower-ranked ones).
+
+        :param query: The query (e.g., the agenda of a meeting).
+        :param top_k: The maximum number of passages.
+        :param token_budget: The maximum total number of tokens of the passages.
+        :return: The selected passages, best first.
+        """
+        selected: list[Passage] = []
+        seen_texts: set[str] = set()
+        num_tokens = 0
+
+        for passage, _ in self.search(query, top_k=len(self.passages)):
+            if len(selected) == top_k:
+                break
+
+            # The same text may come from copies of a meeting
+            if passage.text in seen_texts or num_tokens + passage.token_count > token_budget:
+                continue
+
+            selected.append(passage)
+            seen_texts.add(passage.text)
+            num_tokens += passage.token_count
+
+        return selected
+
+    def select_contexts(
+        self, query: str, top_k: int = 8, token_budget: int = 2000
+    ) -> tuple[str, ...]:
+        """Returns the formatted passages of `select`, to pass as a meeting's `contexts`.
+
+        :param query: The query (e.g., the agenda of a meeting).
+        :param top_k: The maximum number of passages.
+        :param token_budget: The maximum total number of tokens of the passages.
+        :return: The context strings.
+        """
+        return tuple(passage.format() for passage in self.select(query, top_k, token_budget))
+
+    def save(self, path: Path) -> None:
+        """Saves the passages and the modification times of the indexed files.
+
+        :param path: The path of the JSON index file.
+        """
+        data = {
+            "files": self.files,
+            "passages": [asdict(passage) for passage in self.passages],
+        }
+        tmp_path = path.with_suffix(".json.tmp")
+
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, embedding_weight: float = 0.5) -> RetrievalIndex:
+        """Loads an index saved by `save`.
+
+        :param path: The path of the JSON index file.
+        :param embedding_weight: The weight of the embedding similarity relative to BM25.
+        :return: The index.
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        index = cls(
+            (Passage(**passage) for passage in data["passages"]),
+            embedding_weight=embedding_weight,
+        )
+        index.files = data["files"]
+
+        return index
+
+    @classmethod
+    def from_directories(
+        cls,
+        directories: Iterable[Path],
+        index_path: Path | None = None,
+        pattern: str = "**/*.json",
+        embedding_weight: float = 0.5,
+    ) -> RetrievalIndex:
+        """Indexes the saved discussions and alzkb phase files of directories.
+
+        :param directories: The directories of saved discussions and/or alzkb phase files.
+        :param index_path: Optional path of a JSON index file. It is loaded if it
+            exists, only new and changed files are indexed, and it is saved again.
+        :param pattern: Glob pattern of the files within the directories.
+        :param embedding_weight: The weight of the embedding similarity relative to BM25.
+        :return: The index.
+        """
+        if index_path is not None and index_path.exists():
+            index = cls.load(index_path, embedding_weight=embedding_weight)
+        else:
+            index = cls(embedding_weight=embedding_weight)
+
+        num_indexed = sum(index.add_directory(directory, pattern) for directory in directories)
+
+        if index_path is not None and num_indexed > 0:
+            index.save(index_path)
+
+        return index
+
+
+@dataclass
+class ContextRetrieval:
+    """Settings to give a meeting the passages of past meetings most relevant to its agenda.
+
+    Attributes:
+        index: The retrieval index over past meetings.
+        top_k: The maximum number of passages.
+        token_budget: The maximum total number of tokens of the passages.
+    """
+    index: RetrievalIndex
+    top_k: int = 8
+    token_budget: int = 2000
+
+    def contexts(self, query: str) -> tuple[str, ...]:
+        """Returns the formatted passages relevant to a query.
+
+        :param query: The agenda (and agenda questions) of the meeting.
+        :return: The context strings.
+        """
+        passages = self.index.select(query, top_k=self.top_k, token_budget=self.token_budget)
+
+        print(
+            f"Retrieved {len(passages):,} passages "
+            f"({sum(passage.token_count for passage in passages):,} tokens) from past meetings"
+        )
+
+        return tuple(passage.format() for passage in passages)
+
+
+class ArticlePassages:
+    """The passages of a PubMed Central article, indexed for ranking against queries.
+
+    Built once per article (see `PubMedClient.get_passage_index`) and reused
+    by every search that returns the article.
+    """
+
+    def __init__(
+        self,
+        pmcid: str,
+        title: str,
+        content: list[str],
+        max_passage_tokens: int = DEFAULT_MAX_PASSAGE_TOKENS,
+    ) -> None:
+        """Splits the article into passages and indexes them.
+
+        :param pmcid: The PMC ID of the article.
+        :param title: The title of the article.
+        :param content: The paragraphs of the article (see `select_article_content`).
+        :param max_passage_tokens: The maximum number of tokens of a passage.
+        """
+        self.pmcid = pmcid
+        self.title = title
+        self.passages = split_passages("\n\n".join(content), max_passage_tokens)
+        self.token_counts = [count_tokens(passage) for passage in self.passages]
+        self.bm25 = BM25([terms(passage) for passage in self.passages])
+        self._embeddings: list[dict[int, float]] | None = None
+
+    def scores(
+        self, query_terms: list[str], query_embedding: dict[int, float] | None = None
+    ) -> tuple[list[float], list[float]]:
+        """Returns the BM25 scores and, given a query embedding, the cosine similarities.
+
+        :param query_terms: The terms of the query.
+        :param query_embedding: The embedding of the query (None to skip embeddings).
+        :return: The BM25 scores and the cosine similarities (zeros without a query
+            embedding) of the passages, in document order.
+        """
+        if query_embedding is None:
+            return self.bm25.scores(query_terms), [0.0] * len(self.passages)
+
+        # Embeddings are only computed for searches that use them
+        if self._embeddings is None:
+            self._embeddings = [embed(passage) for passage in self.passages]
+
+        return self.bm25.scores(query_terms), [
+            cosine_similarity(query_embedding, embedding) for embedding in self._embeddings
+        ]
+
+
+def select_article_passages(
+    query: str,
+    articles: list[ArticlePassages],
+    token_budget: int,
+    embedding_weight: float = 0.0,
+) -> list[list[str]]:
+    """Selects the passages of articles most relevant to a query within a token budget.
+
+    Passages of all articles are ranked together (BM25 normalized by the best
+    score, plus `embedding_weight` times the cosine similarity) and taken
+    best first while they fit.
+
+    :param query: The search query.
+    :param articles: The indexed articles.
+    :param token_budget: The maximum total number of tokens of the passages.
+    :param embedding_weight: The weight of the embedding similarity (0 for BM25 only).
+    :return: The selected passages of each article, in document order.
+    """
+    query_terms = terms(query)
+    query_embedding = embed(query) if embedding_weight > 0 else None
+
+    # Score the passages of all articles
+    scored = []
+    max_bm25 = 0.0
+    for article_index, article in enumerate(articles):
+        bm25_scores, similarities = article.scores(query_terms, query_embedding)
+        max_bm25 = max(max_bm25, *bm25_scores, 0.0)
+
+        for passage_index, (bm25_score, similarity) in enumerate(
+            zip(bm25_scores, similarities)
+        ):
+            scored.append((bm25_score, similarity, article_index, passage_index))
+
+    max_bm25 = max_bm25 or 1.0
+    scored.sort(
+        key=lambda item: item[0] / max_bm25 + embedding_weight * item[1], reverse=True
+    )
+
+    # Take the best passages that fit in the budget
+    selected: list[set[int]] = [set() for _ in articles]
+    num_tokens = 0
+    for _, _, article_index, passage_index in scored:
+        passage_tokens = articles[article_index].token_counts[passage_index]
+
+        if num_tokens + passage_tokens <= token_budget:
+            selected[article_index].add(passage_index)
+            num_tokens += passage_tokens
+
+    return [
+        [article.passages[index] for index in sorted(indices)]
+        for article, indices in zip(articles, selected)
+    ]
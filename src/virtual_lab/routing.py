@@ -0,0 +1,206 @@
+"""Per-agent and per-phase model routing with cost and token budgets."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Literal
+
+from virtual_lab.constants import (
+    MODEL_TO_CACHED_INPUT_PRICE_PER_TOKEN,
+    MODEL_TO_DOWNGRADE_MODEL,
+    MODEL_TO_INPUT_PRICE_PER_TOKEN,
+    MODEL_TO_OUTPUT_PRICE_PER_TOKEN,
+)
+
+
+# The phase of a meeting in which a completion is requested
+Phase = Literal[
+    "answer",  # individual meeting: the agent's answer in each round
+    "critique",  # individual meeting: the critic's feedback
+    "revision",  # individual meeting: the agent's revised answer
+    "discussion",  # team meeting: a turn in a discussion round
+    "summary",  # team meeting: the team lead's final summary
+    "context_summary",  # summarization of older turns (see DiscussionContext)
+]
+
+
+def usage_cost(model: str, usage: dict[str, int]) -> float | None:
+    """Returns the approximate USD cost of a usage (None if the model has no pricing).
+
+    Cached input tokens are billed at the cached-input price when it is known.
+
+    :param model: The name of the model.
+    :param usage: The "input", "output", and (optionally) "cached" token counts.
+    :return: The cost in USD or None.
+    """
+    input_price = MODEL_TO_INPUT_PRICE_PER_TOKEN.get(model)
+    output_price = MODEL_TO_OUTPUT_PRICE_PER_TOKEN.get(model)
+    if input_price is None or output_price is None:
+        return None
+
+    cached_price = MODEL_TO_CACHED_INPUT_PRICE_PER_TOKEN.get(model, input_price)
+    cached = usage.get("cached", 0)
+
+    return (
+        (usage["input"] - cached) * input_price
+        + cached * cached_price
+        + usage["output"] * output_price
+    )
+
+
+@dataclass
+class ModelRouter:
+    """Chooses the model of each completion from the agent and the meeting phase.
+
+    The most specific rule wins: `agent_phase_models[(agent, phase)]`, then
+    `phase_models[phase]`, then `agent_models[agent]`, then `default_model`
+    (or the meeting's model if `default_model` is None).
+
+    Example (cheap critic, strong final summary):
+        ModelRouter(
+            agent_phase_models={(SCIENTIFIC_CRITIC.title, "critique"): "gpt-5-mini"},
+            phase_models={"summary": "gpt-4.1"},
+        )
+    """
+
+    agent_models: dict[str, str] = field(default_factory=dict)
+    phase_models: dict[str, str] = field(default_factory=dict)
+    agent_phase_models: dict[tuple[str, str], str] = field(default_factory=dict)
+    default_model: str | None = None
+
+    def route(self, agent: str, phase: Phase, fallback_model: str) -> str:
+        """Returns the model for a completion.
+
+        :param agent: The title of the agent (or "Summarizer" for context summaries).
+        :param phase: The phase of the meeting.
+        :param fallback_model: The model to use if no rule matches and `default_model` is None.
+        :return: The name of the model.
+        """
+        if (agent, phase) in self.agent_phase_models:
+            return self.agent_phase_models[(agent, phase)]
+
+        if phase in self.phase_models:
+            return self.phase_models[phase]
+
+        if agent in self.agent_models:
+            return self.agent_models[agent]
+
+        return self.default_model or fallback_model
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised when a meeting would start a completion after its budget is used up."""
+
+
+class Budget:
+    """A hard USD and/or token budget shared by the completions of one or more meetings.
+
+    Once `downgrade_threshold` of the budget is used, models are switched to a
+    cheaper model (see `MODEL_TO_DOWNGRADE_MODEL`). Once the budget is used up,
+    `check` raises BudgetExceededError and the meeting stops early. Since the
+    cost of a completion is only known after it returns, spend can exceed the
+    budget by at most the completions already in flight.
+    """
+
+    def __init__(
+        self,
+        max_cost: float | None = None,
+        max_tokens: int | None = None,
+        downgrade_threshold: float | None = 0.8,
+        downgrade_models: dict[str, str] | None = None,
+    ) -> None:
+        """Initializes the budget.
+
+        :param max_cost: The maximum total cost in USD (None for no cost limit).
+        :param max_tokens: The maximum total number of input + output tokens (None for no limit).
+        :param downgrade_threshold: The fraction of the budget after which models are
+            downgraded (None to never downgrade).
+        :param downgrade_models: Mapping from a model to its cheaper replacement
+            (defaults to MODEL_TO_DOWNGRADE_MODEL).
+        """
+        if max_cost is None and max_tokens is None:
+            raise ValueError("Budget requires max_cost and/or max_tokens.")
+
+        self.max_cost = max_cost
+        self.max_tokens = max_tokens
+        self.downgrade_threshold = downgrade_threshold
+        self.downgrade_models = (
+            downgrade_models if downgrade_models is not None else MODEL_TO_DOWNGRADE_MODEL
+        )
+        self.cost = 0.0
+        self.tokens = 0
+        self.num_calls = 0
+        self.num_downgrades = 0
+
+    def fraction_used(self) -> float:
+        """Returns the largest fraction used of the cost and token limits."""
+        fractions = []
+
+        if self.max_cost is not None:
+            fractions.append(self.cost / self.max_cost if self.max_cost > 0 else 1.0)
+
+        if self.max_tokens is not None:
+            fractions.append(self.tokens / self.max_tokens if self.max_tokens > 0 else 1.0)
+
+        return max(fractions)
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the budget is used up."""
+        return self.fraction_used() >= 1
+
+    def check(self) -> None:
+        """Raises BudgetExceededError if the budget is used up."""
+        if self.exhausted:
+            raise BudgetExceededError(
+                f"Budget exhausted after {self.num_calls:,} calls "
+                f"(${self.cost:.4f}, {self.tokens:,} tokens)."
+            )
+
+    def check_pricing(self, model: str) -> None:
+        """Raises a ValueError if the budget has a cost limit and the model has no pricing.
+
+        The cost of a completion is only recorded after it is paid for, so
+        this is checked before the completion is requested.
+
+        :param model: The model of the completion.
+        """
+        if self.max_cost is not None and usage_cost(model, {"input": 0, "output": 0}) is None:
+            raise ValueError(f'Cost of model "{model}" not known, cannot enforce max_cost')
+
+    def select_model(self, model: str) -> str:
+        """Returns the model to use, downgraded if the budget is nearly used up.
+
+        Raises a ValueError if the budget has a cost limit and the model to
+        use has no pricing (see `check_pricing`).
+
+        :param model: The model chosen by routing.
+        :return: The model or its cheaper replacement.
+        """
+        if (
+            self.downgrade_threshold is not None
+            and self.fraction_used() >= self.downgrade_threshold
+            and model in self.downgrade_models
+        ):
+            self.num_downgrades += 1
+            model = self.downgrade_models[model]
+
+        self.check_pricing(model)
+
+        return model
+
+    def record(self, model: str, usage: dict[str, int]) -> float:
+        """Records the usage of a completion against the budget.
+
+        :param model: The model of the completion.
+        :param usage: The "input", "output", and "cached" token counts.
+        :return: The cost of the completion in USD.
+        """
+        self.check_pricing(model)
+        cost = usage_cost(model, usage) or 0.0
+
+        self.cost += cost
+        self.tokens += usage["input"] + usage["output"]
+        self.num_calls += 1
+
+        return cost
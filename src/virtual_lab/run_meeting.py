@@ -4,7 +4,6 @@ import time
 from pathlib import Path
 from typing import Literal
 
-from openai import OpenAI
 from tqdm import trange, tqdm
 
 from virtual_lab.agent import Agent
@@ -51,6 +50,11 @@ def run_meeting(
 ) -> str:
     """Runs a meeting with a LLM agents.
 
+    Crash recovery (`resume_from`) is only supported by
+    `virtual_lab.run_meeting_v2.run_meeting`, which streams each turn to a
+    transcript; this engine builds the discussion from a server-side
+    conversation and only saves it once the meeting finishes.
+
     :param meeting_type: The type of meeting.
     :param agenda: The agenda for the meeting.
     :param save_dir: The directory to save the discussion.
@@ -91,7 +95,9 @@ def run_meeting(
     # Start timing the meeting
     start_time = time.time()
 
-    # Set up client
+    # Set up client (openai is imported here since it is slow to import)
+    from openai import OpenAI
+
     client = OpenAI()
 
     # Set up team
@@ -245,8 +251,7 @@ def run_meeting(
     # Add tool token count to total token count
     token_counts["tool"] = tool_token_count
 
-    # Print cost and time
-    # TODO: handle different models for different agents
+    # Print cost and time (priced with the lead agent's model, see docstring)
     print_cost_and_time(
         token_counts=token_counts,
         model=team_lead.model if meeting_type == "team" else team_member.model,
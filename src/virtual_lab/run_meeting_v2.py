@@ -2,23 +2,52 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import time
+from collections import deque
 from pathlib import Path
-from typing import Literal, Iterable
+from typing import Any, ContextManager, Literal, Iterable
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletion
 
 from virtual_lab.agent import Agent
+from virtual_lab.backends import Provider, agent_request, agent_system_prompt, get_client
 from virtual_lab.constants import (
     CONSISTENT_TEMPERATURE,
     DEFAULT_MODEL,
-    MODEL_TO_INPUT_PRICE_PER_TOKEN,
-    MODEL_TO_OUTPUT_PRICE_PER_TOKEN,
+    PROVIDER_TO_DEFAULT_MODEL,
+)
+from virtual_lab.convergence import (
+    CRITIC_PASS_INSTRUCTION,
+    PASS_INSTRUCTION,
+    ConvergenceTracker,
+    EarlyStopping,
+    is_pass,
+)
+from virtual_lab.conversation_state import ConversationState
+from virtual_lab.discussion_context import (
+    DiscussionContext,
+    default_discussion_token_budget,
 )
 from virtual_lab.prompts import SCIENTIFIC_CRITIC
+from virtual_lab.rate_limiter import RateLimiter, get_rate_limiter
+from virtual_lab.retrieval import ContextRetrieval
+from virtual_lab.response_cache import AsyncCachedOpenAI, CachedOpenAI, ResponseCache
+from virtual_lab.routing import Budget, BudgetExceededError, ModelRouter, Phase, usage_cost
+from virtual_lab.token_ledger import TokenLedger
+from virtual_lab.tracing import JsonlSpanExporter, Span, SpanExporter, Tracer, span
+from virtual_lab.transcript import TranscriptWriter, load_transcript
 from virtual_lab.utils import save_meeting
 
 
+PromptLayout = Literal["single", "conversation", "stateful"]
+
+# The last turn of a meeting that stopped early without a summary (budget used up)
+STOPPED_EARLY_MESSAGE = "The meeting stopped early without a summary."
+
+
 # ---------------------------------------------------------------------------
 # Small formatting helpers
 # ---------------------------------------------------------------------------
@@ -86,12 +115,14 @@ def _format_discussion_for_prompt(
     return full_text[-max_chars:]
 
 
-def _choose_model(explicit_model: str | None, *agents: Agent | None) -> str:
+def choose_model(
+    explicit_model: str | None, *agents: Agent | None, default_model: str = DEFAULT_MODEL
+) -> str:
     """
     Decide which model to use:
       1. Explicit `model` argument if provided
       2. First non-empty `agent.model`
-      3. DEFAULT_MODEL from constants
+      3. `default_model` (DEFAULT_MODEL from constants, or the provider's default)
     """
     if explicit_model:
         return explicit_model
@@ -100,34 +131,1013 @@ def _choose_model(explicit_model: str | None, *agents: Agent | None) -> str:
         if agent is not None and getattr(agent, "model", None):
             return agent.model
 
-    return DEFAULT_MODEL
+    return default_model
+
+
+def _total_cost(model_usage: dict[str, dict[str, int]]) -> float | None:
+    """Return the USD cost summed over models, or None if a model has no pricing."""
+    costs = [usage_cost(model, usage) for model, usage in model_usage.items()]
+
+    return None if None in costs else sum(costs)
 
 
 def _print_usage_and_cost(
-    model: str,
-    total_prompt_tokens: int,
-    total_completion_tokens: int,
+    model_usage: dict[str, dict[str, int]],
     elapsed_seconds: float,
+    request_bytes: int | None = None,
 ) -> None:
-    """Print token usage, approximate USD cost, and elapsed time."""
-    input_price = MODEL_TO_INPUT_PRICE_PER_TOKEN.get(model)
-    output_price = MODEL_TO_OUTPUT_PRICE_PER_TOKEN.get(model)
+    """Print token usage, approximate USD cost, uploaded bytes and elapsed time.
+
+    `model_usage` maps each model used in the meeting to its "input", "output"
+    and "cached" token counts. Cached input tokens (served from the provider's
+    prompt cache) are billed at the discounted cached-input price when it is known.
+    """
+    totals = {
+        key: sum(usage[key] for usage in model_usage.values())
+        for key in ("input", "output", "cached")
+    }
+    cost = _total_cost(model_usage)
 
     cost_str = "Cost: unknown (no pricing for this model)."
-    if input_price is not None and output_price is not None:
-        cost = total_prompt_tokens * input_price + total_completion_tokens * output_price
+    if cost is not None:
         cost_str = f"Cost: ${cost:.2f}"
 
+        if totals["cached"]:
+            uncached_cost = _total_cost(
+                {model: {**usage, "cached": 0} for model, usage in model_usage.items()}
+            )
+            cost_str += f" (saved ${uncached_cost - cost:.2f} with cached input tokens)"
+
     print(
-        f"Input token count: {total_prompt_tokens:,}\n"
-        f"Output token count: {total_completion_tokens:,}\n"
+        f"Input token count: {totals['input']:,}\n"
+        f"Cached input token count: {totals['cached']:,}\n"
+        f"Output token count: {totals['output']:,}\n"
         f"{cost_str}"
     )
+
+    # Break down by model when routing used more than one
+    if len(model_usage) > 1:
+        for model, usage in model_usage.items():
+            model_cost = usage_cost(model, usage)
+            print(
+                f"  {model}: input {usage['input']:,}, output {usage['output']:,}, "
+                + (f"${model_cost:.2f}" if model_cost is not None else "cost unknown")
+            )
+
+    if request_bytes is not None:
+        print(f"Request bytes sent: {request_bytes:,}")
+
     minutes = int(elapsed_seconds // 60)
     seconds = int(elapsed_seconds % 60)
     print(f"Time: {minutes}:{seconds:02d}")
 
 
+# ---------------------------------------------------------------------------
+# Prompt construction (shared by the sync and async engines)
+# ---------------------------------------------------------------------------
+
+
+_SUMMARY_INSTRUCTION = (
+    "FINAL SUMMARY.\n"
+    "As the team lead, write a clear, structured summary of the meeting.\n"
+    "You MUST:\n"
+    "  - Summarize the main ideas and decisions.\n"
+    "  - Explicitly answer all agenda questions.\n"
+    "  - Highlight open issues and proposed next steps.\n"
+    "  - Keep the summary self-contained (can be read without the transcript)."
+)
+
+
+def _validate_meeting_args(
+    meeting_type: str,
+    team_lead: Agent | None,
+    team_members: tuple[Agent, ...] | None,
+    team_member: Agent | None,
+) -> None:
+    """Raise a ValueError if the participants do not match the meeting type."""
+    if meeting_type == "team":
+        if team_lead is None or team_members is None or len(team_members) == 0:
+            raise ValueError("Team meeting requires team_lead and non-empty team_members.")
+        if team_member is not None:
+            raise ValueError("Team meeting does not use `team_member`.")
+        if team_lead in team_members:
+            raise ValueError("team_lead must be separate from team_members.")
+        if len(set(team_members)) != len(team_members):
+            raise ValueError("team_members must be unique.")
+    elif meeting_type == "individual":
+        if team_member is None:
+            raise ValueError("Individual meeting requires `team_member`.")
+        if team_lead is not None or team_members is not None:
+            raise ValueError("Individual meeting does not use `team_lead` or `team_members`.")
+    else:
+        raise ValueError(f"Invalid meeting_type: {meeting_type!r}")
+
+
+def _participants(
+    team_lead: Agent | None,
+    team_members: tuple[Agent, ...] | None,
+    team_member: Agent | None,
+) -> list[Agent]:
+    """Return the agents taking turns in a meeting (the critic joins individual meetings)."""
+    if team_member is not None:
+        return [team_member, SCIENTIFIC_CRITIC]
+
+    return [team_lead, *team_members]
+
+
+def build_header_text(
+    agenda: str,
+    agenda_questions: tuple[str, ...],
+    agenda_rules: tuple[str, ...],
+    summaries: tuple[str, ...],
+    contexts: tuple[str, ...],
+    pubmed_search: bool,
+) -> str:
+    """Build the static "header" text that all agents will see."""
+    header_parts = [
+        _format_contexts(contexts),
+        _format_summaries(summaries),
+        _format_agenda(agenda),
+        _format_questions(agenda_questions),
+        _format_rules(agenda_rules),
+    ]
+    if pubmed_search:
+        header_parts.append(
+            "NOTE: You may conceptually draw on the biomedical literature (e.g. PubMed) "
+            "and assume access to typical knowledge from recent publications, but you "
+            "must still explain your reasoning in detail.\n\n"
+        )
+    return "".join(header_parts).strip()
+
+
+def individual_instructions(round_idx: int, total_rounds: int) -> tuple[str, str, str]:
+    """
+    Return the three instructions of an individual meeting round:
+    the main agent's answer, the critique, and the main agent's revision.
+    """
+    round_label = f"ROUND {round_idx + 1}/{total_rounds}"
+
+    if round_idx == 0:
+        answer_instruction = (
+            f"{round_label} — Initial answer.\n"
+            "You are the primary scientist for this meeting.\n"
+            "Provide a detailed, technically rigorous response to the agenda.\n"
+            "Explicitly address all agenda questions and follow all meeting rules.\n"
+            "Your answer should be structured, step-by-step, and implementable."
+        )
+    else:
+        answer_instruction = (
+            f"{round_label} — Refined answer.\n"
+            "Improve and refine your previous answer given all prior discussion.\n"
+            "Clarify assumptions, add missing details, and fix any issues that "
+            "were revealed earlier.\n"
+            "At the end, present a consolidated, self-contained answer."
+        )
+
+    critic_instruction = (
+        f"{round_label} — Critique.\n"
+        "Carefully critique the primary scientist's most recent answer.\n"
+        "Identify weaknesses, missing considerations, questionable assumptions, "
+        "and possible failure modes.\n"
+        "Suggest concrete, actionable improvements. Do NOT rewrite the answer "
+        "yourself; focus purely on critique and guidance."
+    )
+
+    refinement_instruction = (
+        f"{round_label} — Apply critique.\n"
+        "Revise and improve your earlier answer based on the critic's feedback.\n"
+        "You may substantially restructure your answer if needed.\n"
+        "Ensure the result is clear, rigorous, and directly addresses the agenda "
+        "and all agenda questions.\n"
+        "This revised answer will replace your earlier answer for this round."
+    )
+
+    return answer_instruction, critic_instruction, refinement_instruction
+
+
+def _team_instruction(
+    agent: Agent, team_lead: Agent, round_idx: int, total_rounds: int
+) -> str:
+    """Return the instruction for one participant's turn in a team meeting round."""
+    round_label = f"ROUND {round_idx + 1}/{total_rounds}"
+
+    if round_idx == 0:
+        if agent is team_lead:
+            return (
+                f"{round_label} — Kickoff as Team Lead.\n"
+                "Propose an overall strategy and structure for addressing the agenda.\n"
+                "Highlight key decisions that need to be made and the roles of "
+                "each team member.\n"
+                "Provide an initial plan that the team can refine."
+            )
+        return (
+            f"{round_label} — Initial contribution as {agent.title}.\n"
+            "Provide your expert perspective on the agenda.\n"
+            "Identify key technical issues, risks, and opportunities "
+            "from your area of expertise.\n"
+            "Respond to any relevant agenda questions."
+        )
+
+    if agent is team_lead:
+        return (
+            f"{round_label} — Integrate and steer the discussion.\n"
+            "Summarize the most important points raised so far, identify "
+            "agreements and disagreements, and propose next steps.\n"
+            "Refine the overall plan and keep the team focused on the agenda "
+            "and agenda questions."
+        )
+    return (
+        f"{round_label} — Follow-up as {agent.title}.\n"
+        "React to previous discussion, refine your earlier suggestions, "
+        "and address any open questions or concerns.\n"
+        "Be concrete and actionable."
+    )
+
+
+def build_messages(
+    agent: Agent,
+    header_text: str,
+    discussion: list[dict[str, str]],
+    instruction: str,
+    discussion_title: str = "PREVIOUS DISCUSSION",
+    prompt_layout: PromptLayout = "single",
+    discussion_context: DiscussionContext | None = None,
+) -> list[dict[str, str]]:
+    """
+    Build the chat messages for one agent turn from the current discussion.
+
+    With the "single" layout, the header, the (truncated) discussion and the
+    instruction are rendered into one user message.
+
+    With the "conversation" layout, the system prompt and the static header
+    come first, followed by one message per transcript turn and finally the
+    instruction. Since turns are only ever appended, every call by the same
+    agent starts with a byte-identical prefix of its previous call, which lets
+    the provider's prompt cache serve most of the input.
+
+    If a `discussion_context` is given, it replaces character truncation:
+    older turns appear as per-agent summaries and recent turns verbatim.
+
+    The system message is left out for agents with only a stored prompt
+    (see `agent_request`). The "stateful" layout sends Responses API requests
+    built by `ConversationState` instead of chat messages.
+    """
+    if prompt_layout == "conversation":
+        return _build_conversation_messages(
+            agent, header_text, discussion, instruction, discussion_context
+        )
+
+    if discussion_context is not None:
+        previous_text = discussion_context.render()
+    else:
+        previous_text = _format_discussion_for_prompt(discussion)
+    user_content = (
+        f"{header_text}\n\n"
+        f"{discussion_title}:\n{previous_text or 'None yet.'}\n\n"
+        f"{instruction}"
+    )
+
+    return _system_messages(agent) + [{"role": "user", "content": user_content}]
+
+
+def _build_conversation_messages(
+    agent: Agent,
+    header_text: str,
+    discussion: list[dict[str, str]],
+    instruction: str,
+    discussion_context: DiscussionContext | None = None,
+) -> list[dict[str, str]]:
+    """Build the prefix-stable "conversation" layout (see `build_messages`)."""
+    messages = _system_messages(agent)
+
+    if header_text:
+        messages.append({"role": "user", "content": header_text})
+
+    if discussion_context is not None:
+        summary_text = discussion_context.summary_text()
+        if summary_text:
+            messages.append({"role": "user", "content": summary_text})
+        turns = discussion_context.recent_turns()
+    else:
+        turns = _transcript(discussion, header_text)
+
+    messages += [
+        {"role": "user", "content": f"{turn['agent']}: {turn['message']}".strip()}
+        for turn in turns
+    ]
+    messages.append({"role": "user", "content": instruction})
+
+    return messages
+
+
+def _system_messages(agent: Agent) -> list[dict[str, str]]:
+    """Return the system message of an agent (none if it only has a stored prompt)."""
+    system_prompt = agent_system_prompt(agent)
+
+    return [] if system_prompt is None else [{"role": "system", "content": system_prompt}]
+
+
+def _transcript(discussion: list[dict[str, str]], header_text: str) -> list[dict[str, str]]:
+    """Return the discussion turns without the leading header turn (if any)."""
+    return discussion[1:] if header_text else discussion
+
+
+def parse_completion(resp: ChatCompletion) -> tuple[str, dict[str, int]]:
+    """
+    Return the message text and the token usage of a completion.
+
+    The usage has "input", "output" and "cached" (input tokens served from
+    the provider's prompt cache) counts.
+    """
+    message = resp.choices[0].message.content or ""
+
+    return message, parse_usage(resp.usage)
+
+
+def _load_resumed_turns(resume_from: Path, header_text: str) -> deque[dict[str, Any]]:
+    """
+    Load the turns recorded in a JSONL transcript to resume a meeting.
+
+    The transcript must start with the same header as the meeting being resumed.
+    """
+    records = load_transcript(resume_from)
+
+    if header_text:
+        header_record = records[0] if records else {}
+        if header_record.get("agent") != "User" or header_record.get("message") != header_text:
+            raise ValueError(
+                f"Transcript {resume_from} does not match the header of this meeting."
+            )
+        records = records[1:]
+
+    return deque(records)
+
+
+def _replay_turn(
+    record: dict[str, Any], agent: Agent
+) -> tuple[str, dict[str, int], dict[str, float | None]]:
+    """Return the message, usage and timing of a recorded turn, checking the speaker."""
+    if record["agent"] != agent.title:
+        raise ValueError(
+            f"Transcript turn {record['index']} is by {record['agent']!r}, "
+            f"but the meeting expects {agent.title!r} at this point."
+        )
+
+    recorded_usage = record.get("usage") or {}
+    usage = {key: recorded_usage.get(key, 0) for key in ("input", "output", "cached")}
+    timing = {
+        key: record.get(key)
+        for key in ("latency_seconds", "time_to_first_token", "tokens_per_second")
+    }
+
+    return record["message"], usage, timing
+
+
+def parse_usage(usage: Any) -> dict[str, int]:
+    """Return the "input", "output" and "cached" token counts of an API usage object."""
+    counts = {"input": 0, "output": 0, "cached": 0}
+    if not usage:
+        return counts
+
+    # The Responses API reports input/output tokens instead of prompt/completion tokens
+    if hasattr(usage, "input_tokens"):
+        counts["input"] = usage.input_tokens or 0
+        counts["output"] = usage.output_tokens or 0
+        details = getattr(usage, "input_tokens_details", None)
+    else:
+        counts["input"] = usage.prompt_tokens or 0
+        counts["output"] = usage.completion_tokens or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+
+    if details is not None:
+        counts["cached"] = getattr(details, "cached_tokens", None) or 0
+
+    return counts
+
+
+def _timing(
+    start: float, first_token: float | None, end: float, output_tokens: int
+) -> dict[str, float | None]:
+    """Return the latency, time to first token and decoding speed of a completion."""
+    decode_seconds = end - first_token if first_token is not None else None
+
+    return {
+        "latency_seconds": end - start,
+        "time_to_first_token": first_token - start if first_token is not None else None,
+        "tokens_per_second": (
+            output_tokens / decode_seconds if decode_seconds else None
+        ),
+    }
+
+
+def _record_usage(
+    span_: Span | None,
+    model: str,
+    usage: dict[str, int],
+    timing: dict[str, float | None] | None = None,
+) -> None:
+    """Record the tokens, cost and timing of one or more LLM calls on a span (if tracing)."""
+    if span_ is None:
+        return
+
+    span_.set(
+        model=model,
+        prompt_tokens=usage["input"],
+        completion_tokens=usage["output"],
+        cached_tokens=usage["cached"],
+        cost=usage_cost(model, usage),
+        **(timing or {}),
+    )
+
+
+def _select_model(
+    agent_title: str,
+    phase: Phase,
+    used_model: str,
+    router: ModelRouter | None,
+    budget: Budget | None,
+) -> str:
+    """
+    Return the model of a completion: routed by agent and phase, then
+    downgraded if the budget is nearly used up. Raises BudgetExceededError
+    if the budget is used up.
+    """
+    call_model = (
+        router.route(agent_title, phase, used_model) if router is not None else used_model
+    )
+
+    if budget is not None:
+        budget.check()
+        call_model = budget.select_model(call_model)
+
+    return call_model
+
+
+def add_usage(
+    token_totals: dict[str, int],
+    model_usage: dict[str, dict[str, int]],
+    model: str,
+    usage: dict[str, int],
+) -> None:
+    """Add the usage of a completion to the meeting totals and the per-model totals."""
+    totals = model_usage.setdefault(model, {"input": 0, "output": 0, "cached": 0})
+
+    for key, value in usage.items():
+        token_totals[key] += value
+        totals[key] += value
+
+
+def _add_token_counts(token_counts: dict[str, int] | None, usage: dict[str, int]) -> None:
+    """
+    Add the usage of a completion to the caller's `token_counts` (if given)
+    as soon as it completes, so a meeting that fails later still reports it.
+    """
+    if token_counts is None:
+        return
+
+    for key, value in usage.items():
+        token_counts[key] = token_counts.get(key, 0) + value
+
+
+def _convergence_tracker(
+    early_stopping: EarlyStopping | None,
+    meeting_type: Literal["team", "individual"],
+    total_rounds: int,
+    num_participants: int,
+) -> ConvergenceTracker | None:
+    """Return the convergence tracker of a meeting (None if early stopping is off)."""
+    if early_stopping is None:
+        return None
+
+    if meeting_type == "individual":
+        planned_calls = 3 * total_rounds
+    else:
+        planned_calls = total_rounds * num_participants + 1
+
+    return ConvergenceTracker(early_stopping, planned_calls)
+
+
+def _pass_instruction(
+    instruction: str, tracker: ConvergenceTracker | None, pass_instruction: str
+) -> str:
+    """Return the instruction, telling the agent it may pass if early stopping is on."""
+    return instruction if tracker is None else f"{instruction}\n{pass_instruction}"
+
+
+def _estimate_request_tokens(request: dict[str, Any]) -> int:
+    """Return a rough input token count of a request (about 4 characters per token).
+
+    For a Responses API request, this counts only the uploaded input, not the
+    chained conversation; the limiter is corrected with the reported usage.
+    """
+    messages = request["messages"] if "messages" in request else request["input"]
+    num_chars = sum(len(str(message.get("content", ""))) for message in messages)
+
+    return (num_chars + len(request.get("instructions", ""))) // 4
+
+
+def _request_bytes(request: dict[str, Any]) -> int:
+    """Return the size of a request body in bytes."""
+    return len(json.dumps(request).encode("utf-8"))
+
+
+def _validate_prompt_layout(
+    prompt_layout: PromptLayout,
+    stream: bool,
+    summarize_discussion: bool,
+    cache: ResponseCache | None,
+) -> None:
+    """Raise a ValueError if options are not supported by the prompt layout."""
+    if prompt_layout != "stateful":
+        return
+
+    if stream:
+        raise ValueError('The "stateful" prompt layout does not support streaming.')
+    if summarize_discussion:
+        raise ValueError(
+            'The "stateful" prompt layout keeps the full discussion on the server '
+            "and cannot be combined with summarize_discussion."
+        )
+    if cache is not None:
+        raise ValueError('Responses of the "stateful" prompt layout cannot be cached.')
+
+
+def _check_responses_client(
+    client: Any, provider: Provider, prompt_layout: PromptLayout, agents: Iterable[Agent]
+) -> None:
+    """
+    Raise a ValueError if the meeting needs the Responses API but the client
+    does not have it: the "stateful" layout and agents with only a stored
+    prompt (`pmpt_id`) are sent with `responses.create`.
+    """
+    if hasattr(client, "responses"):
+        return
+
+    if prompt_layout == "stateful":
+        raise ValueError(
+            f'The "stateful" prompt layout requires a client with the Responses API, '
+            f'which the "{provider}" client does not have.'
+        )
+
+    for agent in agents:
+        if agent_system_prompt(agent) is None:
+            raise ValueError(
+                f"Agent {agent.title!r} only has a stored prompt (pmpt_id), so it needs a "
+                f'client with the Responses API, which the "{provider}" client does not have.'
+            )
+
+
+def _complete(
+    client: OpenAI,
+    request: dict[str, Any],
+    stream: bool = False,
+    limiter: RateLimiter | None = None,
+) -> tuple[str, dict[str, int], dict[str, float | None]]:
+    """
+    Run one chat completion and return its message, usage and timing.
+
+    A Responses API request (with "input" instead of "messages", see
+    `ConversationState`) is sent with `responses.create`, and the ID of the
+    response is returned with the timing as "response_id".
+
+    With `stream=True` the completion is consumed chunk by chunk, which gives
+    the time to first token and the decoding speed (tokens per second).
+    The call goes through `limiter` (the process-wide RateLimiter if None),
+    which paces it per model and retries transient failures with backoff.
+    The call is recorded as an "llm_call" span (with its retries and the time
+    spent rate limited) when a tracer is active.
+    """
+    limiter = limiter or get_rate_limiter()
+    estimated_tokens = _estimate_request_tokens(request)
+    stats = {"retries": 0, "wait_seconds": 0.0}
+
+    with span(
+        "chat.completions",
+        "llm_call",
+        queue_seconds=0.0,
+        retries=0,
+        request_bytes=_request_bytes(request),
+    ) as call_span:
+        try:
+            message, usage, timing = limiter.call(
+                lambda: _complete_untraced(client, request, stream),
+                model=request["model"],
+                tokens=estimated_tokens,
+                stats=stats,
+            )
+        finally:
+            if call_span is not None:
+                call_span.set(retries=stats["retries"], queue_seconds=stats["wait_seconds"])
+
+        limiter.record_tokens(
+            request["model"], usage["input"] + usage["output"] - estimated_tokens
+        )
+        _record_usage(call_span, request["model"], usage, timing)
+
+    return message, usage, timing
+
+
+def _response_result(
+    resp: Any, start: float
+) -> tuple[str, dict[str, int], dict[str, float | None]]:
+    """Return the message, usage and timing (with the response ID) of a Responses API response."""
+    usage = parse_usage(resp.usage)
+    timing = _timing(start, None, time.time(), usage["output"])
+
+    return resp.output_text, usage, {**timing, "response_id": resp.id}
+
+
+def _completion_result(
+    resp: ChatCompletion, start: float
+) -> tuple[str, dict[str, int], dict[str, float | None]]:
+    """Return the message, usage and timing of a (non-streamed) chat completion."""
+    message, usage = parse_completion(resp)
+
+    return message, usage, _timing(start, None, time.time(), usage["output"])
+
+
+# Keyword arguments of a streamed chat completion (reporting usage in the last chunk)
+_STREAM_KWARGS = {"stream": True, "stream_options": {"include_usage": True}}
+
+
+class _StreamedCompletion:
+    """The message, usage and time to first token of a streamed chat completion."""
+
+    def __init__(self, start: float) -> None:
+        """Initializes the completion.
+
+        :param start: The time the request was sent.
+        """
+        self.start = start
+        self.first_token: float | None = None
+        self.pieces: list[str] = []
+        self.usage = parse_usage(None)
+
+    def add(self, chunk: Any) -> None:
+        """Adds a chunk of the stream."""
+        if chunk.choices and chunk.choices[0].delta.content:
+            if self.first_token is None:
+                self.first_token = time.time()
+            self.pieces.append(chunk.choices[0].delta.content)
+
+        if chunk.usage:
+            self.usage = parse_usage(chunk.usage)
+
+    def result(self) -> tuple[str, dict[str, int], dict[str, float | None]]:
+        """Returns the message, usage and timing of the completion."""
+        timing = _timing(self.start, self.first_token, time.time(), self.usage["output"])
+
+        return "".join(self.pieces), self.usage, timing
+
+
+def _complete_untraced(
+    client: OpenAI, request: dict[str, Any], stream: bool
+) -> tuple[str, dict[str, int], dict[str, float | None]]:
+    start = time.time()
+
+    if "input" in request:
+        return _response_result(client.responses.create(**request), start)
+
+    if not stream:
+        return _completion_result(client.chat.completions.create(**request), start)
+
+    completion = _StreamedCompletion(start)
+    for chunk in client.chat.completions.create(**request, **_STREAM_KWARGS):
+        completion.add(chunk)
+
+    return completion.result()
+
+
+async def _async_complete(
+    client: AsyncOpenAI,
+    request: dict[str, Any],
+    stream: bool = False,
+    queue_seconds: float = 0.0,
+    limiter: RateLimiter | None = None,
+) -> tuple[str, dict[str, int], dict[str, float | None]]:
+    """
+    Async version of `_complete`.
+
+    `queue_seconds` is the time the call waited for a concurrency slot. The
+    time it then waits for the rate limiter is added to it on the "llm_call" span.
+    """
+    limiter = limiter or get_rate_limiter()
+    estimated_tokens = _estimate_request_tokens(request)
+    stats = {"retries": 0, "wait_seconds": 0.0}
+
+    with span(
+        "chat.completions",
+        "llm_call",
+        queue_seconds=queue_seconds,
+        retries=0,
+        request_bytes=_request_bytes(request),
+    ) as call_span:
+        try:
+            message, usage, timing = await limiter.acall(
+                lambda: _async_complete_untraced(client, request, stream),
+                model=request["model"],
+                tokens=estimated_tokens,
+                stats=stats,
+            )
+        finally:
+            if call_span is not None:
+                call_span.set(
+                    retries=stats["retries"],
+                    queue_seconds=queue_seconds + stats["wait_seconds"],
+                )
+
+        limiter.record_tokens(
+            request["model"], usage["input"] + usage["output"] - estimated_tokens
+        )
+        _record_usage(call_span, request["model"], usage, timing)
+
+    return message, usage, timing
+
+
+async def _async_complete_untraced(
+    client: AsyncOpenAI, request: dict[str, Any], stream: bool
+) -> tuple[str, dict[str, int], dict[str, float | None]]:
+    start = time.time()
+
+    if "input" in request:
+        return _response_result(await client.responses.create(**request), start)
+
+    if not stream:
+        return _completion_result(await client.chat.completions.create(**request), start)
+
+    completion = _StreamedCompletion(start)
+    async for chunk in await client.chat.completions.create(**request, **_STREAM_KWARGS):
+        completion.add(chunk)
+
+    return completion.result()
+
+
+def _meeting_client(
+    client: Any,
+    provider: Provider,
+    cache: ResponseCache | None,
+    prompt_layout: PromptLayout,
+    agents: list[Any],
+    asynchronous: bool,
+) -> Any:
+    """
+    Return the client of a meeting: the given client or the pooled client of
+    the provider, served from `cache` if given. Raises a ValueError if the
+    prompt layout or the agents need the Responses API and the client lacks it.
+    """
+    # Share the pooled client of the provider unless a client is given
+    if client is None and not (cache is not None and cache.replay_only):
+        client = get_client(provider, asynchronous=asynchronous)
+
+    if cache is not None:
+        cached_client_class = AsyncCachedOpenAI if asynchronous else CachedOpenAI
+        client = cached_client_class(cache=cache, client=client)
+
+    _check_responses_client(client, provider, prompt_layout, agents)
+
+    return client
+
+
+class _Meeting:
+    """The state of a meeting shared by `run_meeting` and `async_run_meeting`.
+
+    Holds the header, the discussion, the transcript writer, the tracer, the
+    convergence tracker, the discussion context and conversation state of the
+    prompt layout, and the token usage, and records each finished turn.
+    """
+
+    def __init__(
+        self,
+        meeting_type: Literal["team", "individual"],
+        agenda: str,
+        save_dir: Path,
+        save_name: str,
+        team_lead: Agent | None,
+        team_members: tuple[Agent, ...] | None,
+        team_member: Agent | None,
+        agenda_questions: tuple[str, ...],
+        agenda_rules: tuple[str, ...],
+        summaries: tuple[str, ...],
+        contexts: tuple[str, ...],
+        num_rounds: int,
+        temperature: float,
+        pubmed_search: bool,
+        model: str | None,
+        ledger: TokenLedger | None,
+        prompt_layout: PromptLayout,
+        summarize_discussion: bool,
+        discussion_token_budget: int | None,
+        save_transcript: bool,
+        resume_from: Path | None,
+        save_trace: bool,
+        span_exporters: tuple[SpanExporter, ...],
+        early_stopping: EarlyStopping | None,
+        context_retrieval: ContextRetrieval | None,
+        provider: Provider,
+    ) -> None:
+        """Initializes the meeting (see `run_meeting` for the parameters)."""
+        self.save_dir = save_dir
+        self.save_name = save_name
+        self.temperature = temperature
+        self.prompt_layout = prompt_layout
+        self.ledger = ledger
+
+        # Ensure at least one round
+        self.total_rounds = max(1, num_rounds)
+
+        # Choose model
+        default_model = PROVIDER_TO_DEFAULT_MODEL[provider]
+        if meeting_type == "individual":
+            self.used_model = choose_model(model, team_member, default_model=default_model)
+        else:
+            self.used_model = choose_model(
+                model, team_lead, *(team_members or ()), default_model=default_model
+            )
+
+        # Add the passages of past meetings relevant to the agenda
+        if context_retrieval is not None:
+            contexts = contexts + context_retrieval.contexts(
+                "\n".join((agenda, *agenda_questions))
+            )
+
+        # Build the static "header" text that all agents will see
+        self.header_text = build_header_text(
+            agenda, agenda_questions, agenda_rules, summaries, contexts, pubmed_search
+        )
+
+        # Discussion transcript we will save
+        self.discussion: list[dict[str, str]] = []
+        self.resumed_turns: deque[dict[str, Any]] = deque()
+        if resume_from is not None:
+            self.resumed_turns = _load_resumed_turns(resume_from, self.header_text)
+            print(f"Resuming {len(self.resumed_turns):,} turns from {resume_from}")
+
+        # Continue the same transcript in place when resuming from it
+        transcript_path = save_dir / f"{save_name}.jsonl"
+        self.append_transcript = (
+            resume_from is not None
+            and Path(resume_from).resolve() == transcript_path.resolve()
+        )
+        self.transcript_writer = (
+            TranscriptWriter(transcript_path, append=self.append_transcript)
+            if save_transcript
+            else None
+        )
+
+        if self.header_text:
+            self.discussion.append({"agent": "User", "message": self.header_text})
+
+            if ledger is not None:
+                ledger.add_turn(agent="User", message=self.header_text)
+
+            if self.transcript_writer is not None and not self.append_transcript:
+                self.transcript_writer.write_turn(agent="User", message=self.header_text)
+
+        self.conversation_state = None
+        if prompt_layout == "stateful":
+            self.conversation_state = ConversationState(self.header_text)
+
+        self.discussion_context = None
+        if summarize_discussion:
+            self.discussion_context = DiscussionContext(
+                token_budget=discussion_token_budget
+                or default_discussion_token_budget(self.used_model)
+            )
+
+        self.tracer = Tracer(
+            exporters=[
+                *(
+                    [JsonlSpanExporter(save_dir / f"{save_name}.trace.jsonl")]
+                    if save_trace
+                    else []
+                ),
+                *span_exporters,
+            ]
+        )
+
+        self.tracker = _convergence_tracker(
+            early_stopping, meeting_type, self.total_rounds, 1 + len(team_members or ())
+        )
+
+        self.start_time = time.time()
+        self.token_totals = {"input": 0, "output": 0, "cached": 0}
+        self.request_bytes = 0
+        self.model_usage: dict[str, dict[str, int]] = {}
+
+    def request(
+        self,
+        agent: Agent,
+        discussion: list[dict[str, str]],
+        instruction: str,
+        model: str,
+        discussion_title: str,
+    ) -> dict[str, Any]:
+        """Returns the request of an agent's turn in the meeting's prompt layout."""
+        if self.conversation_state is not None:
+            return self.conversation_state.request(
+                agent, discussion, instruction, model, self.temperature
+            )
+
+        return agent_request(
+            agent,
+            model,
+            self.temperature,
+            build_messages(
+                agent,
+                self.header_text,
+                discussion,
+                instruction,
+                discussion_title,
+                self.prompt_layout,
+                self.discussion_context,
+            ),
+        )
+
+    def add_usage(self, model: str, usage: dict[str, int]) -> None:
+        """Adds the usage of a completion to the meeting totals."""
+        add_usage(self.token_totals, self.model_usage, model, usage)
+
+    def add_turn(
+        self,
+        agent: Agent,
+        message: str,
+        model: str,
+        usage: dict[str, int],
+        timing: dict[str, float | None],
+        replayed: bool,
+    ) -> None:
+        """Appends a finished turn to the discussion, ledger and transcript and adds its usage."""
+        self.discussion.append({"agent": agent.title, "message": message})
+
+        if self.ledger is not None:
+            self.ledger.add_turn(agent=agent.title, message=message, model=model)
+
+        if self.transcript_writer is not None and not (replayed and self.append_transcript):
+            self.transcript_writer.write_turn(
+                agent=agent.title,
+                message=message,
+                model=model,
+                usage=usage,
+                **timing,
+            )
+
+        self.add_usage(model, usage)
+
+    def span(self, meeting_type: Literal["team", "individual"]) -> ContextManager[Span]:
+        """Returns the span of the whole meeting."""
+        return self.tracer.span(
+            self.save_name,
+            "meeting",
+            meeting_type=meeting_type,
+            save_name=self.save_name,
+            model=self.used_model,
+            num_rounds=self.total_rounds,
+        )
+
+    def stop_early(self, meeting_span: Span, error: BudgetExceededError) -> None:
+        """Stops the meeting early, keeping the discussion so far.
+
+        The meeting has no summary, so the saved discussion ends with a note
+        saying so (instead of the last agent message, which `load_summaries`
+        would otherwise read as the summary).
+        """
+        print(f"Warning: {error} Stopping the meeting early.")
+        meeting_span.set(stopped_early=True)
+
+        self.discussion.append(
+            {"agent": "User", "message": f"{STOPPED_EARLY_MESSAGE} {error}"}
+        )
+
+    def finish(self, meeting_span: Span) -> None:
+        """Records the usage of the meeting on its span."""
+        meeting_span.set(
+            prompt_tokens=self.token_totals["input"],
+            completion_tokens=self.token_totals["output"],
+            cached_tokens=self.token_totals["cached"],
+            cost=_total_cost(self.model_usage),
+            models=sorted(self.model_usage),
+            request_bytes=self.request_bytes,
+        )
+
+        if self.tracker is not None:
+            meeting_span.set(calls_saved=self.tracker.calls_saved)
+
+    def save(self) -> None:
+        """Saves the discussion and prints the usage, cost and calls saved."""
+        elapsed = time.time() - self.start_time
+        save_meeting(
+            save_dir=self.save_dir, save_name=self.save_name, discussion=self.discussion
+        )
+        _print_usage_and_cost(
+            model_usage=self.model_usage,
+            elapsed_seconds=elapsed,
+            request_bytes=self.request_bytes,
+        )
+
+        if self.tracker is not None:
+            self.tracker.report()
+
+
 # ---------------------------------------------------------------------------
 # Core orchestration
 # ---------------------------------------------------------------------------
@@ -150,6 +1160,24 @@ def run_meeting(
     pubmed_search: bool = False,  # v2: used only as textual hint, no real tool calls
     return_summary: bool = False,
     model: str | None = None,
+    client: OpenAI | None = None,
+    rate_limiter: RateLimiter | None = None,
+    token_counts: dict[str, int] | None = None,
+    ledger: TokenLedger | None = None,
+    cache: ResponseCache | None = None,
+    prompt_layout: PromptLayout = "single",
+    summarize_discussion: bool = False,
+    discussion_token_budget: int | None = None,
+    stream: bool = False,
+    save_transcript: bool = False,
+    resume_from: Path | None = None,
+    save_trace: bool = False,
+    span_exporters: tuple[SpanExporter, ...] = (),
+    router: ModelRouter | None = None,
+    budget: Budget | None = None,
+    early_stopping: EarlyStopping | None = None,
+    context_retrieval: ContextRetrieval | None = None,
+    provider: Provider = "openai",
 ) -> str | None:
     """
     Runs a meeting with LLM agents (v2).
@@ -179,6 +1207,10 @@ def run_meeting(
     :param team_lead: Team lead for team meetings.
     :param team_members: Team members for team meetings.
     :param team_member: Single agent for individual meetings.
+                        Agents may be `virtual_lab` agents, whose prompt is
+                        stored on the OpenAI platform (`.pmpt_id`, sent with
+                        the Responses API, which does not stream), or `alzkb`
+                        agents (`.system_prompt`).
     :param agenda_questions: Questions that must be answered.
     :param agenda_rules: Rules that must be followed.
     :param summaries: Summaries of previous meetings.
@@ -191,294 +1223,661 @@ def run_meeting(
     :param return_summary: If True, return the final summary message string.
     :param model: Optional explicit model name to use. If not provided,
                   we fall back to agents' `.model` fields or DEFAULT_MODEL.
-    :return: Final summary string if `return_summary` else None.
+    :param client: Optional `OpenAI`-compatible client (the pooled client of
+                   `provider` is used if None).
+    :param rate_limiter: Optional RateLimiter that paces calls per model and
+                         retries transient failures (rate limits, server
+                         errors) with backoff; the process-wide limiter from
+                         `get_rate_limiter()` is used if None.
+    :param token_counts: Optional dictionary that is updated in place with the
+                         "input", "output" and "cached" token counts of each
+                         call as it completes (so it also counts the calls of
+                         a meeting that fails or times out).
+    :param ledger: Optional TokenLedger that is updated as each turn happens,
+                   with per-agent and per-model breakdowns.
+    :param cache: Optional ResponseCache; identical completion requests are served
+                  from disk (and never sent in replay-only mode).
+    :param prompt_layout: "single" renders header, truncated discussion and
+                          instruction into one user message; "conversation"
+                          sends the full transcript as separate messages after
+                          a byte-identical system prompt + header prefix, so
+                          the provider's prompt cache can be reused;
+                          "stateful" keeps each agent's conversation on the
+                          server (Responses API, chained by
+                          `previous_response_id`), so each call uploads only
+                          the turns added since the agent last spoke and the
+                          instruction. The uploaded bytes then grow linearly
+                          with the rounds instead of quadratically. Requires a
+                          client with the Responses API, and does not support
+                          `stream`, `summarize_discussion` or `cache`.
+    :param summarize_discussion: If True, keep the discussion shown to agents
+                                 within a token budget by folding older turns
+                                 into per-agent running summaries instead of
+                                 truncating it by characters.
+    :param discussion_token_budget: Token budget of the discussion when
+                                    summarizing (defaults to a per-model budget).
+    :param stream: If True, consume completions with `stream=True` and record
+                   the time to first token and tokens/sec of each turn.
+    :param save_transcript: If True, append each finished turn (with usage and
+                            timing) to `save_dir / f"{save_name}.jsonl"` as soon
+                            as it is available, next to the JSON/Markdown files.
+    :param resume_from: Optional path to the JSONL transcript of an interrupted
+                        run of the same meeting. Its turns are replayed without
+                        calling the API (restoring the discussion, the position
+                        in the round/participant order and the token totals)
+                        and the meeting continues from the next pending turn.
+    :param save_trace: If True, write a span per meeting, round, turn and LLM
+                       call (with start/end, tokens, cost and queue time) to
+                       `save_dir / f"{save_name}.trace.jsonl"`.
+    :param span_exporters: Additional span exporters (e.g., an
+                           `OpenTelemetryExporter`) that receive the same spans.
+    :param router: Optional ModelRouter choosing the model of each call by
+                   agent and phase ("answer", "critique", "revision",
+                   "discussion", "summary", "context_summary"); calls it does
+                   not route use the meeting's model.
+    :param budget: Optional Budget (USD and/or tokens, may be shared across
+                   meetings). Models are downgraded when it is nearly used up,
+                   and the meeting stops early once it is used up, saving
+                   the discussion so far with a note that it has no summary
+                   (and returning None instead of a summary).
+    :param early_stopping: Optional EarlyStopping settings (opt-in). Agents
+                           may then answer "Pass": agents that keep passing
+                           are skipped, and once a round converges (mostly
+                           passes or little new content) the remaining rounds
+                           are skipped and the meeting goes straight to the
+                           final summary (individual meetings stop as soon as
+                           the critic passes). The number of calls saved is
+                           printed and recorded on the meeting span.
+    :param context_retrieval: Optional ContextRetrieval over past meetings.
+                              The passages most relevant to the agenda and
+                              agenda questions (at most `top_k`, within its
+                              token budget) are added to `contexts`, instead
+                              of passing the summaries of all past meetings.
+    :param provider: The chat backend used when no `client` is given: "openai",
+                     "google" (Google GenAI) or "mock" (a local MockChatServer).
+                     Its pooled client is shared by all meetings in the process.
+    :return: Final summary string if `return_summary` (None if the budget ran
+             out before the summary) else None.
     """
     # ------------------------
     # Basic argument validation
     # ------------------------
-    if meeting_type == "team":
-        if team_lead is None or team_members is None or len(team_members) == 0:
-            raise ValueError("Team meeting requires team_lead and non-empty team_members.")
-        if team_member is not None:
-            raise ValueError("Team meeting does not use `team_member`.")
-        if team_lead in team_members:
-            raise ValueError("team_lead must be separate from team_members.")
-        if len(set(team_members)) != len(team_members):
-            raise ValueError("team_members must be unique.")
-    elif meeting_type == "individual":
-        if team_member is None:
-            raise ValueError("Individual meeting requires `team_member`.")
-        if team_lead is not None or team_members is not None:
-            raise ValueError("Individual meeting does not use `team_lead` or `team_members`.")
-    else:
-        raise ValueError(f"Invalid meeting_type: {meeting_type!r}")
-
-    # Ensure at least one round
-    total_rounds = max(1, num_rounds)
+    _validate_meeting_args(meeting_type, team_lead, team_members, team_member)
+    _validate_prompt_layout(prompt_layout, stream, summarize_discussion, cache)
+
+    client = _meeting_client(
+        client,
+        provider,
+        cache,
+        prompt_layout,
+        _participants(team_lead, team_members, team_member),
+        asynchronous=False,
+    )
 
-    # Choose model
-    if meeting_type == "individual":
-        used_model = _choose_model(model, team_member)
-    else:
-        used_model = _choose_model(model, team_lead, *(team_members or ()))
+    meeting = _Meeting(
+        meeting_type=meeting_type,
+        agenda=agenda,
+        save_dir=save_dir,
+        save_name=save_name,
+        team_lead=team_lead,
+        team_members=team_members,
+        team_member=team_member,
+        agenda_questions=agenda_questions,
+        agenda_rules=agenda_rules,
+        summaries=summaries,
+        contexts=contexts,
+        num_rounds=num_rounds,
+        temperature=temperature,
+        pubmed_search=pubmed_search,
+        model=model,
+        ledger=ledger,
+        prompt_layout=prompt_layout,
+        summarize_discussion=summarize_discussion,
+        discussion_token_budget=discussion_token_budget,
+        save_transcript=save_transcript,
+        resume_from=resume_from,
+        save_trace=save_trace,
+        span_exporters=span_exporters,
+        early_stopping=early_stopping,
+        context_retrieval=context_retrieval,
+        provider=provider,
+    )
+    total_rounds, used_model = meeting.total_rounds, meeting.used_model
+    tracer, tracker = meeting.tracer, meeting.tracker
 
-    # Build the static "header" text that all agents will see
-    header_parts = [
-        _format_contexts(contexts),
-        _format_summaries(summaries),
-        _format_agenda(agenda),
-        _format_questions(agenda_questions),
-        _format_rules(agenda_rules),
-    ]
-    if pubmed_search:
-        header_parts.append(
-            "NOTE: You may conceptually draw on the biomedical literature (e.g. PubMed) "
-            "and assume access to typical knowledge from recent publications, but you "
-            "must still explain your reasoning in detail.\n\n"
+    def summarize(messages: list[dict[str, str]]) -> str:
+        call_model = _select_model(
+            "Summarizer", "context_summary", used_model, router, budget
         )
-    header_text = "".join(header_parts).strip()
+        request = {
+            "model": call_model,
+            "temperature": CONSISTENT_TEMPERATURE,
+            "messages": messages,
+        }
+        meeting.request_bytes += _request_bytes(request)
+        summary, usage, _ = _complete(client, request, limiter=rate_limiter)
+        meeting.add_usage(call_model, usage)
+        _add_token_counts(token_counts, usage)
+
+        if budget is not None:
+            budget.record(call_model, usage)
+
+        return summary
+
+    def take_turn(
+        agent: Agent,
+        instruction: str,
+        phase: Phase,
+        discussion_title: str = "PREVIOUS DISCUSSION",
+        round_number: int | None = None,
+    ) -> str:
+        replayed = bool(meeting.resumed_turns)
+
+        with tracer.span(
+            agent.title, "turn", agent=agent.title, round=round_number, replayed=replayed
+        ) as turn_span:
+            if replayed:
+                record = meeting.resumed_turns.popleft()
+                call_model = record.get("model") or used_model
+                message, usage, timing = _replay_turn(record, agent)
+            else:
+                call_model = _select_model(agent.title, phase, used_model, router, budget)
 
-    # Discussion transcript we will save
-    discussion: list[dict[str, str]] = []
-    if header_text:
-        discussion.append({"agent": "User", "message": header_text})
+                if meeting.discussion_context is not None:
+                    meeting.discussion_context.update(
+                        _transcript(meeting.discussion, meeting.header_text), summarize
+                    )
 
-    client = OpenAI()
-    start_time = time.time()
-    total_prompt_tokens = 0
-    total_completion_tokens = 0
+                request = meeting.request(
+                    agent, meeting.discussion, instruction, call_model, discussion_title
+                )
+                meeting.request_bytes += _request_bytes(request)
+                message, usage, timing = _complete(
+                    client, request, stream=stream, limiter=rate_limiter
+                )
+
+                if meeting.conversation_state is not None:
+                    meeting.conversation_state.update(agent.title, timing["response_id"])
+
+                if budget is not None:
+                    budget.record(call_model, usage)
+
+            _record_usage(turn_span, call_model, usage)
+
+        meeting.add_turn(agent, message, call_model, usage, timing, replayed)
+        _add_token_counts(token_counts, usage)
+
+        return message
+
+    with meeting.span(meeting_type) as meeting_span:
+        try:
+            # ------------------------------------------------------------------
+            # INDIVIDUAL MEETING: agent + critic + agent revision per round
+            # ------------------------------------------------------------------
+            if meeting_type == "individual":
+                main_agent = team_member  # type: ignore[assignment]
+                critic_agent = SCIENTIFIC_CRITIC
+
+                # The last message from main_agent is treated as summary
+                for round_idx in range(total_rounds):
+                    answer_instruction, critic_instruction, refinement_instruction = (
+                        individual_instructions(round_idx, total_rounds)
+                    )
+                    num_remaining_calls = 3 * (total_rounds - round_idx - 1)
+
+                    with tracer.span(
+                        f"round {round_idx + 1}", "round", round=round_idx + 1
+                    ):
+                        # Main agent draft or refinement
+                        final_summary = take_turn(
+                            main_agent,
+                            answer_instruction,
+                            "answer",
+                            round_number=round_idx + 1,
+                        )
+
+                        # Critic then analyses and suggests improvements
+                        critique = take_turn(
+                            critic_agent,
+                            _pass_instruction(
+                                critic_instruction, tracker, CRITIC_PASS_INSTRUCTION
+                            ),
+                            "critique",
+                            round_number=round_idx + 1,
+                        )
+
+                        # The answer stands if the critic passes
+                        if tracker is not None and is_pass(critique):
+                            tracker.skip()
+                            tracker.end_round(num_remaining_calls, converged=True)
+                            break
+
+                        # Final refinement by main agent in this round
+                        final_summary = take_turn(
+                            main_agent,
+                            refinement_instruction,
+                            "revision",
+                            round_number=round_idx + 1,
+                        )
+
+                    if tracker is not None:
+                        tracker.record_turn(main_agent.title, final_summary)
+
+                        if tracker.end_round(num_remaining_calls):
+                            break
+
+            # ------------------------------------------------------------------
+            # TEAM MEETING: multiple agents + final team_lead summary
+            # ------------------------------------------------------------------
+            else:  # meeting_type == "team"
+                assert team_lead is not None
+                assert team_members is not None
+
+                participants: list[Agent] = [team_lead] + list(team_members)
+
+                for round_idx in range(total_rounds):
+                    with tracer.span(
+                        f"round {round_idx + 1}", "round", round=round_idx + 1
+                    ):
+                        for agent in participants:
+                            # Skip agents that keep passing
+                            if tracker is not None and tracker.should_skip(agent.title):
+                                tracker.skip()
+                                continue
+
+                            instruction = _team_instruction(
+                                agent, team_lead, round_idx, total_rounds
+                            )
+                            if round_idx > 0:
+                                instruction = _pass_instruction(
+                                    instruction, tracker, PASS_INSTRUCTION
+                                )
+
+                            message = take_turn(
+                                agent,
+                                instruction,
+                                "discussion",
+                                round_number=round_idx + 1,
+                            )
+
+                            if tracker is not None:
+                                tracker.record_turn(agent.title, message)
+
+                    # Go straight to the final summary once the discussion has converged
+                    if tracker is not None and tracker.end_round(
+                        len(participants) * (total_rounds - round_idx - 1)
+                    ):
+                        break
+
+                # Final structured summary by team_lead
+                final_summary = take_turn(
+                    team_lead,
+                    _SUMMARY_INSTRUCTION,
+                    "summary",
+                    discussion_title="FULL DISCUSSION (truncated if very long)",
+                )
+        except BudgetExceededError as e:
+            # Stop early, keeping the discussion so far
+            meeting.stop_early(meeting_span, e)
+            final_summary = None
+
+        meeting.finish(meeting_span)
 
     # ------------------------------------------------------------------
-    # INDIVIDUAL MEETING: agent + critic + agent revision per round
+    # Save + usage / cost reporting
     # ------------------------------------------------------------------
-    if meeting_type == "individual":
-        main_agent = team_member  # type: ignore[assignment]
-        critic_agent = SCIENTIFIC_CRITIC
-
-        for round_idx in range(total_rounds):
-            # Main agent draft or refinement
-            round_label = f"ROUND {round_idx + 1}/{total_rounds}"
-            previous_text = _format_discussion_for_prompt(discussion)
-
-            if round_idx == 0:
-                instruction = (
-                    f"{round_label} — Initial answer.\n"
-                    "You are the primary scientist for this meeting.\n"
-                    "Provide a detailed, technically rigorous response to the agenda.\n"
-                    "Explicitly address all agenda questions and follow all meeting rules.\n"
-                    "Your answer should be structured, step-by-step, and implementable."
-                )
-            else:
-                instruction = (
-                    f"{round_label} — Refined answer.\n"
-                    "Improve and refine your previous answer given all prior discussion.\n"
-                    "Clarify assumptions, add missing details, and fix any issues that "
-                    "were revealed earlier.\n"
-                    "At the end, present a consolidated, self-contained answer."
-                )
+    meeting.save()
 
-            user_content = (
-                f"{header_text}\n\n"
-                f"PREVIOUS DISCUSSION:\n{previous_text or 'None yet.'}\n\n"
-                f"{instruction}"
-            )
+    return final_summary if return_summary else None
 
-            resp = client.chat.completions.create(
-                model=used_model,
-                temperature=temperature,
-                messages=[
-                    {"role": "system", "content": main_agent.prompt},
-                    {"role": "user", "content": user_content},
-                ],
-            )
 
-            message = resp.choices[0].message.content or ""
-            discussion.append({"agent": main_agent.title, "message": message})
-
-            if resp.usage:
-                total_prompt_tokens += resp.usage.prompt_tokens or 0
-                total_completion_tokens += resp.usage.completion_tokens or 0
-
-            # Critic then analyses and suggests improvements
-            previous_text = _format_discussion_for_prompt(discussion)
-            critic_instruction = (
-                f"{round_label} — Critique.\n"
-                "Carefully critique the primary scientist's most recent answer.\n"
-                "Identify weaknesses, missing considerations, questionable assumptions, "
-                "and possible failure modes.\n"
-                "Suggest concrete, actionable improvements. Do NOT rewrite the answer "
-                "yourself; focus purely on critique and guidance."
-            )
-            critic_user_content = (
-                f"{header_text}\n\n"
-                f"PREVIOUS DISCUSSION:\n{previous_text}\n\n"
-                f"{critic_instruction}"
-            )
+async def async_run_meeting(
+    meeting_type: Literal["team", "individual"],
+    agenda: str,
+    save_dir: Path,
+    save_name: str = "discussion",
+    team_lead: Agent | None = None,
+    team_members: tuple[Agent, ...] | None = None,
+    team_member: Agent | None = None,
+    agenda_questions: tuple[str, ...] = (),
+    agenda_rules: tuple[str, ...] = (),
+    summaries: tuple[str, ...] = (),
+    contexts: tuple[str, ...] = (),
+    num_rounds: int = 0,
+    temperature: float = CONSISTENT_TEMPERATURE,
+    pubmed_search: bool = False,
+    return_summary: bool = False,
+    model: str | None = None,
+    max_concurrency: int = 4,
+    client: AsyncOpenAI | None = None,
+    rate_limiter: RateLimiter | None = None,
+    token_counts: dict[str, int] | None = None,
+    ledger: TokenLedger | None = None,
+    cache: ResponseCache | None = None,
+    prompt_layout: PromptLayout = "single",
+    summarize_discussion: bool = False,
+    discussion_token_budget: int | None = None,
+    stream: bool = False,
+    save_transcript: bool = False,
+    resume_from: Path | None = None,
+    save_trace: bool = False,
+    span_exporters: tuple[SpanExporter, ...] = (),
+    router: ModelRouter | None = None,
+    budget: Budget | None = None,
+    early_stopping: EarlyStopping | None = None,
+    context_retrieval: ContextRetrieval | None = None,
+    provider: Provider = "openai",
+) -> str | None:
+    """
+    Runs a meeting with LLM agents (v2) on top of `AsyncOpenAI`.
+
+    Takes the same arguments as `run_meeting` and produces the same kind of
+    transcript, but in team meetings the team members within a round are
+    queried concurrently:
+
+        - `team_lead` opens each round on its own.
+        - All `team_members` then see the same discussion snapshot (including
+          the lead's message) and are queried at the same time, with at most
+          `max_concurrency` requests in flight.
+        - Their replies are appended in `team_members` order, so the
+          transcript is deterministic regardless of which reply arrives first.
+
+    Wall-clock time of a team meeting is therefore roughly
+    `num_rounds x (lead reply + slowest member reply)` plus the final summary.
+    Individual meetings are inherently sequential (answer -> critique ->
+    revision) and run exactly as in `run_meeting`.
+
+    :param max_concurrency: Maximum number of concurrent completion requests.
+    :param client: Optional `AsyncOpenAI`-compatible client (the pooled client
+                   of `provider` is used if None).
+    :param rate_limiter: Optional RateLimiter shared with other concurrent meetings
+                         (the process-wide limiter is used if None).
+    :return: Final summary string if `return_summary` else None.
 
-            resp_critic = client.chat.completions.create(
-                model=used_model,
-                temperature=temperature,
-                messages=[
-                    {"role": "system", "content": critic_agent.prompt},
-                    {"role": "user", "content": critic_user_content},
-                ],
-            )
+    See `run_meeting` for the remaining parameters.
+    """
+    _validate_meeting_args(meeting_type, team_lead, team_members, team_member)
+    _validate_prompt_layout(prompt_layout, stream, summarize_discussion, cache)
+
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1.")
+
+    client = _meeting_client(
+        client,
+        provider,
+        cache,
+        prompt_layout,
+        _participants(team_lead, team_members, team_member),
+        asynchronous=True,
+    )
 
-            critic_message = resp_critic.choices[0].message.content or ""
-            discussion.append({"agent": critic_agent.title, "message": critic_message})
-
-            if resp_critic.usage:
-                total_prompt_tokens += resp_critic.usage.prompt_tokens or 0
-                total_completion_tokens += resp_critic.usage.completion_tokens or 0
-
-            # Final refinement by main agent in this round
-            previous_text = _format_discussion_for_prompt(discussion)
-            refinement_instruction = (
-                f"{round_label} — Apply critique.\n"
-                "Revise and improve your earlier answer based on the critic's feedback.\n"
-                "You may substantially restructure your answer if needed.\n"
-                "Ensure the result is clear, rigorous, and directly addresses the agenda "
-                "and all agenda questions.\n"
-                "This revised answer will replace your earlier answer for this round."
-            )
-            refinement_user_content = (
-                f"{header_text}\n\n"
-                f"PREVIOUS DISCUSSION:\n{previous_text}\n\n"
-                f"{refinement_instruction}"
+    meeting = _Meeting(
+        meeting_type=meeting_type,
+        agenda=agenda,
+        save_dir=save_dir,
+        save_name=save_name,
+        team_lead=team_lead,
+        team_members=team_members,
+        team_member=team_member,
+        agenda_questions=agenda_questions,
+        agenda_rules=agenda_rules,
+        summaries=summaries,
+        contexts=contexts,
+        num_rounds=num_rounds,
+        temperature=temperature,
+        pubmed_search=pubmed_search,
+        model=model,
+        ledger=ledger,
+        prompt_layout=prompt_layout,
+        summarize_discussion=summarize_discussion,
+        discussion_token_budget=discussion_token_budget,
+        save_transcript=save_transcript,
+        resume_from=resume_from,
+        save_trace=save_trace,
+        span_exporters=span_exporters,
+        early_stopping=early_stopping,
+        context_retrieval=context_retrieval,
+        provider=provider,
+    )
+    total_rounds, used_model = meeting.total_rounds, meeting.used_model
+    tracer, tracker = meeting.tracer, meeting.tracker
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def complete(
+        request: dict[str, Any], call_stream: bool = stream
+    ) -> tuple[str, dict[str, int], dict[str, float | None]]:
+        queued = time.time()
+        meeting.request_bytes += _request_bytes(request)
+
+        async with semaphore:
+            result = await _async_complete(
+                client,
+                request,
+                stream=call_stream,
+                queue_seconds=time.time() - queued,
+                limiter=rate_limiter,
             )
 
-            resp_refined = client.chat.completions.create(
-                model=used_model,
-                temperature=temperature,
-                messages=[
-                    {"role": "system", "content": main_agent.prompt},
-                    {"role": "user", "content": refinement_user_content},
-                ],
-            )
+        _add_token_counts(token_counts, result[1])
 
-            refined_message = resp_refined.choices[0].message.content or ""
-            discussion.append({"agent": main_agent.title, "message": refined_message})
+        if budget is not None:
+            budget.record(request["model"], result[1])
 
-            if resp_refined.usage:
-                total_prompt_tokens += resp_refined.usage.prompt_tokens or 0
-                total_completion_tokens += resp_refined.usage.completion_tokens or 0
+        return result
 
-        # The final message from main_agent is treated as summary
-        final_summary = discussion[-1]["message"]
+    async def summarize(messages: list[dict[str, str]]) -> str:
+        call_model = _select_model(
+            "Summarizer", "context_summary", used_model, router, budget
+        )
+        summary, usage, _ = await complete(
+            {
+                "model": call_model,
+                "temperature": CONSISTENT_TEMPERATURE,
+                "messages": messages,
+            },
+            call_stream=False,
+        )
+        meeting.add_usage(call_model, usage)
+
+        return summary
+
+    async def take_turns(
+        agents: list[Agent],
+        instructions: list[str],
+        phase: Phase,
+        discussion_title: str = "PREVIOUS DISCUSSION",
+        round_number: int | None = None,
+    ) -> list[str]:
+        """Query agents concurrently on the current snapshot, then append in order."""
+        snapshot = list(meeting.discussion)
+
+        async def query(
+            agent: Agent, instruction: str, call_model: str
+        ) -> tuple[str, dict[str, int], dict[str, float | None]]:
+            with tracer.span(
+                agent.title, "turn", agent=agent.title, round=round_number, replayed=False
+            ) as turn_span:
+                request = meeting.request(
+                    agent, snapshot, instruction, call_model, discussion_title
+                )
+                result = await complete(request)
+                _record_usage(turn_span, call_model, result[1])
+
+                if meeting.conversation_state is not None:
+                    meeting.conversation_state.update(agent.title, result[2]["response_id"])
+
+            return result
+
+        # Turns recorded in a resumed transcript are replayed instead of queried
+        num_replayed = min(len(meeting.resumed_turns), len(agents))
+        results = []
+        models = []
+        for agent in agents[:num_replayed]:
+            with tracer.span(
+                agent.title, "turn", agent=agent.title, round=round_number, replayed=True
+            ) as turn_span:
+                record = meeting.resumed_turns.popleft()
+                models.append(record.get("model") or used_model)
+                results.append(_replay_turn(record, agent))
+                _record_usage(turn_span, models[-1], results[-1][1])
+                _add_token_counts(token_counts, results[-1][1])
+
+        if num_replayed < len(agents):
+            # Route (and check the budget) before any of the concurrent calls starts
+            models += [
+                _select_model(agent.title, phase, used_model, router, budget)
+                for agent in agents[num_replayed:]
+            ]
+
+            if meeting.discussion_context is not None:
+                await meeting.discussion_context.async_update(
+                    _transcript(snapshot, meeting.header_text), summarize
+                )
 
-    # ------------------------------------------------------------------
-    # TEAM MEETING: multiple agents + final team_lead summary
-    # ------------------------------------------------------------------
-    else:  # meeting_type == "team"
-        assert team_lead is not None
-        assert team_members is not None
-
-        participants: list[Agent] = [team_lead] + list(team_members)
-
-        for round_idx in range(total_rounds):
-            round_label = f"ROUND {round_idx + 1}/{total_rounds}"
-            for agent in participants:
-                previous_text = _format_discussion_for_prompt(discussion)
-
-                if round_idx == 0:
-                    if agent is team_lead:
-                        instruction = (
-                            f"{round_label} — Kickoff as Team Lead.\n"
-                            "Propose an overall strategy and structure for addressing the agenda.\n"
-                            "Highlight key decisions that need to be made and the roles of "
-                            "each team member.\n"
-                            "Provide an initial plan that the team can refine."
-                        )
-                    else:
-                        instruction = (
-                            f"{round_label} — Initial contribution as {agent.title}.\n"
-                            "Provide your expert perspective on the agenda.\n"
-                            "Identify key technical issues, risks, and opportunities "
-                            "from your area of expertise.\n"
-                            "Respond to any relevant agenda questions."
+            results += await asyncio.gather(
+                *(
+                    query(agent, instruction, call_model)
+                    for agent, instruction, call_model in zip(
+                        agents[num_replayed:],
+                        instructions[num_replayed:],
+                        models[num_replayed:],
+                    )
+                )
+            )
+
+        for index, (agent, call_model, (message, usage, timing)) in enumerate(
+            zip(agents, models, results)
+        ):
+            meeting.add_turn(
+                agent, message, call_model, usage, timing, replayed=index < num_replayed
+            )
+
+        return [message for message, _, _ in results]
+
+    with meeting.span(meeting_type) as meeting_span:
+        try:
+            if meeting_type == "individual":
+                main_agent = team_member  # type: ignore[assignment]
+                critic_agent = SCIENTIFIC_CRITIC
+
+                for round_idx in range(total_rounds):
+                    answer_instruction, critic_instruction, refinement_instruction = (
+                        individual_instructions(round_idx, total_rounds)
+                    )
+                    num_remaining_calls = 3 * (total_rounds - round_idx - 1)
+
+                    with tracer.span(
+                        f"round {round_idx + 1}", "round", round=round_idx + 1
+                    ):
+                        (final_summary,) = await take_turns(
+                            [main_agent],
+                            [answer_instruction],
+                            "answer",
+                            round_number=round_idx + 1,
                         )
-                else:
-                    if agent is team_lead:
-                        instruction = (
-                            f"{round_label} — Integrate and steer the discussion.\n"
-                            "Summarize the most important points raised so far, identify "
-                            "agreements and disagreements, and propose next steps.\n"
-                            "Refine the overall plan and keep the team focused on the agenda "
-                            "and agenda questions."
+                        (critique,) = await take_turns(
+                            [critic_agent],
+                            [
+                                _pass_instruction(
+                                    critic_instruction, tracker, CRITIC_PASS_INSTRUCTION
+                                )
+                            ],
+                            "critique",
+                            round_number=round_idx + 1,
                         )
-                    else:
-                        instruction = (
-                            f"{round_label} — Follow-up as {agent.title}.\n"
-                            "React to previous discussion, refine your earlier suggestions, "
-                            "and address any open questions or concerns.\n"
-                            "Be concrete and actionable."
+
+                        # The answer stands if the critic passes
+                        if tracker is not None and is_pass(critique):
+                            tracker.skip()
+                            tracker.end_round(num_remaining_calls, converged=True)
+                            break
+
+                        (final_summary,) = await take_turns(
+                            [main_agent],
+                            [refinement_instruction],
+                            "revision",
+                            round_number=round_idx + 1,
                         )
 
-                user_content = (
-                    f"{header_text}\n\n"
-                    f"PREVIOUS DISCUSSION:\n{previous_text or 'None yet.'}\n\n"
-                    f"{instruction}"
-                )
+                    if tracker is not None:
+                        tracker.record_turn(main_agent.title, final_summary)
 
-                resp = client.chat.completions.create(
-                    model=used_model,
-                    temperature=temperature,
-                    messages=[
-                        {"role": "system", "content": agent.prompt},
-                        {"role": "user", "content": user_content},
-                    ],
-                )
+                        if tracker.end_round(num_remaining_calls):
+                            break
 
-                message = resp.choices[0].message.content or ""
-                discussion.append({"agent": agent.title, "message": message})
+            else:  # meeting_type == "team"
+                assert team_lead is not None
+                assert team_members is not None
 
-                if resp.usage:
-                    total_prompt_tokens += resp.usage.prompt_tokens or 0
-                    total_completion_tokens += resp.usage.completion_tokens or 0
+                members = list(team_members)
 
-        # Final structured summary by team_lead
-        previous_text = _format_discussion_for_prompt(discussion)
-        summary_instruction = (
-            "FINAL SUMMARY.\n"
-            "As the team lead, write a clear, structured summary of the meeting.\n"
-            "You MUST:\n"
-            "  - Summarize the main ideas and decisions.\n"
-            "  - Explicitly answer all agenda questions.\n"
-            "  - Highlight open issues and proposed next steps.\n"
-            "  - Keep the summary self-contained (can be read without the transcript)."
-        )
-        summary_user_content = (
-            f"{header_text}\n\n"
-            f"FULL DISCUSSION (truncated if very long):\n{previous_text}\n\n"
-            f"{summary_instruction}"
-        )
+                for round_idx in range(total_rounds):
+                    # Skip agents that keep passing
+                    lead_turns, member_turns = [team_lead], members
+                    if tracker is not None:
+                        lead_turns, member_turns = (
+                            [a for a in agents if not tracker.should_skip(a.title)]
+                            for agents in (lead_turns, member_turns)
+                        )
+                        tracker.skip(
+                            1 + len(members) - len(lead_turns) - len(member_turns)
+                        )
 
-        resp_summary = client.chat.completions.create(
-            model=used_model,
-            temperature=temperature,
-            messages=[
-                {"role": "system", "content": team_lead.prompt},
-                {"role": "user", "content": summary_user_content},
-            ],
-        )
+                    instructions = {}
+                    for agent in [team_lead] + members:
+                        instruction = _team_instruction(
+                            agent, team_lead, round_idx, total_rounds
+                        )
+                        if round_idx > 0:
+                            instruction = _pass_instruction(
+                                instruction, tracker, PASS_INSTRUCTION
+                            )
+                        instructions[agent.title] = instruction
+
+                    with tracer.span(
+                        f"round {round_idx + 1}", "round", round=round_idx + 1
+                    ):
+                        # Team lead opens the round
+                        lead_messages = await take_turns(
+                            lead_turns,
+                            [instructions[agent.title] for agent in lead_turns],
+                            "discussion",
+                            round_number=round_idx + 1,
+                        )
+
+                        # Team members respond concurrently to the same snapshot
+                        member_messages = await take_turns(
+                            member_turns,
+                            [instructions[agent.title] for agent in member_turns],
+                            "discussion",
+                            round_number=round_idx + 1,
+                        )
 
-        final_summary = resp_summary.choices[0].message.content or ""
-        discussion.append({"agent": team_lead.title, "message": final_summary})
+                    # Go straight to the final summary once the discussion has converged
+                    if tracker is not None:
+                        for agent, message in zip(
+                            lead_turns + member_turns, lead_messages + member_messages
+                        ):
+                            tracker.record_turn(agent.title, message)
+
+                        if tracker.end_round(
+                            (1 + len(members)) * (total_rounds - round_idx - 1)
+                        ):
+                            break
+
+                (final_summary,) = await take_turns(
+                    [team_lead],
+                    [_SUMMARY_INSTRUCTION],
+                    "summary",
+                    discussion_title="FULL DISCUSSION (truncated if very long)",
+                )
+        except BudgetExceededError as e:
+            # Stop early, keeping the discussion so far
+            meeting.stop_early(meeting_span, e)
+            final_summary = None
 
-        if resp_summary.usage:
-            total_prompt_tokens += resp_summary.usage.prompt_tokens or 0
-            total_completion_tokens += resp_summary.usage.completion_tokens or 0
+        meeting.finish(meeting_span)
 
-    # ------------------------------------------------------------------
-    # Save + usage / cost reporting
-    # ------------------------------------------------------------------
-    elapsed = time.time() - start_time
-    save_meeting(save_dir=save_dir, save_name=save_name, discussion=discussion)
-    _print_usage_and_cost(
-        model=used_model,
-        total_prompt_tokens=total_prompt_tokens,
-        total_completion_tokens=total_completion_tokens,
-        elapsed_seconds=elapsed,
-    )
+    meeting.save()
 
     return final_summary if return_summary else None
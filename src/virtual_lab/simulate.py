@@ -0,0 +1,427 @@
+"""Predicts the tokens, cost, and latency of a meeting without calling the API (a dry run)."""
+
+from __future__ import annotations
+
+import contextlib
+import copy
+import hashlib
+import io
+import json
+import statistics
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterable
+
+from virtual_lab.backends import agent_system_prompt
+from virtual_lab.discussion_context import SUMMARIZER_SYSTEM_PROMPT
+from virtual_lab.mock import LatencyDistribution
+from virtual_lab.prompts import SCIENTIFIC_CRITIC
+from virtual_lab.rate_limiter import RateLimiter
+from virtual_lab.run_meeting_v2 import run_meeting
+from virtual_lab.tracing import SpanCollector, load_spans
+from virtual_lab.utils import count_tokens
+
+
+# Ways of showing the discussion to agents, as `run_meeting` arguments
+SIMULATED_LAYOUTS: dict[str, dict[str, Any]] = {
+    "truncated": {"prompt_layout": "single"},
+    "full": {"prompt_layout": "conversation"},
+    "summarized": {"prompt_layout": "conversation", "summarize_discussion": True},
+    "stateful": {"prompt_layout": "stateful"},
+}
+
+# Title under which the calls that summarize the discussion are reported
+SUMMARIZER_TITLE = "Summarizer"
+
+# Arguments of `run_meeting` that `simulate_meeting` ignores (they reach outside the dry run)
+_IGNORED_MEETING_ARGS = (
+    "save_dir",
+    "client",
+    "rate_limiter",
+    "cache",
+    "resume_from",
+    "ledger",
+    "token_counts",
+)
+
+# Input tokens of the chat format per message (role and separators)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@dataclass
+class SimulatedCall:
+    """The predicted usage of one LLM call of a meeting.
+
+    Attributes:
+        agent: The title of the agent (SUMMARIZER_TITLE for discussion summaries).
+        round: The round of the call (None for the final summary).
+        model: The model of the call.
+        input_tokens: The number of input tokens.
+        cached_tokens: The number of input tokens served from the prompt cache.
+        output_tokens: The number of output tokens.
+        cost: The cost in USD (None if the model has no pricing).
+        latency_seconds: The expected latency of the call.
+    """
+    agent: str
+    round: int | None
+    model: str
+    input_tokens: int
+    cached_tokens: int
+    output_tokens: int
+    cost: float | None
+    latency_seconds: float
+
+
+@dataclass
+class MeetingSimulation:
+    """The predicted usage of a meeting, call by call.
+
+    Attributes:
+        calls: The LLM calls in order.
+        request_bytes: The number of bytes of the requests sent.
+        layout: The name of the layout (see SIMULATED_LAYOUTS), if simulated by layout.
+    """
+    calls: list[SimulatedCall] = field(default_factory=list)
+    request_bytes: int = 0
+    layout: str | None = None
+
+    @property
+    def input_tokens(self) -> int:
+        """The total number of input tokens."""
+        return sum(call.input_tokens for call in self.calls)
+
+    @property
+    def cached_tokens(self) -> int:
+        """The total number of cached input tokens."""
+        return sum(call.cached_tokens for call in self.calls)
+
+    @property
+    def output_tokens(self) -> int:
+        """The total number of output tokens."""
+        return sum(call.output_tokens for call in self.calls)
+
+    @property
+    def cost(self) -> float | None:
+        """The total cost in USD (None if a model has no pricing)."""
+        costs = [call.cost for call in self.calls]
+
+        return None if None in costs else sum(costs)
+
+    @property
+    def latency_seconds(self) -> float:
+        """The expected duration of the meeting with sequential calls (as in `run_meeting`)."""
+        return sum(call.latency_seconds for call in self.calls)
+
+
+def fit_latency(spans: Iterable[dict[str, Any]]) -> dict[str, LatencyDistribution]:
+    """Fits the latency of each model to the LLM calls of recorded traces.
+
+    Streamed calls give the time to first token and decoding speed directly
+    (their medians are used). Otherwise, the duration of the calls is
+    regressed on their output tokens: the intercept is the time to first
+    token and the slope the time per output token.
+
+    :param spans: The spans as dictionaries (see `load_spans`).
+    :return: Mapping from model to its (constant) latency distribution.
+    """
+    model_calls: dict[str, list[dict[str, Any]]] = {}
+    for span_dict in spans:
+        attributes = span_dict["attributes"]
+        if (
+            span_dict["kind"] == "llm_call"
+            and span_dict["status"] == "ok"
+            and attributes.get("model")
+        ):
+            model_calls.setdefault(attributes["model"], []).append(span_dict)
+
+    latency = {}
+    for model, calls in model_calls.items():
+        streamed = [
+            call["attributes"]
+            for call in calls
+            if call["attributes"].get("time_to_first_token") is not None
+            and call["attributes"].get("tokens_per_second")
+        ]
+
+        if streamed:
+            time_to_first_token = statistics.median(a["time_to_first_token"] for a in streamed)
+            tokens_per_second = statistics.median(a["tokens_per_second"] for a in streamed)
+        else:
+            durations = [call["duration_seconds"] or 0.0 for call in calls]
+            output_tokens = [call["attributes"].get("completion_tokens") or 0 for call in calls]
+
+            slope = 0.0
+            if len(set(output_tokens)) > 1:
+                slope, intercept = statistics.linear_regression(output_tokens, durations)
+
+            if slope > 0:
+                time_to_first_token = max(intercept, 0.0)
+                tokens_per_second = 1 / slope
+            else:
+                time_to_first_token = statistics.median(durations)
+                tokens_per_second = float("inf")
+
+        latency[model] = LatencyDistribution(
+            distribution="constant",
+            time_to_first_token=time_to_first_token,
+            tokens_per_second=tokens_per_second,
+        )
+
+    return latency
+
+
+def _prompt_key(agent: Any) -> str:
+    """Returns the system prompt of an agent, or the ID of its stored prompt."""
+    system_prompt = agent_system_prompt(agent)
+
+    return system_prompt if system_prompt is not None else agent.pmpt_id
+
+
+class _SimulatedClient:
+    """An in-process stand-in for `OpenAI` that returns synthetic replies of the expected lengths.
+
+    Input tokens are counted with tiktoken, and the provider's prompt cache is
+    simulated (input tokens of the longest previously seen message prefix are
+    cached, from 1,024 tokens in increments of 128). Responses API requests
+    (the "stateful" layout) continue the stored conversation of their
+    `previous_response_id`. The text of stored prompts (`pmpt_id`) is not
+    known, so it is not counted in the input tokens of their calls.
+    """
+
+    def __init__(
+        self,
+        prompt_titles: dict[str, str],
+        output_tokens: dict[str, int],
+        default_output_tokens: int,
+        encoding_name: str,
+    ) -> None:
+        self.prompt_titles = prompt_titles
+        self.output_tokens = output_tokens
+        self.default_output_tokens = default_output_tokens
+        self.encoding_name = encoding_name
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.responses = SimpleNamespace(create=self._create_response)
+        self._token_counts: dict[str, int] = {}
+        self._seen_prefixes: set[str] = set()
+        self._conversations: dict[str, list[dict[str, str]]] = {}
+
+    def _count_tokens(self, text: str) -> int:
+        # The same header and turns are counted over and over, so counts are memoized
+        if text not in self._token_counts:
+            self._token_counts[text] = count_tokens(text, encoding_name=self.encoding_name)
+
+        return self._token_counts[text]
+
+    def _usage(self, messages: list[dict[str, str]]) -> tuple[int, int]:
+        """Returns the input tokens and cached input tokens of messages."""
+        prefix_hash = hashlib.sha256()
+        input_tokens = 0
+        cached_tokens = 0
+
+        for message in messages:
+            prefix_hash.update(json.dumps(message, sort_keys=True).encode("utf-8"))
+            input_tokens += self._count_tokens(str(message["content"])) + _MESSAGE_OVERHEAD_TOKENS
+            digest = prefix_hash.hexdigest()
+
+            if digest in self._seen_prefixes:
+                cached_tokens = input_tokens
+
+            self._seen_prefixes.add(digest)
+
+        if cached_tokens < 1024:
+            cached_tokens = 0
+
+        return input_tokens, cached_tokens // 128 * 128
+
+    def _reply(self, prompt_key: str) -> tuple[str, int]:
+        """Returns a synthetic reply of the expected length of the agent and its length."""
+        title = self.prompt_titles.get(prompt_key, SUMMARIZER_TITLE)
+        num_tokens = self.output_tokens.get(title, self.default_output_tokens)
+
+        # One token per word for common short words
+        return " ".join(["data"] * num_tokens), num_tokens
+
+    def _create_completion(self, messages: list[dict[str, str]], **kwargs: Any) -> Any:
+        reply, output_tokens = self._reply(messages[0]["content"])
+        input_tokens, cached_tokens = self._usage(messages)
+
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply))],
+            usage=SimpleNamespace(
+                prompt_tokens=input_tokens,
+                completion_tokens=output_tokens,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+            ),
+        )
+
+    def _create_response(
+        self,
+        input: list[dict[str, str]],
+        instructions: str | None = None,
+        prompt: dict[str, str] | None = None,
+        previous_response_id: str | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        reply, output_tokens = self._reply(instructions if instructions else prompt["id"])
+        conversation = self._conversations.get(previous_response_id, []) + input
+        input_tokens, cached_tokens = self._usage(
+            ([{"role": "system", "content": instructions}] if instructions else [])
+            + conversation
+        )
+
+        response_id = f"resp_sim_{uuid.uuid4().hex[:12]}"
+        self._conversations[response_id] = conversation + [
+            {"role": "assistant", "content": reply}
+        ]
+
+        return SimpleNamespace(
+            id=response_id,
+            output_text=reply,
+            usage=SimpleNamespace(
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                input_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+            ),
+        )
+
+
+def simulate_meeting(
+    output_tokens: dict[str, int] | None = None,
+    default_output_tokens: int = 500,
+    latency: dict[str, LatencyDistribution] | None = None,
+    trace_paths: Iterable[Path] = (),
+    encoding_name: str = "cl100k_base",
+    **meeting_kwargs: Any,
+) -> MeetingSimulation:
+    """Predicts the tokens, cost, and latency of every call of a meeting without calling the API.
+
+    The meeting is run by `run_meeting` (v2) against an in-process stand-in
+    client that replies with synthetic messages of the expected length of
+    each agent, so the prompts are exactly those of a real run (same layout,
+    truncation, summaries, routing, and early stopping settings). Input
+    tokens are counted with tiktoken and costs come from the pricing tables.
+    Nothing is saved and nothing is printed.
+
+    :param output_tokens: Mapping from agent title to the expected number of
+        output tokens of its turns (SUMMARIZER_TITLE for the summaries of
+        `summarize_discussion`).
+    :param default_output_tokens: The expected number of output tokens of other agents.
+    :param latency: Mapping from model to its latency distribution, which gives
+        each call a latency of time to first token plus decoding time.
+    :param trace_paths: Paths of recorded traces (`save_trace=True`) that the
+        latency of models not in `latency` is fit to (see `fit_latency`).
+        Models without either get the default LatencyDistribution.
+    :param encoding_name: The name of the encoding used to count tokens.
+    :param meeting_kwargs: The arguments of `run_meeting`. The arguments that
+        reach outside the dry run (`save_dir`, `client`, `rate_limiter`, `cache`,
+        `resume_from`, `ledger`, `token_counts`) are ignored, and a `budget`
+        is copied, so that it routes the simulated calls without being charged.
+    :return: The predicted usage of the meeting.
+    """
+    for name in _IGNORED_MEETING_ARGS:
+        meeting_kwargs.pop(name, None)
+
+    if meeting_kwargs.get("budget") is not None:
+        meeting_kwargs["budget"] = copy.copy(meeting_kwargs["budget"])
+
+    latency = {**fit_latency(load_spans(trace_paths)), **(latency or {})}
+    default_latency = LatencyDistribution(distribution="constant")
+
+    # Replies are sized by the agent, recognized by its prompt (the critic joins individual meetings)
+    participants = [
+        meeting_kwargs.get("team_lead"),
+        *(meeting_kwargs.get("team_members") or ()),
+        meeting_kwargs.get("team_member"),
+    ]
+    if meeting_kwargs.get("meeting_type") == "individual":
+        participants.append(SCIENTIFIC_CRITIC)
+
+    prompt_titles = {
+        _prompt_key(agent): agent.title for agent in participants if agent is not None
+    }
+    prompt_titles[SUMMARIZER_SYSTEM_PROMPT] = SUMMARIZER_TITLE
+
+    client = _SimulatedClient(
+        prompt_titles=prompt_titles,
+        output_tokens=output_tokens or {},
+        default_output_tokens=default_output_tokens,
+        encoding_name=encoding_name,
+    )
+    collector = SpanCollector()
+
+    # Silence the usage report of the meeting
+    with tempfile.TemporaryDirectory() as save_dir, contextlib.redirect_stdout(io.StringIO()):
+        run_meeting(
+            save_dir=Path(save_dir),
+            client=client,
+            rate_limiter=RateLimiter(max_retries=0),
+            span_exporters=(collector, *meeting_kwargs.pop("span_exporters", ())),
+            **meeting_kwargs,
+        )
+
+    turns = {span.span_id: span for span in collector.spans if span.kind == "turn"}
+    llm_calls = sorted(
+        (span for span in collector.spans if span.kind == "llm_call"),
+        key=lambda span: span.start_time,
+    )
+    simulation = MeetingSimulation()
+
+    for index, call_span in enumerate(llm_calls):
+        turn = turns[call_span.parent_id]
+        attributes = call_span.attributes
+
+        # Discussion summaries are made within a turn, before the agent's own call
+        is_summary = index + 1 < len(llm_calls) and llm_calls[index + 1].parent_id == turn.span_id
+        model_latency = latency.get(attributes["model"], default_latency)
+
+        simulation.calls.append(
+            SimulatedCall(
+                agent=SUMMARIZER_TITLE if is_summary else turn.attributes["agent"],
+                round=turn.attributes["round"],
+                model=attributes["model"],
+                input_tokens=attributes["prompt_tokens"],
+                cached_tokens=attributes["cached_tokens"],
+                output_tokens=attributes["completion_tokens"],
+                cost=attributes["cost"],
+                latency_seconds=model_latency.time_to_first_token
+                + model_latency.decode_seconds(attributes["completion_tokens"]),
+            )
+        )
+        simulation.request_bytes += attributes["request_bytes"]
+
+    return simulation
+
+
+def compare_layouts(
+    layouts: tuple[str, ...] = tuple(SIMULATED_LAYOUTS),
+    **simulate_kwargs: Any,
+) -> dict[str, MeetingSimulation]:
+    """Simulates a meeting with each layout of the discussion and prints a comparison.
+
+    :param layouts: The names of the layouts (see SIMULATED_LAYOUTS).
+    :param simulate_kwargs: The arguments of `simulate_meeting` (and `run_meeting`).
+    :return: Mapping from layout name to its simulation.
+    """
+    simulations = {}
+
+    for layout in layouts:
+        if layout not in SIMULATED_LAYOUTS:
+            raise ValueError(f'Unknown layout "{layout}".')
+
+        simulation = simulate_meeting(**{**simulate_kwargs, **SIMULATED_LAYOUTS[layout]})
+        simulation.layout = layout
+        simulations[layout] = simulation
+
+        cost_str = f"${simulation.cost:.2f}" if simulation.cost is not None else "cost unknown"
+        print(
+            f"{layout}: {len(simulation.calls):,} calls, "
+            f"input tokens {simulation.input_tokens:,} ({simulation.cached_tokens:,} cached), "
+            f"output tokens {simulation.output_tokens:,}, "
+            f"request bytes {simulation.request_bytes:,}, "
+            f"{cost_str}, {simulation.latency_seconds:.0f}s"
+        )
+
+    return simulations
@@ -0,0 +1,124 @@
+"""Incremental token accounting for meeting discussions."""
+
+from collections import defaultdict
+
+from virtual_lab.utils import count_tokens
+
+
+class TokenLedger:
+    """Tracks the token counts of a discussion as turns are added.
+
+    Every turn is tokenized exactly once, and the running prefix sums of the
+    turn token counts give the input size of each agent turn in O(1). This
+    gives the same totals as re-counting the whole discussion after every turn
+    (input = all previous turns, output = the turn itself) in linear time.
+
+    Totals are also broken down per agent and per model.
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base") -> None:
+        """Initializes an empty ledger.
+
+        :param encoding_name: The name of the tiktoken encoding used to count tokens.
+        """
+        self.encoding_name = encoding_name
+        self.turn_token_counts: list[int] = []
+        self.prefix_token_counts: list[int] = [0]
+        self.input = 0
+        self.output = 0
+        self.max = 0
+        self.tool = 0
+        self.agent_token_counts: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"input": 0, "output": 0}
+        )
+        self.model_token_counts: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"input": 0, "output": 0}
+        )
+
+    def __len__(self) -> int:
+        """Returns the number of turns in the ledger."""
+        return len(self.turn_token_counts)
+
+    def add_turn(self, agent: str, message: str, model: str | None = None) -> int:
+        """Adds a turn to the ledger.
+
+        Turns by "User" count towards the input of later turns but are not
+        themselves agent responses.
+
+        :param agent: The title of the agent (or "User") who produced the turn.
+        :param message: The message of the turn.
+        :param model: The model that produced the turn, if known.
+        :return: The number of tokens in the message.
+        """
+        num_tokens = count_tokens(message, encoding_name=self.encoding_name)
+        input_token_count = self.prefix_token_counts[-1]
+
+        if agent != "User":
+            self.input += input_token_count
+            self.output += num_tokens
+            self.max = max(self.max, input_token_count + num_tokens)
+
+            self.agent_token_counts[agent]["input"] += input_token_count
+            self.agent_token_counts[agent]["output"] += num_tokens
+
+            if model is not None:
+                self.model_token_counts[model]["input"] += input_token_count
+                self.model_token_counts[model]["output"] += num_tokens
+
+        self.turn_token_counts.append(num_tokens)
+        self.prefix_token_counts.append(input_token_count + num_tokens)
+
+        return num_tokens
+
+    def add_tool_tokens(self, num_tokens: int) -> None:
+        """Adds tokens of tool outputs (e.g., PubMed search results).
+
+        :param num_tokens: The number of tool output tokens.
+        """
+        self.tool += num_tokens
+
+    def input_token_count(self, index: int) -> int:
+        """Returns the number of tokens in all turns before turn `index`.
+
+        :param index: The index of the turn.
+        :return: The number of tokens in the discussion prefix.
+        """
+        return self.prefix_token_counts[index]
+
+    def token_counts(self) -> dict[str, int]:
+        """Returns the total token counts in the format of `count_discussion_tokens`.
+
+        :return: A dictionary with "input", "output", "max", and "tool" token counts.
+        """
+        return {
+            "input": self.input,
+            "output": self.output,
+            "max": self.max,
+            "tool": self.tool,
+        }
+
+    @classmethod
+    def from_discussion(
+        cls,
+        discussion: list[dict[str, str]],
+        agent_to_model: dict[str, str] | None = None,
+        encoding_name: str = "cl100k_base",
+    ) -> "TokenLedger":
+        """Builds a ledger from an existing discussion.
+
+        :param discussion: The discussion (list of turns with "agent" and "message").
+        :param agent_to_model: Optional mapping from agent title to the model it used.
+        :param encoding_name: The name of the tiktoken encoding used to count tokens.
+        :return: The ledger with all turns added.
+        """
+        agent_to_model = agent_to_model or {}
+        ledger = cls(encoding_name=encoding_name)
+
+        for turn in discussion:
+            ledger.add_turn(
+                agent=turn["agent"],
+                message=turn["message"],
+                model=agent_to_model.get(turn["agent"]),
+            )
+
+        return ledger
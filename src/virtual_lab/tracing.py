@@ -0,0 +1,282 @@
+"""Structured tracing of meetings as nested spans (meeting -> round -> turn -> LLM/tool call)."""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Protocol
+
+
+@dataclass
+class Span:
+    """A timed unit of work with attributes (e.g., tokens and cost) and a parent span."""
+
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_time: float
+    end_time: float | None = None
+    status: str = "ok"
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_seconds(self) -> float | None:
+        """The duration of the span in seconds (None if it has not ended)."""
+        return self.end_time - self.start_time if self.end_time is not None else None
+
+    def set(self, **attributes: Any) -> None:
+        """Sets attributes of the span.
+
+        :param attributes: JSON-serializable attributes.
+        """
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the span as a JSON-serializable dictionary."""
+        return {**asdict(self), "duration_seconds": self.duration_seconds}
+
+
+class SpanExporter(Protocol):
+    """Receives spans as they start and end."""
+
+    def on_start(self, span: Span) -> None: ...
+
+    def on_end(self, span: Span) -> None: ...
+
+
+class SpanCollector:
+    """Collects finished spans in memory (e.g., to analyze a meeting after it runs)."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+class JsonlSpanExporter:
+    """Appends every finished span as one JSON line to a file."""
+
+    def __init__(self, path: Path) -> None:
+        """Initializes the exporter, starting a new file.
+
+        :param path: The path to the JSONL file.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("", encoding="utf-8")
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(span.to_dict(), default=str) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class OpenTelemetryExporter:
+    """Mirrors spans to OpenTelemetry so they can be sent to any OTel backend.
+
+    Requires the `opentelemetry-api` package (and an SDK with a configured
+    exporter to actually send spans somewhere).
+    """
+
+    def __init__(self, tracer_name: str = "virtual_lab") -> None:
+        """Initializes the exporter.
+
+        :param tracer_name: The name of the OpenTelemetry tracer.
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError(
+                "OpenTelemetryExporter requires opentelemetry, "
+                "install it with `pip install opentelemetry-api opentelemetry-sdk`."
+            )
+
+        self._trace = trace
+        self._tracer = trace.get_tracer(tracer_name)
+        self._otel_spans: dict[str, Any] = {}
+
+    def on_start(self, span: Span) -> None:
+        parent = self._otel_spans.get(span.parent_id)
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+
+        self._otel_spans[span.span_id] = self._tracer.start_span(
+            name=span.name,
+            context=context,
+            start_time=int(span.start_time * 1e9),
+            attributes={"virtual_lab.kind": span.kind},
+        )
+
+    def on_end(self, span: Span) -> None:
+        otel_span = self._otel_spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+
+        # OpenTelemetry attributes must be primitives
+        for key, value in span.attributes.items():
+            if value is not None:
+                otel_span.set_attribute(
+                    key, value if isinstance(value, (bool, int, float, str)) else str(value)
+                )
+
+        if span.status == "error":
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+
+        otel_span.end(end_time=int(span.end_time * 1e9))
+
+
+_current_tracer: ContextVar[Tracer | None] = ContextVar("current_tracer", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Records spans and passes them to exporters.
+
+    The active span is tracked with context variables, so spans opened inside
+    concurrently gathered coroutines are nested under the span that was
+    active when they were created.
+    """
+
+    def __init__(self, exporters: Iterable[SpanExporter] = ()) -> None:
+        """Initializes the tracer.
+
+        :param exporters: The exporters that receive the spans (e.g., JsonlSpanExporter).
+        """
+        self.exporters = list(exporters)
+        self.spans: list[Span] = []
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes: Any) -> Iterator[Span]:
+        """Opens a span as a child of the active span (if any).
+
+        Exceptions are recorded on the span (status "error") and re-raised.
+
+        :param name: The name of the span.
+        :param kind: The kind of span ("meeting", "round", "turn", "llm_call", "tool_call").
+        :param attributes: Initial attributes of the span.
+        :return: A context manager yielding the span.
+        """
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent is not None else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent is not None else None,
+            start_time=time.time(),
+            attributes=dict(attributes),
+        )
+
+        for exporter in self.exporters:
+            exporter.on_start(span)
+
+        tracer_token = _current_tracer.set(self)
+        span_token = _current_span.set(span)
+
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.set(error=repr(e))
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_tracer.reset(tracer_token)
+            span.end_time = time.time()
+            self.spans.append(span)
+
+            for exporter in self.exporters:
+                exporter.on_end(span)
+
+
+@contextmanager
+def span(name: str, kind: str, **attributes: Any) -> Iterator[Span | None]:
+    """Opens a span in the active tracer, or does nothing if no tracer is active.
+
+    This lets lower-level code (e.g., tool calls) be traced when it is called
+    from a traced meeting without passing the tracer around.
+
+    :param name: The name of the span.
+    :param kind: The kind of span.
+    :param attributes: Initial attributes of the span.
+    :return: A context manager yielding the span or None.
+    """
+    tracer = _current_tracer.get()
+
+    if tracer is None:
+        yield None
+        return
+
+    with tracer.span(name, kind, **attributes) as active_span:
+        yield active_span
+
+
+def load_spans(paths: Iterable[Path]) -> list[dict[str, Any]]:
+    """Loads spans from one or more JSONL trace files.
+
+    :param paths: The paths to the JSONL trace files.
+    :return: The list of spans as dictionaries.
+    """
+    spans = []
+
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            spans += [json.loads(line) for line in file if line.strip()]
+
+    return spans
+
+
+def summarize_spans(
+    spans: Iterable[dict[str, Any]], kind: str = "turn", group_by: str = "agent"
+) -> dict[Any, dict[str, float]]:
+    """Aggregates the duration, tokens, and cost of spans of one kind by an attribute.
+
+    E.g., `summarize_spans(load_spans(paths), kind="turn", group_by="agent")` shows
+    which agents dominate latency and spend across many meetings.
+
+    :param spans: The spans as dictionaries (see `load_spans`).
+    :param kind: The kind of spans to aggregate.
+    :param group_by: The attribute to group the spans by.
+    :return: A mapping from attribute value to the number of spans and the total
+        "duration_seconds", "prompt_tokens", "completion_tokens", "cached_tokens", and "cost".
+    """
+    totals: dict[Any, dict[str, float]] = defaultdict(
+        lambda: {
+            "count": 0,
+            "duration_seconds": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
+            "cost": 0.0,
+        }
+    )
+
+    for span_dict in spans:
+        if span_dict["kind"] != kind:
+            continue
+
+        attributes = span_dict["attributes"]
+        group = totals[attributes.get(group_by)]
+        group["count"] += 1
+        group["duration_seconds"] += span_dict["duration_seconds"] or 0.0
+
+        for key in ("prompt_tokens", "completion_tokens", "cached_tokens", "cost"):
+            group[key] += attributes.get(key) or 0
+
+    return dict(totals)
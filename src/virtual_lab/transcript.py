@@ -0,0 +1,86 @@
+"""Append-only JSONL transcripts that are written turn by turn during a meeting."""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+
+class TranscriptWriter:
+    """Appends each finished turn of a meeting to a JSONL file.
+
+    Every turn is written (and flushed to disk) as soon as it is available, so
+    the transcript survives a crash mid-meeting and can be followed live with
+    `tail -f`. Each line is a JSON object with the turn "index", "agent",
+    "message", a "timestamp", and any metadata (e.g., model, usage, latency).
+    """
+
+    def __init__(self, path: Path, append: bool = False) -> None:
+        """Initializes the transcript writer.
+
+        :param path: The path to the JSONL transcript.
+        :param append: Whether to append to an existing transcript instead of starting a new one.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if append and self.path.exists():
+            # Rewrite the valid records to drop a partially written last line
+            records = load_transcript(self.path)
+            tmp_path = self.path.with_suffix(".jsonl.tmp")
+            tmp_path.write_text(
+                "".join(json.dumps(record) + "\n" for record in records),
+                encoding="utf-8",
+            )
+            tmp_path.replace(self.path)
+            self.num_turns = len(records)
+        else:
+            self.path.write_text("", encoding="utf-8")
+            self.num_turns = 0
+
+    def write_turn(self, agent: str, message: str, **metadata: Any) -> None:
+        """Appends a turn to the transcript.
+
+        :param agent: The title of the agent (or "User") who produced the turn.
+        :param message: The message of the turn.
+        :param metadata: Additional JSON-serializable fields to record with the turn.
+        """
+        record = {
+            "index": self.num_turns,
+            "agent": agent,
+            "message": message,
+            "timestamp": time.time(),
+            **metadata,
+        }
+
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.num_turns += 1
+
+
+def load_transcript(path: Path) -> list[dict[str, Any]]:
+    """Loads the turns of a JSONL transcript.
+
+    A partially written last line (e.g., from a crash during a write) is ignored.
+
+    :param path: The path to the JSONL transcript.
+    :return: The list of turn records in order.
+    """
+    records = []
+
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+
+    return records
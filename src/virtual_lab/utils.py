@@ -1,14 +1,13 @@
 """Contains useful utility functions."""
 
+from __future__ import annotations
+
 import json
-import urllib.parse
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import requests
-import tiktoken
-from openai import AsyncOpenAI, OpenAI
-from openai.types.beta.threads.run import Run
-
+from virtual_lab.archive import MeetingArchive
 from virtual_lab.constants import (
     DEFAULT_FINETUNING_EPOCHS,
     MODEL_TO_INPUT_PRICE_PER_TOKEN,
@@ -17,6 +16,14 @@ from virtual_lab.constants import (
     PUBMED_TOOL_NAME,
 )
 from virtual_lab.prompts import format_references
+from virtual_lab.pubmed import get_pubmed_client, select_article_content
+from virtual_lab.tracing import span
+
+# openai and tiktoken are slow to import, so they are only imported on first use
+if TYPE_CHECKING:
+    import tiktoken
+    from openai import AsyncOpenAI, OpenAI
+    from openai.types.beta.threads.run import Run
 
 
 def get_pubmed_central_article(
@@ -25,103 +32,83 @@ def get_pubmed_central_article(
     """Gets the title and content (abstract or full text) of a PubMed Central article given a PMC ID.
 
     Note: This only returns main text, ignoring tables, figures, and references.
+    Articles are fetched through the process-wide PubMed client (see `virtual_lab.pubmed`),
+    which caches them on disk by PMC ID.
 
     :param pmcid: The PMC ID of the article.
     :param abstract_only: Whether to return only the abstract instead of the full text.
     :return: The title and content (abstract or full text of the article as a list of paragraphs)
         or None if the article is not found.
     """
-    # Get article from PMC ID in JSON form
-    text_url = f"https://www.ncbi.nlm.nih.gov/research/bionlp/RESTful/pmcoa.cgi/BioC_JSON/PMC{pmcid}/unicode"
-    response = requests.get(text_url)
-    response.raise_for_status()
-
-    # Try to parse JSON
-    try:
-        article = response.json()
-    except json.JSONDecodeError:
-        return None, None
-
-    # Get document
-    document = article[0]["documents"][0]
-
-    # Get title
-    title = next(
-        passage["text"]
-        for passage in document["passages"]
-        if passage["infons"]["section_type"] == "TITLE"
-    )
+    article = get_pubmed_client().get_article(pmcid)
 
-    # Get relevant passages
-    passages = [
-        passage
-        for passage in document["passages"]
-        if passage["infons"]["type"] in {"abstract", "paragraph"}
-    ]
-
-    # Get abstract or full text of article (excluding references)
-    if abstract_only:
-        passages = [
-            passage
-            for passage in passages
-            if passage["infons"]["section_type"] in ["ABSTRACT"]
-        ]
-    else:
-        passages = [
-            passage
-            for passage in passages
-            if passage["infons"]["section_type"]
-            in ["ABSTRACT", "INTRO", "RESULTS", "DISCUSS", "CONCL", "METHODS"]
-        ]
-
-    # Get content
-    content = [passage["text"] for passage in passages]
-
-    return title, content
+    return select_article_content(article, abstract_only=abstract_only)
 
 
 def run_pubmed_search(
     query: str, num_articles: int = 3, abstract_only: bool = False
 ) -> str:
-    """Runs a PubMed search, returning the full text of the top matching article.
+    """Runs a PubMed search, returning the text of the top matching articles.
+
+    If the PubMed client has a `passage_token_budget`, only the passages of the
+    articles most relevant to the query are returned (within the budget),
+    otherwise the full text (or abstract) of each article.
 
     :param query: The query to search PubMed with.
     :param num_articles: The number of articles to search for.
     :param abstract_only: Whether to return only the abstract instead of the full text.
-    :return: The full text of the top matching article.
+    :return: The text of the top matching articles.
     """
     # Print search query
     print(
-        f'Searching PubMed Central for {num_articles} articles ({'abstracts' if abstract_only else 'full text'}) with query: "{query}"'
+        f'Searching PubMed Central for {num_articles} articles ({"abstracts" if abstract_only else "full text"}) with query: "{query}"'
     )
 
-    # Perform PubMed Central search for query to get PMC ID
-    search_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi?db=pmc&term={urllib.parse.quote_plus(query)}&retmax={2 * num_articles}&retmode=json&sort=relevance"
-    response = requests.get(search_url)
-    response.raise_for_status()
-    pmcids_found = response.json()["esearchresult"]["idlist"]
+    # Perform PubMed Central search for query to get PMC IDs (cached with a TTL)
+    client = get_pubmed_client()
+    pmcids_found = client.search(query, retmax=2 * num_articles)
 
-    # Loop through top articles
-    texts = []
+    # Loop through top articles in order of relevance
+    contents = []
     titles = []
     pmcids = []
+    remaining = list(pmcids_found)
 
-    for pmcid in pmcids_found:
-        # Break if reached desired number of articles
-        if len(pmcids) >= num_articles:
-            break
+    while remaining and len(pmcids) < num_articles:
+        # Fetch just enough articles concurrently to fill the rest (cached by PMC ID)
+        batch = remaining[: num_articles - len(pmcids)]
+        remaining = remaining[len(batch):]
+
+        for pmcid, article in zip(batch, client.get_articles(batch)):
+            title, content = select_article_content(article, abstract_only=abstract_only)
+
+            if title is None:
+                continue
+
+            contents.append(content)
+            titles.append(title)
+            pmcids.append(pmcid)
+
+    # Keep only the passages most relevant to the query (passage indexes are cached by PMC ID)
+    if client.passage_token_budget is not None and pmcids:
+        from virtual_lab.retrieval import select_article_passages
 
-        title, content = get_pubmed_central_article(
-            pmcid=pmcid,
-            abstract_only=abstract_only,
+        contents = select_article_passages(
+            query=query,
+            articles=[client.get_passage_index(pmcid, abstract_only) for pmcid in pmcids],
+            token_budget=client.passage_token_budget,
+            embedding_weight=client.passage_embedding_weight,
         )
 
-        if title is None:
-            continue
+        print(
+            f"Selected {sum(len(content) for content in contents):,} passages relevant to the query "
+            f"(budget {client.passage_token_budget:,} tokens)"
+        )
 
-        texts.append(f"PMCID = {pmcid}\n\nTitle = {title}\n\n{'\n\n'.join(content)}")
-        titles.append(title)
-        pmcids.append(pmcid)
+    texts = [
+        f"PMCID = {pmcid}\n\nTitle = {title}\n\n" + "\n\n".join(content)
+        for pmcid, title, content in zip(pmcids, titles, contents)
+    ]
 
     # Print articles found
     article_count = len(texts)
@@ -156,11 +143,20 @@ def run_tools(run: Run) -> list[dict[str, str]]:
             # Extract the query from the tool arguments
             args_dict = json.loads(tool.function.arguments)
 
-            # Run the tool and append the output to the list of tool outputs
+            # Run the tool (traced if a meeting tracer is active)
+            with span(
+                tool.function.name, "tool_call", tool=tool.function.name, **args_dict
+            ) as tool_span:
+                output = run_pubmed_search(**args_dict)
+
+                if tool_span is not None:
+                    tool_span.set(output_tokens=count_tokens(output))
+
+            # Append the output to the list of tool outputs
             tool_outputs.append(
                 {
                     "tool_call_id": tool.id,
-                    "output": run_pubmed_search(**args_dict),
+                    "output": output,
                 }
             )
         else:
@@ -260,6 +256,18 @@ async def async_get_messages(client: AsyncOpenAI, thread_id: str) -> list[dict]:
     return messages
 
 
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = "cl100k_base") -> tiktoken.Encoding:
+    """Returns the (cached) tiktoken encoder for an encoding name.
+
+    :param encoding_name: The name of the encoding.
+    :return: The tiktoken encoder.
+    """
+    import tiktoken
+
+    return tiktoken.get_encoding(encoding_name)
+
+
 def count_tokens(string: str, encoding_name: str = "cl100k_base") -> int:
     """Returns the number of tokens in a text string.
 
@@ -267,7 +275,7 @@ def count_tokens(string: str, encoding_name: str = "cl100k_base") -> int:
     :param encoding_name: The name of the encoding to use.
     :return: The number of tokens in the text string.
     """
-    encoding = tiktoken.get_encoding(encoding_name)
+    encoding = get_encoding(encoding_name)
     num_tokens = len(encoding.encode(string))
 
     return num_tokens
@@ -300,22 +308,15 @@ def count_discussion_tokens(
 ) -> dict[str, int]:
     """Counts the number of tokens in a discussion.
 
+    Each turn is tokenized once (see TokenLedger), so this is linear in the length of the discussion.
+
     :param discussion: The discussion to count tokens in.
     :return: A dictionary of token counts.
     """
-    token_counts = {
-        "input": 0,
-        "output": 0,
-        "max": 0,
-    }
+    from virtual_lab.token_ledger import TokenLedger
 
-    for index, turn in enumerate(discussion):
-        if turn["agent"] != "User":
-            update_token_counts(
-                token_counts=token_counts,
-                discussion=discussion[:index],
-                response=turn["message"],
-            )
+    token_counts = TokenLedger.from_discussion(discussion).token_counts()
+    del token_counts["tool"]
 
     return token_counts
 
@@ -417,14 +418,24 @@ def get_summary(discussion: list[dict[str, str]]) -> str:
     return discussion[-1]["message"]
 
 
-def load_summaries(discussion_paths: list[Path]) -> tuple[str, ...]:
+def load_summaries(
+    discussion_paths: list[Path], archive: MeetingArchive | None = None
+) -> tuple[str, ...]:
     """Load summaries from a list of discussion paths.
 
     :param discussion_paths: The paths to the discussion JSON files. The summary is the last entry in the discussion.
+    :param archive: Optional MeetingArchive. Summaries of archived discussions are read
+                    from its index instead of parsing the discussion files.
     :return: A tuple of summaries.
     """
+    archived = archive.summaries_by_path(discussion_paths) if archive is not None else {}
+
     summaries = []
     for discussion_path in discussion_paths:
+        if discussion_path in archived:
+            summaries.append(archived[discussion_path])
+            continue
+
         with open(discussion_path, "r") as file:
             discussion = json.load(file)
         summaries.append(get_summary(discussion))
@@ -433,13 +444,18 @@ def load_summaries(discussion_paths: list[Path]) -> tuple[str, ...]:
 
 
 def save_meeting(
-    save_dir: Path, save_name: str, discussion: list[dict[str, str]]
+    save_dir: Path,
+    save_name: str,
+    discussion: list[dict[str, str]],
+    archive: MeetingArchive | None = None,
 ) -> None:
     """Save a meeting discussion to JSON and Markdown files.
 
     :param save_dir: The directory to save the discussion.
     :param save_name: The name of the discussion file that will be saved.
     :param discussion: The discussion to save.
+    :param archive: Optional MeetingArchive that also indexes the discussion
+                    (under the name `save_dir / save_name`).
     """
     # Create the save directory if it does not exist
     save_dir.mkdir(parents=True, exist_ok=True)
@@ -452,3 +468,11 @@ def save_meeting(
     with open(save_dir / f"{save_name}.md", "w") as file:
         for turn in discussion:
             file.write(f"## {turn['agent']}\n\n{turn['message']}\n\n")
+
+    # Index the discussion in the archive
+    if archive is not None:
+        archive.add_meeting(
+            name=(save_dir / save_name).as_posix(),
+            discussion=discussion,
+            path=save_dir / f"{save_name}.json",
+        )
@@ -0,0 +1,404 @@
+"""Runs research workflows as a graph of meetings, with concurrency, caching and resume."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import os
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Literal
+
+from openai import AsyncOpenAI
+
+from virtual_lab.agent import Agent
+from virtual_lab.backends import Provider, get_client
+from virtual_lab.constants import CONSISTENT_TEMPERATURE
+from virtual_lab.parallel_meetings import (
+    MeetingRun,
+    async_run_one_meeting,
+    meeting_input_hash,
+)
+from virtual_lab.rate_limiter import RateLimiter
+from virtual_lab.response_cache import AsyncCachedOpenAI, ResponseCache
+from virtual_lab.routing import Budget, ModelRouter
+from virtual_lab.run_meeting_v2 import async_run_meeting
+
+
+WORKFLOW_STATE_FILE = "workflow_state.json"
+
+# Arguments of `async_run_meeting` that `Workflow.async_run` sets for every meeting
+_WORKFLOW_MEETING_ARGS = frozenset(
+    {
+        "save_name",
+        "save_dir",
+        "return_summary",
+        "token_counts",
+        "max_concurrency",
+        "client",
+        "provider",
+        "rate_limiter",
+        "router",
+        "budget",
+        "save_trace",
+    }
+)
+
+
+@dataclass
+class MeetingNode:
+    """A meeting in a workflow.
+
+    The summaries of the meetings it depends on are passed to it (in
+    `depends_on` order, after its own `summaries`), so it runs once they
+    have all finished.
+
+    Attributes:
+        name: The unique name of the node, also the save name of its discussion.
+        meeting_type: "team" or "individual".
+        agenda: The agenda for the meeting.
+        depends_on: Names of the nodes whose summaries the meeting receives.
+        team_lead: Team lead for team meetings.
+        team_members: Team members for team meetings.
+        team_member: Single agent for individual meetings.
+        agenda_questions: Questions that must be answered.
+        agenda_rules: Rules that must be followed.
+        summaries: Additional summaries (e.g., of meetings outside the workflow).
+        contexts: Additional context strings.
+        num_rounds: Number of discussion rounds.
+        temperature: Sampling temperature for all calls.
+        model: Optional explicit model name to use.
+        meeting_kwargs: Additional keyword arguments of `async_run_meeting`
+            (e.g., `prompt_layout` or `early_stopping`). They may not repeat the
+            node's fields or the arguments set by `Workflow.async_run`.
+    """
+    name: str
+    meeting_type: Literal["team", "individual"]
+    agenda: str
+    depends_on: tuple[str, ...] = ()
+    team_lead: Agent | None = None
+    team_members: tuple[Agent, ...] | None = None
+    team_member: Agent | None = None
+    agenda_questions: tuple[str, ...] = ()
+    agenda_rules: tuple[str, ...] = ()
+    summaries: tuple[str, ...] = ()
+    contexts: tuple[str, ...] = ()
+    num_rounds: int = 0
+    temperature: float = CONSISTENT_TEMPERATURE
+    model: str | None = None
+    meeting_kwargs: dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        """Checks that `meeting_kwargs` are further arguments of `async_run_meeting`."""
+        node_args = {item.name for item in fields(self)} - {
+            "name",
+            "depends_on",
+            "meeting_kwargs",
+        }
+        overlap = sorted(self.meeting_kwargs.keys() & (node_args | _WORKFLOW_MEETING_ARGS))
+        if overlap:
+            raise ValueError(
+                f'meeting_kwargs of node "{self.name}" repeat {", ".join(overlap)}, '
+                "which are set by the node's fields or by Workflow.async_run."
+            )
+
+        unknown = sorted(
+            self.meeting_kwargs.keys() - inspect.signature(async_run_meeting).parameters.keys()
+        )
+        if unknown:
+            raise ValueError(
+                f'meeting_kwargs of node "{self.name}" are not arguments of '
+                f"async_run_meeting: {', '.join(unknown)}"
+            )
+
+    def meeting_args(self, upstream_summaries: tuple[str, ...]) -> dict[str, Any]:
+        """Returns the arguments of the meeting given the summaries of its dependencies."""
+        return {
+            "meeting_type": self.meeting_type,
+            "agenda": self.agenda,
+            "team_lead": self.team_lead,
+            "team_members": self.team_members,
+            "team_member": self.team_member,
+            "agenda_questions": self.agenda_questions,
+            "agenda_rules": self.agenda_rules,
+            "summaries": self.summaries + upstream_summaries,
+            "contexts": self.contexts,
+            "num_rounds": self.num_rounds,
+            "temperature": self.temperature,
+            "model": self.model,
+            **self.meeting_kwargs,
+        }
+
+
+@dataclass
+class WorkflowResult:
+    """The outcome of a workflow run.
+
+    Attributes:
+        runs: Mapping from node name to the outcome of its meeting, in
+            completion order (cached nodes have no token counts).
+        cached: Names of the nodes whose summaries were reused from an earlier run.
+        skipped: Names of the nodes not run because a dependency failed.
+        elapsed_seconds: Wall-clock time of the workflow.
+    """
+    runs: dict[str, MeetingRun] = field(default_factory=dict)
+    cached: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def summaries(self) -> dict[str, str]:
+        """Mapping from node name to summary for the nodes that succeeded."""
+        return {
+            name: run.summary for name, run in self.runs.items() if run.summary is not None
+        }
+
+
+class Workflow:
+    """A graph of meetings whose edges pass summaries from one meeting to the next.
+
+    Independent meetings run concurrently, so a workflow takes roughly as long
+    as its critical path. The input hash and summary of every finished meeting
+    are recorded in `save_dir / "workflow_state.json"` as soon as it finishes.
+    On a later run, a meeting whose inputs (agenda, agents, settings and the
+    summaries it receives) are unchanged and whose discussion is still saved
+    reuses its summary instead of running again. An interrupted or partially
+    failed workflow therefore resumes where it stopped, and editing a node
+    re-runs only that node and the nodes downstream of it.
+    """
+
+    def __init__(self, nodes: list[MeetingNode], save_dir: Path) -> None:
+        """Initializes the workflow.
+
+        :param nodes: The meetings of the workflow.
+        :param save_dir: Directory to save the discussions and the workflow state.
+        """
+        self.nodes = {node.name: node for node in nodes}
+        self.save_dir = save_dir
+
+        if len(self.nodes) != len(nodes):
+            raise ValueError("Workflow nodes must have unique names.")
+
+        for node in nodes:
+            for dependency in node.depends_on:
+                if dependency not in self.nodes:
+                    raise ValueError(
+                        f'Node "{node.name}" depends on unknown node "{dependency}".'
+                    )
+
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> list[str]:
+        """Returns the node names such that every node comes after its dependencies."""
+        order: list[str] = []
+        state: dict[str, str] = {}
+
+        def visit(name: str, path: list[str]) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                cycle = " -> ".join(path[path.index(name) :] + [name])
+                raise ValueError(f"Workflow has a cycle: {cycle}")
+
+            state[name] = "visiting"
+            for dependency in self.nodes[name].depends_on:
+                visit(dependency, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, [])
+
+        return order
+
+    @property
+    def state_path(self) -> Path:
+        """The path of the saved workflow state."""
+        return self.save_dir / WORKFLOW_STATE_FILE
+
+    def load_state(self) -> dict[str, dict[str, str]]:
+        """Loads the input hash and summary of the meetings finished in earlier runs."""
+        if not self.state_path.exists():
+            return {}
+
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state: dict[str, dict[str, str]]) -> None:
+        """Saves the workflow state atomically (so an interrupted write cannot corrupt it)."""
+        tmp_path = self.state_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp_path, self.state_path)
+
+    def critical_path(self) -> list[str]:
+        """Returns the longest chain of dependent nodes (by number of meetings)."""
+        longest: dict[str, list[str]] = {}
+
+        for name in self.order:
+            dependencies = self.nodes[name].depends_on
+            longest[name] = (
+                max((longest[dependency] for dependency in dependencies), key=len, default=[])
+                + [name]
+            )
+
+        return max(longest.values(), key=len, default=[])
+
+    async def async_run(
+        self,
+        max_concurrent_meetings: int = 4,
+        max_concurrency_per_meeting: int = 4,
+        timeout: float | None = None,
+        force: tuple[str, ...] = (),
+        client: AsyncOpenAI | None = None,
+        provider: Provider = "openai",
+        rate_limiter: RateLimiter | None = None,
+        cache: ResponseCache | None = None,
+        router: ModelRouter | None = None,
+        budget: Budget | None = None,
+        save_trace: bool = False,
+    ) -> WorkflowResult:
+        """Runs the workflow, starting each meeting as soon as its dependencies finish.
+
+        A failed meeting is recorded in the result and the nodes downstream of
+        it are skipped, while independent branches keep running.
+
+        :param max_concurrent_meetings: Maximum number of meetings running at once.
+        :param max_concurrency_per_meeting: Maximum concurrent requests within one meeting.
+        :param timeout: Optional wall-clock timeout in seconds for each meeting.
+        :param force: Names of nodes to re-run even if their inputs are unchanged
+            (their downstream nodes re-run if the new summary differs).
+        :param client: Optional shared `AsyncOpenAI`-compatible client
+                       (the pooled client of `provider` is used if None).
+        :param provider: The chat backend used when no `client` is given.
+        :param rate_limiter: Optional RateLimiter shared by all meetings.
+        :param cache: Optional ResponseCache shared by all meetings.
+        :param router: Optional ModelRouter choosing the model of each call.
+        :param budget: Optional Budget shared by all meetings.
+        :param save_trace: If True, save the spans of each meeting next to its discussion.
+        :return: A WorkflowResult with the outcome of every node.
+        """
+        if max_concurrent_meetings < 1:
+            raise ValueError("max_concurrent_meetings must be at least 1.")
+
+        for name in force:
+            if name not in self.nodes:
+                raise ValueError(f'Unknown node "{name}".')
+
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+
+        if client is None and not (cache is not None and cache.replay_only):
+            client = get_client(provider, asynchronous=True)
+
+        if cache is not None:
+            client = AsyncCachedOpenAI(cache=cache, client=client)
+
+        start_time = time.time()
+        state = self.load_state()
+        result = WorkflowResult()
+        meeting_semaphore = asyncio.Semaphore(max_concurrent_meetings)
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_node(name: str) -> str | None:
+            node = self.nodes[name]
+            upstream_summaries = await asyncio.gather(
+                *(tasks[dependency] for dependency in node.depends_on)
+            )
+
+            if None in upstream_summaries:
+                print(f"Skipping {name}: a dependency failed")
+                result.skipped.append(name)
+                return None
+
+            meeting_args = node.meeting_args(tuple(upstream_summaries))
+            input_hash = meeting_input_hash(meeting_args)
+            saved = state.get(name)
+
+            # Reuse the summary of an earlier run with the same inputs
+            if (
+                name not in force
+                and saved is not None
+                and saved["input_hash"] == input_hash
+                and (self.save_dir / f"{name}.json").exists()
+            ):
+                print(f"Reusing cached result of {name}")
+                result.cached.append(name)
+                result.runs[name] = MeetingRun(save_name=name, summary=saved["summary"])
+                return saved["summary"]
+
+            async with meeting_semaphore:
+                print(f"Running {name}")
+                run = await async_run_one_meeting(
+                    save_name=name,
+                    timeout=timeout,
+                    save_dir=self.save_dir,
+                    max_concurrency=max_concurrency_per_meeting,
+                    client=client,
+                    provider=provider,
+                    rate_limiter=rate_limiter,
+                    router=router,
+                    budget=budget,
+                    save_trace=save_trace,
+                    **meeting_args,
+                )
+
+            result.runs[name] = run
+
+            if not run.succeeded:
+                print(f"Warning: {name} failed: {run.error}")
+                return None
+
+            state[name] = {"input_hash": input_hash, "summary": run.summary}
+            self._save_state(state)
+
+            return run.summary
+
+        # Dependencies come first in topological order, so their tasks exist already
+        for name in self.order:
+            tasks[name] = asyncio.create_task(run_node(name))
+
+        await asyncio.gather(*tasks.values())
+        result.elapsed_seconds = time.time() - start_time
+
+        _print_workflow_report(self, result)
+
+        return result
+
+    def run(self, **kwargs: Any) -> WorkflowResult:
+        """Runs `async_run` to completion from synchronous code.
+
+        See `async_run` for the parameters.
+        """
+        return asyncio.run(self.async_run(**kwargs))
+
+
+def _print_workflow_report(workflow: Workflow, result: WorkflowResult) -> None:
+    """Prints the status, time and tokens of every node plus workflow totals."""
+    for name in workflow.order:
+        run = result.runs.get(name)
+
+        if run is None:
+            status = "skipped"
+        elif name in result.cached:
+            status = "cached"
+        elif run.succeeded:
+            status = (
+                f"ok, time {run.elapsed_seconds:.1f}s, "
+                f"input tokens {run.token_counts.get('input', 0):,}, "
+                f"output tokens {run.token_counts.get('output', 0):,}"
+            )
+        else:
+            status = f"FAILED ({run.error})"
+
+        print(f"{name}: {status}")
+
+    serial_seconds = sum(run.elapsed_seconds for run in result.runs.values())
+    print(
+        f"Meetings: {len(result.summaries)}/{len(workflow.nodes)} succeeded "
+        f"({len(result.cached)} cached)\n"
+        f"Critical path: {' -> '.join(workflow.critical_path())}\n"
+        f"Time: {int(result.elapsed_seconds // 60)}:{int(result.elapsed_seconds % 60):02d} "
+        f"(serial meeting time {int(serial_seconds // 60)}:{int(serial_seconds % 60):02d})"
+    )
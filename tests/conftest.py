@@ -0,0 +1,55 @@
+"""Shared fixtures of the tests (all offline, against the local stand-in servers)."""
+
+import pytest
+
+import virtual_lab.utils
+from virtual_lab.cli import SpecAgent
+from virtual_lab.mock import LatencyDistribution, MockChatServer
+
+
+class _WhitespaceEncoding:
+    """Counts whitespace-separated words as tokens."""
+
+    def encode(self, text: str, **kwargs) -> list[str]:
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def offline_encoding(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Replaces the tiktoken encoding, which tiktoken downloads on first use."""
+    monkeypatch.setattr(
+        virtual_lab.utils, "get_encoding", lambda name="cl100k_base": _WhitespaceEncoding()
+    )
+
+
+@pytest.fixture
+def server() -> MockChatServer:
+    """A running mock chat server with fast, deterministic replies."""
+    with MockChatServer(
+        latency=LatencyDistribution("constant", time_to_first_token=0.001, tokens_per_second=1e6),
+        completion_tokens=(20, 20),
+        batch_latency_seconds=0.0,
+        seed=0,
+    ) as mock_server:
+        yield mock_server
+
+
+@pytest.fixture
+def scientist() -> SpecAgent:
+    """An agent with a system prompt."""
+    return SpecAgent(title="Scientist", prompt="You are a scientist.", model="gpt-4.1")
+
+
+@pytest.fixture
+def lead() -> SpecAgent:
+    """A team lead with a system prompt."""
+    return SpecAgent(title="Lead", prompt="You lead the team.", model="gpt-4.1")
+
+
+@pytest.fixture
+def members() -> tuple[SpecAgent, ...]:
+    """Two team members with system prompts."""
+    return (
+        SpecAgent(title="Chemist", prompt="You are a chemist.", model="gpt-4.1"),
+        SpecAgent(title="Biologist", prompt="You are a biologist.", model="gpt-4.1"),
+    )
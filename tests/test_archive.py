@@ -0,0 +1,48 @@
+"""Tests of the SQLite meeting archive."""
+
+import json
+import os
+
+from virtual_lab.archive import MeetingArchive
+
+
+def _num_blobs(archive: MeetingArchive) -> int:
+    return archive._connection.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+
+def test_replacing_a_meeting_deletes_its_orphaned_blobs(tmp_path) -> None:
+    header = {"agent": "User", "message": "Design a nanobody."}
+
+    with MeetingArchive(tmp_path / "archive.sqlite") as archive:
+        archive.add_meeting("a", [header, {"agent": "Scientist", "message": "First draft."}])
+        archive.add_meeting("b", [header, {"agent": "Scientist", "message": "Other answer."}])
+        assert _num_blobs(archive) == 3
+
+        archive.add_meeting("a", [header, {"agent": "Scientist", "message": "Revised draft."}])
+
+        # The first draft is gone, and the header shared with "b" is kept
+        assert _num_blobs(archive) == 3
+        assert archive.get_turns("a")[-1]["message"] == "Revised draft."
+        assert archive.get_turns("b") == [
+            header,
+            {"agent": "Scientist", "message": "Other answer."},
+        ]
+
+
+def test_reimporting_a_changed_file_replaces_it(tmp_path) -> None:
+    discussion_dir = tmp_path / "discussions"
+    discussion_dir.mkdir()
+    path = discussion_dir / "discussion_1.json"
+    path.write_text(json.dumps([{"agent": "Scientist", "message": "First draft."}]))
+
+    with MeetingArchive(tmp_path / "archive.sqlite") as archive:
+        assert archive.import_directory(discussion_dir) == 1
+        assert archive.import_directory(discussion_dir) == 0
+
+        mtime = path.stat().st_mtime
+        path.write_text(json.dumps([{"agent": "Scientist", "message": "Revised draft."}]))
+        os.utime(path, (mtime + 1, mtime + 1))
+        assert archive.import_directory(discussion_dir) == 1
+
+        assert archive.load_summaries(["discussion_1"]) == ("Revised draft.",)
+        assert _num_blobs(archive) == 1
@@ -0,0 +1,48 @@
+"""Tests of running individual meetings through the Batch API."""
+
+import json
+
+from virtual_lab.batch import BatchMeeting, run_batch_meetings
+
+
+def _meetings(scientist) -> list[BatchMeeting]:
+    return [
+        BatchMeeting(team_member=scientist, agenda=f"Design experiment {i}.", save_name=f"m{i}")
+        for i in range(2)
+    ]
+
+
+def test_batch_meetings_run_every_turn(server, scientist, tmp_path) -> None:
+    meetings = _meetings(scientist)
+
+    summaries = run_batch_meetings(
+        meetings, save_dir=tmp_path, client=server.client(), poll_interval_seconds=0.01
+    )
+
+    # One round is an answer, a critique and a revision (after the header)
+    assert all(summary for summary in summaries)
+    assert [len(meeting.discussion) for meeting in meetings] == [4, 4]
+    assert len(server.batches) == 3
+
+    for meeting in meetings:
+        saved = json.loads((tmp_path / f"{meeting.save_name}.json").read_text())
+        assert saved == meeting.discussion
+
+
+def test_batch_meetings_resume_from_discussion(server, scientist, tmp_path) -> None:
+    meetings = _meetings(scientist)
+    run_batch_meetings(
+        meetings, save_dir=tmp_path, client=server.client(), poll_interval_seconds=0.01
+    )
+
+    # Drop the last turn of one meeting, as if the run was interrupted before it
+    meetings[1].discussion.pop()
+    num_batches = len(server.batches)
+
+    run_batch_meetings(
+        meetings, save_dir=tmp_path, client=server.client(), poll_interval_seconds=0.01
+    )
+
+    assert len(server.batches) == num_batches + 1
+    assert [len(meeting.discussion) for meeting in meetings] == [4, 4]
+    assert meetings[1].discussion[-1]["agent"] == "Scientist"
@@ -0,0 +1,33 @@
+"""Tests of keeping the discussion within a token budget."""
+
+import pytest
+
+from virtual_lab.discussion_context import DiscussionContext
+
+
+def _turns(num_turns: int) -> list[dict[str, str]]:
+    return [
+        {"agent": f"Agent {i % 2}", "message": " ".join(["word"] * 20)}
+        for i in range(num_turns)
+    ]
+
+
+def test_turns_stay_verbatim_when_summarizing_fails() -> None:
+    context = DiscussionContext(token_budget=50, min_recent_turns=1)
+    turns = _turns(4)
+
+    def fail(messages):
+        raise RuntimeError("summarizer unavailable")
+
+    with pytest.raises(RuntimeError):
+        context.update(turns, fail)
+
+    assert context.num_compacted == 0
+    assert context.recent_turns() == turns
+
+    # The next update summarizes the same turns
+    context.update(turns, lambda messages: "summary")
+
+    assert context.num_compacted == 2
+    assert context.agent_summaries == {"Agent 0": "summary", "Agent 1": "summary"}
+    assert context.token_count() <= 50
@@ -0,0 +1,58 @@
+"""Tests of building fine-tuning datasets from saved discussions."""
+
+import json
+
+from virtual_lab.finetuning import build_finetuning_datasets
+
+
+def _save_discussions(tmp_path) -> list:
+    discussion = [
+        {"agent": "User", "message": "Design a nanobody."},
+        {"agent": "Scientist", "message": "Start from an existing nanobody."},
+        {"agent": "Scientific Critic", "message": "Justify the choice."},
+        {"agent": "Scientist", "message": "It binds the target with high affinity."},
+    ]
+    paths = []
+
+    # The second file is a copy, so its examples are duplicates
+    for i in range(2):
+        path = tmp_path / f"discussion_{i}.json"
+        path.write_text(json.dumps(discussion))
+        paths.append(path)
+
+    return paths
+
+
+def test_cost_is_reported_before_shards_are_written(tmp_path, capsys) -> None:
+    paths = _save_discussions(tmp_path)
+    save_dir = tmp_path / "data"
+
+    datasets = build_finetuning_datasets(
+        paths,
+        save_dir=save_dir,
+        agent_prompts={"Scientist": "You are a scientist."},
+        num_workers=1,
+    )
+
+    output = capsys.readouterr().out
+    dataset = datasets["Scientist"]
+    assert output.index("Finetuning cost") < output.index("wrote 1 shards")
+    assert dataset.num_samples > 0 and dataset.num_duplicates == dataset.num_samples
+    assert len(dataset.paths) == 1
+    assert len(dataset.paths[0].read_text().splitlines()) == dataset.num_samples
+
+
+def test_dry_run_writes_nothing(tmp_path) -> None:
+    paths = _save_discussions(tmp_path)
+    save_dir = tmp_path / "data"
+
+    datasets = build_finetuning_datasets(
+        paths,
+        save_dir=save_dir,
+        agent_prompts={"Scientist": "You are a scientist."},
+        num_workers=1,
+        dry_run=True,
+    )
+
+    assert datasets["Scientist"].costs
+    assert not save_dir.exists()
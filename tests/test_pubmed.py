@@ -0,0 +1,92 @@
+"""Tests of the PubMed client against the local PubMed stand-in."""
+
+import time
+
+import pytest
+
+from virtual_lab.pubmed import LocalPubMedServer, set_pubmed_client
+from virtual_lab.rate_limiter import RateLimiter, set_rate_limiter
+from virtual_lab.utils import run_pubmed_search
+
+
+def _bioc_article(title: str, abstract: str, paragraph: str) -> list[dict]:
+    passages = [
+        {"infons": {"section_type": "TITLE", "type": "front"}, "text": title},
+        {"infons": {"section_type": "ABSTRACT", "type": "abstract"}, "text": abstract},
+        {"infons": {"section_type": "RESULTS", "type": "paragraph"}, "text": paragraph},
+    ]
+
+    return [{"documents": [{"passages": passages}]}]
+
+
+ARTICLES = {
+    str(pmcid): _bioc_article(
+        f"Nanobody study {pmcid}",
+        f"Abstract of study {pmcid}.",
+        f"Results of study {pmcid}.",
+    )
+    for pmcid in range(1, 5)
+}
+
+
+@pytest.fixture
+def pubmed_server() -> LocalPubMedServer:
+    # Without NCBI's rate limit, since the stand-in is local
+    set_rate_limiter(RateLimiter())
+
+    with LocalPubMedServer(articles=ARTICLES) as server:
+        yield server
+
+    set_pubmed_client(None)
+    set_rate_limiter(None)
+
+
+def test_articles_are_cached_on_disk(pubmed_server, tmp_path) -> None:
+    client = pubmed_server.client(cache_dir=tmp_path)
+    article = client.get_article("1")
+    assert article["title"] == "Nanobody study 1"
+    assert client.get_article("404") is None
+    num_requests = pubmed_server.num_requests
+
+    # A new client (e.g., in a new process) reads both, including the missing article, from disk
+    other_client = pubmed_server.client(cache_dir=tmp_path)
+    assert other_client.get_article("1") == article
+    assert other_client.get_article("404") is None
+    assert pubmed_server.num_requests == num_requests
+
+
+def test_searches_expire_after_ttl(pubmed_server, monkeypatch) -> None:
+    client = pubmed_server.client(cache_dir=None, search_ttl_seconds=60)
+
+    assert client.search("nanobodies", retmax=2) == ["1", "2"]
+    assert client.search("nanobodies", retmax=2) == ["1", "2"]
+    assert pubmed_server.num_requests == 1
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    pubmed_server.search_results["nanobodies"] = ["3", "4"]
+
+    assert client.search("nanobodies", retmax=2) == ["3", "4"]
+    assert pubmed_server.num_requests == 2
+
+
+def test_articles_are_fetched_over_pooled_connections(pubmed_server) -> None:
+    client = pubmed_server.client(cache_dir=None, max_workers=2)
+
+    articles = client.get_articles(["1", "2", "3", "4"])
+    client.search("nanobodies", retmax=4)
+
+    assert [article["title"] for article in articles] == [
+        f"Nanobody study {pmcid}" for pmcid in range(1, 5)
+    ]
+    assert pubmed_server.num_requests == 5
+    assert pubmed_server.num_connections <= 2
+
+
+def test_pubmed_search_tool(pubmed_server, capsys) -> None:
+    set_pubmed_client(pubmed_server.client(cache_dir=None))
+
+    text = run_pubmed_search("nanobodies", num_articles=2, abstract_only=True)
+
+    assert "Nanobody study 1" in text and "Abstract of study 2." in text
+    assert "Results of study" not in text and "Nanobody study 3" not in text
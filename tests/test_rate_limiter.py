@@ -0,0 +1,59 @@
+"""Tests of the shared rate limiter."""
+
+import logging
+import threading
+
+import openai
+import pytest
+
+from virtual_lab.rate_limiter import RateLimiter, get_rate_limiter, set_rate_limiter
+
+
+def test_refund_is_clamped_to_bucket_capacity() -> None:
+    limiter = RateLimiter(tokens_per_minute=600)
+
+    # A refund larger than the reservation cannot let a later call overdraw the limit
+    limiter.reserve("gpt-4.1", tokens=100)
+    limiter.record_tokens("gpt-4.1", -10_000)
+
+    assert limiter.reserve("gpt-4.1", tokens=600) == 0.0
+    assert limiter.reserve("gpt-4.1", tokens=60) == pytest.approx(6.0, abs=0.1)
+
+
+def test_retries_are_logged(server, caplog) -> None:
+    server.failure_rate = 1.0
+    limiter = RateLimiter(max_retries=2, initial_backoff_seconds=0.0)
+    client = server.client(max_retries=0)
+    stats = {}
+
+    with caplog.at_level(logging.INFO, logger="virtual_lab.rate_limiter"):
+        with pytest.raises(openai.InternalServerError):
+            limiter.call(
+                lambda: client.chat.completions.create(
+                    model="gpt-4.1", messages=[{"role": "user", "content": "Hi"}]
+                ),
+                model="gpt-4.1",
+                stats=stats,
+            )
+
+    assert stats["retries"] == limiter.num_retries == 2
+    assert [record.getMessage() for record in caplog.records] == [
+        "Retrying gpt-4.1 call in 0.0s after InternalServerError (retry 1/2)",
+        "Retrying gpt-4.1 call in 0.0s after InternalServerError (retry 2/2)",
+    ]
+
+
+def test_default_limiter_is_shared_across_threads() -> None:
+    set_rate_limiter(None)
+    limiters = []
+    threads = [
+        threading.Thread(target=lambda: limiters.append(get_rate_limiter())) for _ in range(8)
+    ]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(limiter is limiters[0] for limiter in limiters)
+    set_rate_limiter(None)
@@ -0,0 +1,100 @@
+"""Tests of the on-disk response cache."""
+
+import json
+import os
+import threading
+
+import pytest
+
+from virtual_lab.response_cache import CachedOpenAI, ResponseCache
+
+
+def _request(content: str = "Hi") -> dict:
+    return {"model": "gpt-4.1", "messages": [{"role": "user", "content": content}]}
+
+
+def test_hit_and_miss(server, tmp_path) -> None:
+    cache = ResponseCache(tmp_path)
+    client = CachedOpenAI(cache, client=server.client())
+
+    first = client.chat.completions.create(**_request())
+    second = client.chat.completions.create(**_request())
+    client.chat.completions.create(**_request("Hello"))
+
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(server.records) == 2
+    assert second.choices[0].message.content == first.choices[0].message.content
+
+
+def test_namespaces_do_not_share_entries(server, tmp_path) -> None:
+    cache = ResponseCache(tmp_path)
+
+    for namespace in ("run_1", "run_2", "run_1"):
+        client = CachedOpenAI(cache, client=server.client(), namespace=namespace)
+        client.chat.completions.create(**_request())
+
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(server.records) == 2
+
+
+def test_replay_only_serves_hits_and_rejects_misses(server, tmp_path) -> None:
+    CachedOpenAI(ResponseCache(tmp_path), client=server.client()).chat.completions.create(
+        **_request()
+    )
+    replay = CachedOpenAI(ResponseCache(tmp_path, replay_only=True))
+
+    assert replay.chat.completions.create(**_request()).choices[0].message.content
+
+    with pytest.raises(ValueError, match="Cache miss"):
+        replay.chat.completions.create(**_request("Hello"))
+
+    with pytest.raises(ValueError, match="Streamed request"):
+        replay.chat.completions.create(**_request(), stream=True)
+
+    with pytest.raises(ValueError, match="Stored request"):
+        replay.responses.create(model="gpt-4.1", input="Hi", store=True)
+
+    assert len(server.records) == 1
+
+
+def test_lru_eviction_every_n_writes(server, tmp_path) -> None:
+    completion = server.client().chat.completions.create(**_request())
+    entry_size = len(completion.model_dump_json())
+    cache = ResponseCache(tmp_path, max_size_bytes=2 * entry_size, evict_every=3)
+
+    # Entries get increasing modification times, and reading the first marks it as used
+    for i in range(2):
+        cache.put(_request(str(i)), completion)
+        os.utime(cache._path(cache.request_key(_request(str(i)))), (i, i))
+    assert cache.get(_request("0")) is not None
+
+    # The third write triggers an eviction of the least recently used entry
+    cache.put(_request("2"), completion)
+
+    assert cache.get(_request("1")) is None
+    assert cache.get(_request("0")) is not None
+    assert cache.get(_request("2")) is not None
+    assert cache.size_bytes() <= 2 * entry_size
+
+
+def test_concurrent_writes_of_the_same_request(server, tmp_path) -> None:
+    completion = server.client().chat.completions.create(**_request())
+    cache = ResponseCache(tmp_path, evict_every=None)
+    barrier = threading.Barrier(8)
+
+    def put() -> None:
+        barrier.wait()
+        for _ in range(20):
+            cache.put(_request(), completion)
+
+    threads = [threading.Thread(target=put) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every writer used its own temporary file, and the entry is complete
+    assert not list(tmp_path.glob("*.tmp"))
+    path = cache._path(cache.request_key(_request()))
+    assert list(tmp_path.iterdir()) == [path]
+    assert json.loads(path.read_text())["id"] == completion.id
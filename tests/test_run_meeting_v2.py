@@ -0,0 +1,141 @@
+"""Tests of the v2 meeting engines against the mock chat server."""
+
+import asyncio
+import json
+
+import pytest
+
+from virtual_lab.routing import Budget
+from virtual_lab.run_meeting_v2 import STOPPED_EARLY_MESSAGE, async_run_meeting, run_meeting
+
+
+LAYOUTS = ("single", "conversation", "stateful")
+
+
+def _participants(meeting_type, lead, members, scientist) -> dict:
+    if meeting_type == "team":
+        return {"team_lead": lead, "team_members": members}
+
+    return {"team_member": scientist}
+
+
+@pytest.mark.parametrize("meeting_type", ["team", "individual"])
+@pytest.mark.parametrize("prompt_layout", LAYOUTS)
+def test_run_meeting(
+    server, lead, members, scientist, tmp_path, meeting_type, prompt_layout
+) -> None:
+    summary = run_meeting(
+        meeting_type=meeting_type,
+        agenda="Design a nanobody.",
+        save_dir=tmp_path,
+        num_rounds=1,
+        return_summary=True,
+        client=server.client(),
+        prompt_layout=prompt_layout,
+        **_participants(meeting_type, lead, members, scientist),
+    )
+
+    discussion = json.loads((tmp_path / "discussion.json").read_text())
+    assert summary == discussion[-1]["message"]
+    assert (tmp_path / "discussion.md").exists()
+
+    # Team: lead, both members, lead summary; individual: answer, critique, revision
+    assert len(server.records) == (4 if meeting_type == "team" else 3)
+    assert all(record.status == 200 for record in server.records)
+
+
+@pytest.mark.parametrize("meeting_type", ["team", "individual"])
+@pytest.mark.parametrize("prompt_layout", LAYOUTS)
+def test_async_run_meeting(
+    server, lead, members, scientist, tmp_path, meeting_type, prompt_layout
+) -> None:
+    async def run() -> str | None:
+        async with server.async_client() as client:
+            return await async_run_meeting(
+                meeting_type=meeting_type,
+                agenda="Design a nanobody.",
+                save_dir=tmp_path,
+                num_rounds=1,
+                return_summary=True,
+                client=client,
+                prompt_layout=prompt_layout,
+                **_participants(meeting_type, lead, members, scientist),
+            )
+
+    summary = asyncio.run(run())
+
+    discussion = json.loads((tmp_path / "discussion.json").read_text())
+    assert summary == discussion[-1]["message"]
+    assert len(server.records) == (4 if meeting_type == "team" else 3)
+
+
+def test_resume_from_interrupted_transcript(server, lead, members, tmp_path) -> None:
+    meeting_args = dict(
+        meeting_type="team",
+        agenda="Design a nanobody.",
+        save_dir=tmp_path,
+        team_lead=lead,
+        team_members=members,
+        num_rounds=2,
+        return_summary=True,
+        save_transcript=True,
+    )
+    run_meeting(client=server.client(), **meeting_args)
+    full_discussion = json.loads((tmp_path / "discussion.json").read_text())
+    num_calls = len(server.records)
+
+    # Keep the header and the first three turns, as if the run crashed after them
+    transcript_path = tmp_path / "discussion.jsonl"
+    lines = transcript_path.read_text().splitlines(keepends=True)
+    transcript_path.write_text("".join(lines[:4]) + '{"index": 4, "agent"')
+
+    summary = run_meeting(
+        client=server.client(), resume_from=transcript_path, **meeting_args
+    )
+
+    discussion = json.loads((tmp_path / "discussion.json").read_text())
+    assert len(server.records) - num_calls == num_calls - 3
+    assert discussion[:4] == full_discussion[:4]
+    assert [turn["agent"] for turn in discussion] == [
+        turn["agent"] for turn in full_discussion
+    ]
+    assert summary == discussion[-1]["message"]
+
+
+def test_budget_downgrades_models(server, scientist, tmp_path) -> None:
+    budget = Budget(max_cost=1.0, downgrade_threshold=0.0)
+
+    run_meeting(
+        meeting_type="individual",
+        agenda="Design a nanobody.",
+        save_dir=tmp_path,
+        team_member=scientist,
+        client=server.client(),
+        budget=budget,
+    )
+
+    assert {record.model for record in server.records} == {"gpt-4.1-mini"}
+    assert budget.num_downgrades == len(server.records) == budget.num_calls
+    assert 0 < budget.cost < 1.0
+
+
+def test_budget_stops_meeting_without_summary(server, lead, members, tmp_path) -> None:
+    budget = Budget(max_tokens=1)
+
+    summary = run_meeting(
+        meeting_type="team",
+        agenda="Design a nanobody.",
+        save_dir=tmp_path,
+        team_lead=lead,
+        team_members=members,
+        num_rounds=2,
+        return_summary=True,
+        client=server.client(),
+        budget=budget,
+    )
+
+    discussion = json.loads((tmp_path / "discussion.json").read_text())
+    assert summary is None
+    assert len(server.records) == 1
+    assert discussion[-1]["agent"] == "User"
+    assert discussion[-1]["message"].startswith(STOPPED_EARLY_MESSAGE)
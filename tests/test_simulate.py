@@ -0,0 +1,30 @@
+"""Tests of the meeting dry run."""
+
+from virtual_lab.response_cache import ResponseCache
+from virtual_lab.routing import Budget
+from virtual_lab.simulate import simulate_meeting
+
+
+def test_simulate_meeting_leaves_caller_state_untouched(lead, members, tmp_path) -> None:
+    budget = Budget(max_cost=10.0)
+    cache = ResponseCache(tmp_path / "cache")
+    token_counts = {"input": 0, "output": 0, "cached": 0}
+
+    simulation = simulate_meeting(
+        meeting_type="team",
+        agenda="Design a nanobody.",
+        team_lead=lead,
+        team_members=members,
+        num_rounds=1,
+        budget=budget,
+        cache=cache,
+        token_counts=token_counts,
+        resume_from=tmp_path / "missing.jsonl",
+    )
+
+    # Lead opening, both members, and the lead's final summary
+    assert len(simulation.calls) == 4
+    assert simulation.cost > 0
+    assert (budget.cost, budget.num_calls) == (0.0, 0)
+    assert token_counts == {"input": 0, "output": 0, "cached": 0}
+    assert not any((tmp_path / "cache").glob("*.json"))
@@ -0,0 +1,86 @@
+"""Tests of the stateful Responses API stand-in and the "stateful" prompt layout."""
+
+import openai
+import pytest
+
+from virtual_lab.conversation_state import ConversationState
+from virtual_lab.mock import LatencyDistribution, MockChatServer
+from virtual_lab.run_meeting_v2 import run_meeting
+
+
+def test_mock_chains_previous_response_id(server) -> None:
+    client = server.client(max_retries=0)
+
+    first = client.responses.create(model="gpt-4.1", input="Propose a target.", store=True)
+    second = client.responses.create(
+        model="gpt-4.1",
+        input=[{"role": "user", "content": "Refine it."}],
+        previous_response_id=first.id,
+        store=True,
+    )
+
+    assert server.responses[second.id] == [
+        {"role": "user", "content": "Propose a target."},
+        {"role": "assistant", "content": first.output_text},
+        {"role": "user", "content": "Refine it."},
+        {"role": "assistant", "content": second.output_text},
+    ]
+
+    # The input tokens cover the whole chained conversation, not just the new input
+    assert second.usage.input_tokens > first.usage.input_tokens + first.usage.output_tokens
+
+    with pytest.raises(openai.BadRequestError, match="not found"):
+        client.responses.create(
+            model="gpt-4.1", input="Refine it.", previous_response_id="resp_unknown"
+        )
+
+
+def test_conversation_state_uploads_only_new_turns(lead, members) -> None:
+    state = ConversationState(header_text="AGENDA")
+    discussion = [{"agent": "User", "message": "AGENDA"}]
+
+    first = state.request(lead, discussion, "Open the meeting.", "gpt-4.1", 0.2)
+    assert "previous_response_id" not in first
+    assert [message["content"] for message in first["input"]] == [
+        "AGENDA",
+        "Open the meeting.",
+    ]
+    state.update(lead.title, "resp_1")
+
+    discussion += [
+        {"agent": lead.title, "message": "Let us start."},
+        {"agent": members[0].title, "message": "I suggest a target."},
+    ]
+    second = state.request(lead, discussion, "Summarize.", "gpt-4.1", 0.2)
+
+    # The lead's own reply is already part of its chain
+    assert second["previous_response_id"] == "resp_1"
+    assert [message["content"] for message in second["input"]] == [
+        f"{members[0].title}: I suggest a target.",
+        "Summarize.",
+    ]
+
+
+def test_stateful_layout_uploads_less_than_conversation(lead, members, tmp_path) -> None:
+    latency = LatencyDistribution("constant", time_to_first_token=0.001, tokens_per_second=1e6)
+    request_bytes = {}
+
+    # Long replies, so that the discussion dominates the requests
+    for prompt_layout in ("conversation", "stateful"):
+        with MockChatServer(latency=latency, completion_tokens=(200, 200), seed=0) as server:
+            run_meeting(
+                meeting_type="team",
+                agenda="Design a nanobody.",
+                save_dir=tmp_path / prompt_layout,
+                team_lead=lead,
+                team_members=members,
+                num_rounds=3,
+                client=server.client(),
+                prompt_layout=prompt_layout,
+            )
+            request_bytes[prompt_layout] = [record.request_bytes for record in server.records]
+
+    # Same calls, but each stateful call only uploads the turns since the agent last spoke
+    assert len(request_bytes["stateful"]) == len(request_bytes["conversation"])
+    assert sum(request_bytes["stateful"]) < sum(request_bytes["conversation"]) / 2
+    assert max(request_bytes["stateful"]) < max(request_bytes["conversation"])